@@ -0,0 +1,80 @@
+"""
+Compares the transcription backends on local fixtures: speed and word error rate.
+
+Fixtures are pairs in one folder: `name.wav` (or .mp3, .m4a, .mp4) and
+`name.txt` holding the reference transcript. Each audio file is decoded once,
+then every backend transcribes it with the same decoding profile and language.
+The script reports, per backend:
+  - load: model loading time in seconds,
+  - RTF: transcription time / audio duration (below 1.0 = faster than real time),
+  - WER: word error rate against the references (case and punctuation ignored).
+
+Usage:
+    python benchmarks/bench_backends.py --fixtures fixtures/ --model small --profile fast --language fr
+"""
+import argparse
+import glob
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from audio import decode_audio, duration_of
+from backends import BACKENDS, create_backend, word_error_rate
+from decoding import DECODING_PROFILES, decode_options
+
+AUDIO_EXTENSIONS = (".wav", ".mp3", ".m4a", ".mp4")
+
+
+def load_fixtures(folder: str):
+    fixtures = []
+    for path in sorted(glob.glob(os.path.join(folder, "*"))):
+        stem, ext = os.path.splitext(path)
+        if ext in AUDIO_EXTENSIONS and os.path.exists(f"{stem}.txt"):
+            with open(f"{stem}.txt", encoding="utf-8") as f:
+                fixtures.append((os.path.basename(stem), decode_audio(path), f.read()))
+    return fixtures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--fixtures", required=True, help="Dossier des fichiers audio et des transcriptions de référence")
+    parser.add_argument("--model", default="small", help="Taille du modèle Whisper")
+    parser.add_argument("--device", default="cpu", help="cpu ou cuda")
+    parser.add_argument("--backends", nargs="+", default=list(BACKENDS), choices=list(BACKENDS))
+    parser.add_argument("--profile", default="balanced", choices=list(DECODING_PROFILES))
+    parser.add_argument("--language", default="fr", help="Langue imposée à tous les moteurs")
+    args = parser.parse_args()
+
+    fixtures = load_fixtures(args.fixtures)
+    if not fixtures:
+        sys.exit(f"Aucune paire audio + .txt dans {args.fixtures}")
+    total = sum(duration_of(audio) for _, audio, _ in fixtures)
+    print(f"{len(fixtures)} fixtures, {total:.0f}s of audio, model {args.model}, profile {args.profile}")
+
+    options = decode_options(args.profile, args.device, args.language)
+    print(f"{'backend':>15} {'load':>7} {'RTF':>7} {'WER':>7}")
+    for name in args.backends:
+        try:
+            start = time.perf_counter()
+            backend = create_backend(name, args.model, args.device)
+            load = time.perf_counter() - start
+        except ImportError as e:
+            print(f"{name:>15} skipped ({e})")
+            continue
+
+        elapsed, errors, words = 0.0, 0.0, 0
+        for fixture, audio, reference in fixtures:
+            start = time.perf_counter()
+            result = backend.transcribe(audio, options)
+            elapsed += time.perf_counter() - start
+            # WER weighted by reference length over all fixtures
+            n = len(reference.split())
+            errors += word_error_rate(reference, result.text) * n
+            words += n
+        print(f"{name:>15} {load:>6.1f}s {elapsed / total:>7.3f} {errors / max(words, 1):>7.1%}")
+
+
+if __name__ == "__main__":
+    main()
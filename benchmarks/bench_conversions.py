@@ -0,0 +1,83 @@
+"""
+Measures the Markdown <-> HTML conversions done by the Result page and the exporter.
+
+For each document size it times, in milliseconds:
+  - md>html: markdown.markdown (value given to st_quill),
+  - html>md: markdownify (editor content back to the canonical Markdown),
+  - round-trip: both, as the Result page did on every refinement,
+  - memoized: the same calls through conversions.py once the content is cached (a rerun).
+
+Usage:
+    python benchmarks/bench_conversions.py --sizes 5000 10000 25000 50000 --repeat 3
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+import markdown
+from markdownify import markdownify
+
+from conversions import cache_clear, html_to_markdown, markdown_to_html
+
+WORDS = (
+    "économie énergie transition politique budget croissance emploi climat industrie innovation "
+    "recherche santé éducation réforme investissement marché entreprise territoire souveraineté données"
+).split()
+
+
+def synthetic_summary(words: int, seed: int = 0) -> str:
+    """Markdown shaped like a long synthesis: sections, paragraphs, bullet lists, bold terms."""
+    rng = random.Random(seed)
+    parts, count, section = [], 0, 1
+    while count < words:
+        parts.append(f"## {section}. {rng.choice(WORDS).capitalize()} et {rng.choice(WORDS)}\n")
+        for _ in range(3):
+            sentence = " ".join(rng.choice(WORDS) for _ in range(60))
+            parts.append(f"{sentence.capitalize()} **{rng.choice(WORDS)}** {sentence[:80]}.\n")
+            count += 62
+        for _ in range(4):
+            parts.append(f"- **{rng.choice(WORDS).capitalize()}** : " + " ".join(rng.choice(WORDS) for _ in range(15)))
+            count += 16
+        parts.append("")
+        section += 1
+    return "\n".join(parts)
+
+
+def timed(fn, *args, repeat: int = 3) -> float:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(*args)
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[5000, 10000, 25000, 50000], help="Tailles des documents (mots)")
+    parser.add_argument("--repeat", type=int, default=3, help="Nombre de mesures par cas (médiane)")
+    args = parser.parse_args()
+
+    print(f"{'words':>7} {'md>html':>10} {'html>md':>10} {'round-trip':>11} {'memoized':>10}")
+    for size in args.sizes:
+        text = synthetic_summary(size)
+        html = markdown.markdown(text, extensions=["extra"])
+
+        md_to_html = timed(markdown.markdown, text, repeat=args.repeat)
+        html_to_md = timed(lambda h: markdownify(h, heading_style="ATX"), html, repeat=args.repeat)
+
+        cache_clear()
+        markdown_to_html(text)
+        html_to_markdown(html)
+        memoized = timed(lambda: (markdown_to_html(text), html_to_markdown(html)), repeat=args.repeat)
+
+        print(f"{size:>7} {md_to_html:>8.1f}ms {html_to_md:>8.1f}ms {md_to_html + html_to_md:>9.1f}ms {memoized:>8.2f}ms")
+
+
+if __name__ == "__main__":
+    main()
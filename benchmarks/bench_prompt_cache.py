@@ -0,0 +1,77 @@
+"""
+Measures the prompt-eval time saved per chunk by the system/user prompt layout.
+
+Each chunk is sent twice to Ollama:
+  - "inline": one user message with the transcript in the middle of the instructions
+    (the historical layout, nothing can be reused between chunks),
+  - "prefix": static system message + variable user message (shared cacheable prefix).
+
+Usage:
+    python benchmarks/bench_prompt_cache.py --file transcript.txt --type medium --chunks 5
+"""
+import argparse
+import os
+import statistics
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from ollama import Client
+
+from prompts import PromptManager
+from summarizer import Summarizer
+
+
+def synthetic_transcript(words: int = 12000) -> str:
+    sentence = "Le conférencier explique les enjeux économiques et techniques du projet présenté aujourd'hui. "
+    return sentence * (words // len(sentence.split()))
+
+
+def run(client, model, messages, num_ctx, keep_alive):
+    response = client.chat(
+        model=model,
+        messages=messages,
+        options={"num_ctx": num_ctx, "num_predict": 1},
+        keep_alive=keep_alive,
+    )
+    # Durations are reported in nanoseconds
+    return response.get("prompt_eval_duration", 0) / 1e6, response.get("prompt_eval_count", 0)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark du cache de préfixe des prompts")
+    parser.add_argument("--file", help="Transcription à découper (défaut : texte synthétique)")
+    parser.add_argument("--type", default="medium", choices=["short", "medium", "long", "news"])
+    parser.add_argument("--chunks", type=int, default=5)
+    parser.add_argument("--model", default=os.getenv("OLLAMA_MODEL", "gemma3:4b"))
+    parser.add_argument("--host", default=os.getenv("OLLAMA_HOST", "http://localhost:11434"))
+    args = parser.parse_args()
+
+    text = open(args.file, encoding="utf-8").read() if args.file else synthetic_transcript()
+    client = Client(host=args.host)
+    prompt_manager = PromptManager()
+    summarizer = Summarizer(client, args.model, prompt_manager, summary_type=args.type)
+    chunks = summarizer.chunk_text(text)[: args.chunks]
+    num_ctx = summarizer.budget.plan([], "chunk", min_ctx=summarizer._chunk_ctx_floor())["num_ctx"]
+
+    summarizer.warm_up()
+
+    results = {"inline": [], "prefix": []}
+    for chunk in chunks:
+        system, user = prompt_manager._get_parts(args.type, "chunk", chunk)
+        inline = [{"role": "user", "content": f"{user.strip()}\n\n{system.strip()}"}]
+        prefix = prompt_manager.get_messages(args.type, "chunk", chunk)
+        results["inline"].append(run(client, args.model, inline, num_ctx, summarizer.keep_alive))
+        results["prefix"].append(run(client, args.model, prefix, num_ctx, summarizer.keep_alive))
+
+    print(f"Modèle : {args.model} | type : {args.type} | chunks : {len(chunks)} | num_ctx : {num_ctx}")
+    for layout, runs in results.items():
+        ms = [r[0] for r in runs]
+        tokens = [r[1] for r in runs]
+        print(f"{layout:>7} : prompt eval {statistics.mean(ms):8.1f} ms/chunk, {statistics.mean(tokens):7.0f} tokens évalués/chunk")
+    saved = statistics.mean(r[0] for r in results["inline"]) - statistics.mean(r[0] for r in results["prefix"])
+    print(f"Gain moyen : {saved:.1f} ms par chunk")
+
+
+if __name__ == "__main__":
+    main()
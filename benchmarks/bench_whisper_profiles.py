@@ -0,0 +1,58 @@
+"""
+Measures the real-time factor (RTF) of each Whisper decoding profile.
+
+The input is decoded once in memory and cut into segments like a local video.
+For each profile the whole file is transcribed with the language detected
+once, and the script reports:
+  - elapsed: transcription wall time in seconds,
+  - RTF: elapsed / audio duration (below 1.0 = faster than real time),
+  - words: length of the transcript, to spot profiles that drop speech.
+
+Usage:
+    python benchmarks/bench_whisper_profiles.py --file talk.mp4 --model small --device cpu --seconds 600
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from audio import SAMPLE_RATE, decode_audio, duration_of, split_samples
+from decoding import DECODING_PROFILES
+from transcriber import WhisperTranscriber
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--file", required=True, help="Fichier audio ou vidéo de test")
+    parser.add_argument("--model", default="small", help="Taille du modèle Whisper")
+    parser.add_argument("--device", default="cpu", help="cpu ou cuda")
+    parser.add_argument("--profiles", nargs="+", default=list(DECODING_PROFILES), choices=list(DECODING_PROFILES))
+    parser.add_argument("--seconds", type=int, default=0, help="Ne garde que les N premières secondes (0 = tout)")
+    parser.add_argument("--segment-seconds", type=int, default=120, help="Durée des segments")
+    args = parser.parse_args()
+
+    audio = decode_audio(args.file)
+    if args.seconds:
+        audio = audio[:args.seconds * SAMPLE_RATE]
+    segments = split_samples(audio, segment_seconds=args.segment_seconds)
+    duration = duration_of(audio)
+
+    transcriber = WhisperTranscriber(model_size=args.model, device=args.device)
+    language = transcriber.detect_language(segments[0])
+    transcriber.language = language
+    print(f"audio: {duration:.0f}s in {len(segments)} segments, language: {language}, model: {args.model} ({args.device})")
+
+    print(f"{'profile':>10} {'elapsed':>9} {'RTF':>6} {'words':>7}")
+    for profile in args.profiles:
+        transcriber.profile = profile
+        start = time.perf_counter()
+        texts = transcriber.transcribe_segments(segments)
+        elapsed = time.perf_counter() - start
+        words = sum(len(text.split()) for text in texts)
+        print(f"{profile:>10} {elapsed:>8.1f}s {elapsed / duration:>6.3f} {words:>7}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,379 @@
+"""
+HTTP API around WorkflowManager, for programmatic clients.
+
+    POST /jobs                      {"url": "..."} or {"search": "...", "limit": 3, "context": "...", "title": "..."}
+    GET  /jobs/<id>                 job status and result
+    GET  /jobs/<id>/stream          progress and partial summaries (Server-Sent Events)
+    GET  /jobs/<id>/export?format=  md, txt, html or pdf (printable HTML for very large documents)
+    GET  /health
+
+Usage:
+    python src/api.py --port 8600
+"""
+import argparse
+import json
+import os
+import queue
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+from urllib.parse import parse_qs, urlparse
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+API_HOST = os.getenv("API_HOST", "127.0.0.1")
+API_PORT = int(os.getenv("API_PORT", "8600"))
+API_WORKERS = int(os.getenv("API_WORKERS", "1"))  # jobs run at the same time (one Whisper model shared)
+API_QUEUE_SIZE = int(os.getenv("API_QUEUE_SIZE", "50"))
+API_MAX_JOBS = int(os.getenv("API_MAX_JOBS", "500"))  # finished jobs kept in memory
+API_SUMMARY_TYPE = os.getenv("API_SUMMARY_TYPE", "long")
+MAX_SEARCH_LIMIT = 10
+
+EXPORT_TYPES = {
+    "md": "text/markdown; charset=utf-8",
+    "txt": "text/plain; charset=utf-8",
+    "html": "text/html; charset=utf-8",
+    "pdf": "application/pdf",
+}
+
+
+@dataclass
+class Job:
+    id: str
+    kind: str
+    params: dict
+    status: str = "queued"
+    created_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    title: str = ""
+    summary: str = ""
+    source_info: list = field(default_factory=list)
+    error: str = ""
+    events: list = field(default_factory=list)
+    cond: threading.Condition = field(default_factory=threading.Condition, repr=False)
+
+    @property
+    def finished(self) -> bool:
+        return self.status in ("done", "failed")
+
+    def emit(self, stage: str, message: str, output: str = None):
+        """Progress callback given to the workflow; wakes up the streaming clients."""
+        with self.cond:
+            self.events.append({"seq": len(self.events), "stage": stage, "message": message, "output": output, "time": time.time()})
+            self.cond.notify_all()
+
+    def to_dict(self) -> dict:
+        return {
+            "id": self.id,
+            "kind": self.kind,
+            "params": self.params,
+            "status": self.status,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "progress": self.events[-1]["message"] if self.events else "",
+            "title": self.title,
+            "summary": self.summary if self.status == "done" else None,
+            "source_info": self.source_info,
+            "error": self.error or None,
+        }
+
+
+def parse_job_request(payload) -> tuple:
+    """Validates a POST /jobs body and returns (kind, params)."""
+    if not isinstance(payload, dict):
+        raise ValueError("Le corps de la requête doit être un objet JSON.")
+    if payload.get("url"):
+        return "url", {"url": str(payload["url"])}
+    if payload.get("search"):
+        try:
+            limit = int(payload.get("limit", 3))
+        except (TypeError, ValueError):
+            raise ValueError("'limit' doit être un entier.")
+        if not 1 <= limit <= MAX_SEARCH_LIMIT:
+            raise ValueError(f"'limit' doit être compris entre 1 et {MAX_SEARCH_LIMIT}.")
+        return "search", {
+            "search": str(payload["search"]),
+            "limit": limit,
+            "context": str(payload.get("context") or ""),
+            "title": str(payload.get("title") or ""),
+            "duration_mode": str(payload.get("duration_mode") or "any"),
+            "sort_by": str(payload.get("sort_by") or "relevance"),
+        }
+    raise ValueError("Fournissez 'url' ou 'search'.")
+
+
+class JobManager:
+    """
+    Bounded job queue served by a fixed number of worker threads.
+    Every job goes through the same WorkflowManager, so the Whisper model and
+    the Ollama client stay loaded between requests.
+    """
+
+    def __init__(self, workflow, workers: int = API_WORKERS, queue_size: int = API_QUEUE_SIZE, max_jobs: int = API_MAX_JOBS):
+        self.workflow = workflow
+        self.workers = workers
+        self.max_jobs = max_jobs
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.jobs = OrderedDict()
+        self._lock = threading.Lock()
+        self._running = 0
+        for i in range(workers):
+            threading.Thread(target=self._worker, name=f"api-worker-{i}", daemon=True).start()
+
+    def submit(self, kind: str, params: dict) -> Job:
+        """Queues a job; raises queue.Full when the backlog is at capacity."""
+        job = Job(id=uuid.uuid4().hex, kind=kind, params=params)
+        job.emit("queued", "En attente")
+        with self._lock:
+            self.queue.put_nowait(job)
+            self.jobs[job.id] = job
+            self._prune()
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            return self.jobs.get(job_id)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"queued": self.queue.qsize(), "running": self._running, "workers": self.workers, "jobs": len(self.jobs)}
+
+    def _prune(self):
+        while len(self.jobs) > self.max_jobs:
+            oldest = next((job_id for job_id, job in self.jobs.items() if job.finished), None)
+            if oldest is None:
+                break
+            del self.jobs[oldest]
+
+    def _worker(self):
+        while True:
+            job = self.queue.get()
+            with self._lock:
+                self._running += 1
+            try:
+                self._run(job)
+            finally:
+                with self._lock:
+                    self._running -= 1
+                self.queue.task_done()
+
+    def _run(self, job: Job):
+        job.status, job.started_at = "running", time.time()
+        job.emit("running", "Traitement démarré")
+        try:
+            if job.kind == "url":
+                summary, title, source_info = self.workflow.process_single_video(job.params["url"], progress=job.emit)
+            else:
+                params = job.params
+                _, videos = self.workflow.search(params["search"], sort_by=params["sort_by"], duration_mode=params["duration_mode"])
+                if not videos:
+                    raise ValueError(f"Aucune vidéo trouvée pour : {params['search']}")
+                ranked = self.workflow.rank_results(videos, params["search"], params["duration_mode"])
+                summary, _, source_info = self.workflow.synthesize_videos(
+                    ranked[:params["limit"]], params["context"], params["title"], progress=job.emit
+                )
+                title = params["title"] or params["search"]
+            job.summary, job.title, job.source_info = summary, title, source_info
+            status = "done"
+        except Exception as e:
+            print(f"DEBUG: API job {job.id} failed: {e}")
+            job.error, status = str(e), "failed"
+        if self.workers == 1:
+            # Temporary audio/chunk folders are shared: only safe to clean when jobs run one at a time
+            try:
+                self.workflow.cleanup()
+            except Exception as e:
+                print(f"DEBUG: API cleanup failed: {e}")
+        job.finished_at = time.time()
+        job.status = status
+        job.emit("end", status)
+
+    def export(self, job: Job, fmt: str) -> tuple[bytes, str, str]:
+        """Body, Content-Type and file extension of what was actually rendered."""
+        exporter = self.workflow.exporter
+        if fmt == "pdf":
+            # Large documents only get the printable HTML version: it is served as HTML
+            pdf_job = exporter.submit_pdf(job.summary, job.title, job.source_info)
+            return pdf_job.read_bytes(), pdf_job.mime, pdf_job.extension
+        return exporter.render_artifact(fmt, job.summary, job.title, job.source_info), EXPORT_TYPES[fmt], fmt
+
+
+class APIHandler(BaseHTTPRequestHandler):
+    server_version = "SynthetIA-API/1.0"
+    stream_keepalive = 15.0
+
+    @property
+    def manager(self) -> JobManager:
+        return self.server.manager
+
+    def log_message(self, format, *args):
+        print(f"DEBUG: API {self.address_string()} {format % args}")
+
+    def _send_json(self, status: int, data, headers=None):
+        body = json.dumps(data, ensure_ascii=False, default=str).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _error(self, status: int, message: str, headers=None):
+        self._send_json(status, {"error": message}, headers)
+
+    def _route(self):
+        url = urlparse(self.path)
+        parts = [p for p in url.path.split("/") if p]
+        return parts, parse_qs(url.query)
+
+    def do_POST(self):
+        parts, _ = self._route()
+        if parts != ["jobs"]:
+            return self._error(404, "Route inconnue")
+        try:
+            length = int(self.headers.get("Content-Length") or 0)
+            kind, params = parse_job_request(json.loads(self.rfile.read(length) or b"{}"))
+        except (ValueError, json.JSONDecodeError) as e:
+            return self._error(400, str(e))
+        try:
+            job = self.manager.submit(kind, params)
+        except queue.Full:
+            return self._error(429, "File d'attente pleine, réessayez plus tard.", {"Retry-After": "30"})
+        self._send_json(202, {
+            "id": job.id,
+            "status": job.status,
+            "links": {
+                "self": f"/jobs/{job.id}",
+                "stream": f"/jobs/{job.id}/stream",
+                "export": f"/jobs/{job.id}/export?format=md",
+            },
+        }, {"Location": f"/jobs/{job.id}"})
+
+    def do_GET(self):
+        parts, query = self._route()
+        if parts == ["health"]:
+            return self._send_json(200, {"status": "ok", **self.manager.stats()})
+        if not parts or parts[0] != "jobs" or len(parts) < 2:
+            return self._error(404, "Route inconnue")
+
+        job = self.manager.get(parts[1])
+        if job is None:
+            return self._error(404, "Job inconnu")
+        if len(parts) == 2:
+            return self._send_json(200, job.to_dict())
+        if parts[2:] == ["stream"]:
+            return self._stream(job)
+        if parts[2:] == ["export"]:
+            return self._export(job, query.get("format", ["md"])[0])
+        return self._error(404, "Route inconnue")
+
+    def _stream(self, job: Job):
+        """Sends every job event as an SSE message until the job is finished."""
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream; charset=utf-8")
+        self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+        sent = 0
+        try:
+            while True:
+                with job.cond:
+                    if sent >= len(job.events) and not job.finished:
+                        job.cond.wait(timeout=self.stream_keepalive)
+                    events = job.events[sent:]
+                    finished = job.finished
+                if not events:
+                    self.wfile.write(b": keep-alive\n\n")
+                for event in events:
+                    data = json.dumps(event, ensure_ascii=False)
+                    self.wfile.write(f"event: {event['stage']}\ndata: {data}\n\n".encode("utf-8"))
+                self.wfile.flush()
+                sent += len(events)
+                if finished and sent >= len(job.events):
+                    break
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+    def _export(self, job: Job, fmt: str):
+        if fmt not in EXPORT_TYPES:
+            return self._error(400, f"Format non supporté : {fmt}. Utilisez {', '.join(EXPORT_TYPES)}.")
+        if job.status != "done":
+            return self._error(409, f"Job non terminé (statut : {job.status})")
+        try:
+            body, content_type, extension = self.manager.export(job, fmt)
+        except Exception as e:
+            return self._error(500, f"Erreur d'export : {e}")
+        from utils import slugify
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Content-Disposition", f'attachment; filename="{slugify(job.title) or job.id}.{extension}"')
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def create_server(manager: JobManager, host: str = API_HOST, port: int = API_PORT) -> ThreadingHTTPServer:
+    server = ThreadingHTTPServer((host, port), APIHandler)
+    server.daemon_threads = True
+    server.manager = manager
+    return server
+
+
+def build_workflow(summary_type: str = API_SUMMARY_TYPE):
+    """Builds the single WorkflowManager of the service (models loaded once)."""
+    from ollama import Client
+    from downloader import YouTubeAudioProcessor
+    from transcriber import WhisperTranscriber
+    from broker import REMOTE_SUMMARIZATION, REMOTE_TRANSCRIPTION, RemoteSummarizer, RemoteTranscriber, connect_broker
+    from summarizer import Summarizer
+    from exporter import Exporter
+    from prompts import PromptManager
+    from library import get_library
+    from workflow import WorkflowManager, DEVICE, MODEL, OLLAMA_HOST, OLLAMA_MODEL, OUTPUT_DIR
+
+    processor = YouTubeAudioProcessor(output_dir="./audio_segments")
+    if REMOTE_TRANSCRIPTION:
+        transcriber = RemoteTranscriber(connect_broker())
+    else:
+        transcriber = WhisperTranscriber(model_size=MODEL, device=DEVICE)
+    client = Client(host=OLLAMA_HOST)  # one HTTP connection pool for every job
+    summarizer = Summarizer(client=client, model=OLLAMA_MODEL, prompt_manager=PromptManager(), summary_type=summary_type)
+    if REMOTE_SUMMARIZATION:
+        summarizer = RemoteSummarizer(connect_broker(), summarizer)
+    library = get_library()
+    exporter = Exporter(output_dir=OUTPUT_DIR, library=library)
+    return WorkflowManager(processor, transcriber, summarizer, exporter, library=library)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="API HTTP de résumé / synthèse de vidéos")
+    parser.add_argument("--host", default=API_HOST, help="Adresse d'écoute")
+    parser.add_argument("--port", type=int, default=API_PORT, help="Port d'écoute")
+    parser.add_argument("--workers", type=int, default=API_WORKERS, help="Jobs traités en parallèle")
+    parser.add_argument("--queue-size", type=int, default=API_QUEUE_SIZE, help="Taille maximale de la file d'attente")
+    parser.add_argument("--type", default=API_SUMMARY_TYPE, choices=["short", "medium", "long", "news"], help="Type de résumé")
+    args = parser.parse_args()
+
+    workflow = build_workflow(args.type)
+    workflow.warm_up()
+    manager = JobManager(workflow, workers=args.workers, queue_size=args.queue_size)
+    server = create_server(manager, args.host, args.port)
+    print(f"API prête sur http://{args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -3,11 +3,12 @@ import os
 from datetime import datetime
 from workflow import WorkflowManager
 from streamlit_quill import st_quill
-import markdown
-from markdownify import markdownify as md
 
-from utils import clean_markdown_text, time_since, format_views
+from utils import clean_markdown_text, time_since, format_views, save_stream
 from models import LocalVideo
+from conversions import markdown_to_html, html_to_markdown
+from library import get_library
+from decoding import DECODING_PROFILES, WHISPER_PROFILE
 from components import render_video_card
 import html
 import textwrap
@@ -25,8 +26,8 @@ if os.path.exists(css_path):
     load_css(css_path)
 
 # Initialize session state
-if "summary" not in st.session_state:
-    st.session_state.summary = ""
+if "summary_md" not in st.session_state:
+    st.session_state.summary_md = ""  # canonical document (Markdown); the editor HTML is derived from it
 if "title" not in st.session_state:
     st.session_state.title = ""
 if "source_info" not in st.session_state:
@@ -35,8 +36,9 @@ if "generated" not in st.session_state:
     st.session_state.generated = False
 if "manual_videos" not in st.session_state:
     st.session_state.manual_videos = []
-if "search_object" not in st.session_state:
-    st.session_state.search_object = None
+if "search_key" not in st.session_state:
+    st.session_state.search_key = None
+    st.session_state.search_page = 0
 if "search_results" not in st.session_state:
     st.session_state.search_results = []
 if "visible_count" not in st.session_state:
@@ -46,7 +48,7 @@ if "last_saved_path" not in st.session_state:
     st.session_state.last_saved_path = None
 # Unified selection basket
 if "selection_basket" not in st.session_state:
-    # storing Video objects
+    # storing VideoMeta / LocalVideo records (no live pytubefix objects)
     st.session_state.selection_basket = []
 
 
@@ -54,15 +56,20 @@ if "selection_basket" not in st.session_state:
 st.sidebar.title("Configuration")
 device = st.sidebar.selectbox("Device", ["cpu", "cuda"], index=0)
 model = st.sidebar.selectbox("Whisper Model", ["tiny", "base", "small", "medium", "large"], index=0)
+whisper_profile = st.sidebar.selectbox(
+    "Whisper Profile", list(DECODING_PROFILES), index=list(DECODING_PROFILES).index(WHISPER_PROFILE),
+    help="fast : décodage glouton sans repli (rapide) · balanced : réglages par défaut · accurate : beam search"
+)
 ollama_model = st.sidebar.text_input("Ollama Model", value="gemma3:4b")
 
 summary_type = st.sidebar.selectbox("Summary Type", ["short", "medium", "long", "news"], index=2)
 
 # Initialize Workflow Manager
 @st.cache_resource
-def get_workflow(device, model, ollama_model, summary_type, version=1):
+def get_workflow(device, model, ollama_model, summary_type, whisper_profile=WHISPER_PROFILE, version=1):
     from downloader import YouTubeAudioProcessor
     from transcriber import WhisperTranscriber
+    from broker import REMOTE_SUMMARIZATION, REMOTE_TRANSCRIPTION, RemoteSummarizer, RemoteTranscriber, connect_broker
     from summarizer import Summarizer
     from exporter import Exporter
     from prompts import PromptManager
@@ -73,18 +80,24 @@ def get_workflow(device, model, ollama_model, summary_type, version=1):
     
     # 1. Initialize Dependencies
     processor = YouTubeAudioProcessor(output_dir="./audio_segments")
-    transcriber = WhisperTranscriber(model_size=model, device=device)
+    if REMOTE_TRANSCRIPTION:
+        transcriber = RemoteTranscriber(connect_broker())
+    else:
+        transcriber = WhisperTranscriber(model_size=model, device=device, profile=whisper_profile)
     
     client = Client(host=os.getenv("OLLAMA_HOST", "http://localhost:11434"))
     prompt_manager = PromptManager()
     summarizer = Summarizer(client=client, model=ollama_model, prompt_manager=prompt_manager, summary_type=summary_type)
+    if REMOTE_SUMMARIZATION:
+        summarizer = RemoteSummarizer(connect_broker(), summarizer)
     
-    exporter = Exporter(output_dir=output_dir)
+    library = get_library()
+    exporter = Exporter(output_dir=output_dir, library=library)
     
     # 2. Inject into WorkflowManager
-    return WorkflowManager(processor, transcriber, summarizer, exporter)
+    return WorkflowManager(processor, transcriber, summarizer, exporter, library=library)
 
-workflow = get_workflow(device, model, ollama_model, summary_type, version=6)
+workflow = get_workflow(device, model, ollama_model, summary_type, whisper_profile, version=7)
 
 # Branding
 st.markdown("""
@@ -100,7 +113,7 @@ if "nav_selection" not in st.session_state:
     st.session_state.nav_selection = "🔍 Sourcing"
 
 # Navigation Menu
-nav_options = ["🔍 Sourcing", "⚙️ Synthèse", "📝 Résultat"]
+nav_options = ["🔍 Sourcing", "⚙️ Synthèse", "📝 Résultat", "📚 Bibliothèque"]
 # Handle simple migration if user was on old tab name
 if st.session_state.nav_selection not in nav_options:
     st.session_state.nav_selection = "🔍 Sourcing"
@@ -169,8 +182,8 @@ if st.session_state.nav_selection == "🔍 Sourcing":
                     os.makedirs(temp_dir, exist_ok=True)
                     
                     file_path = os.path.join(temp_dir, uploaded_file.name)
-                    with open(file_path, "wb") as f:
-                        f.write(uploaded_file.getbuffer())
+                    # Copied by blocks: a multi-hour video is not duplicated in memory
+                    save_stream(uploaded_file, file_path)
                     
                     v = LocalVideo(file_path, uploaded_file.name)
 
@@ -257,11 +270,6 @@ if st.session_state.nav_selection == "🔍 Sourcing":
     # Advisory Note
     st.caption("Conseil : Sélectionnez des vidéos pour les ajouter à votre panier de synthèse.")
 
-    if "search_object" not in st.session_state:
-        st.session_state.search_object = None
-    if "search_results" not in st.session_state:
-        st.session_state.search_results = []
-    
     if do_search:
         st.session_state.trigger_search = False
 
@@ -271,13 +279,12 @@ if st.session_state.nav_selection == "🔍 Sourcing":
                 if type_options:
                     final_query += " " + " ".join(type_options)
                 
-                st.session_state.search_object = workflow.init_search(final_query, sort_by=final_sort, upload_date=final_date, exclude_terms=exclude_terms)
-                st.session_state.filter_duration = final_dur
-                st.session_state.active_categories = type_options
-                st.session_state.use_boost = use_trusted_boost
-                st.session_state.days_limit = days_limit
-                
-                st.session_state.search_results = workflow.get_search_results(st.session_state.search_object, duration_mode=final_dur, active_categories=type_options, enable_boost=use_trusted_boost, days_limit=days_limit)
+                # Served from the shared cache when another user ran the same search
+                st.session_state.search_key, st.session_state.search_results = workflow.search(
+                    final_query, sort_by=final_sort, upload_date=final_date, exclude_terms=exclude_terms,
+                    duration_mode=final_dur, active_categories=type_options, enable_boost=use_trusted_boost, days_limit=days_limit
+                )
+                st.session_state.search_page = 0
                 st.session_state.visible_count = 9
                 
         else:
@@ -291,11 +298,17 @@ if st.session_state.nav_selection == "🔍 Sourcing":
              st.write(f"Résultats trouvés : {len(st.session_state.search_results)}")
              
         with col_sort:
-            local_sort = st.selectbox("Trier par:", ["(Défaut)", "Date (Récent)", "Vues (Top)", "Durée (Long)"], label_visibility="collapsed")
-            if local_sort == "Date (Récent)":
+            local_sort = st.selectbox("Trier par:", ["(Défaut)", "Pertinence (Score)", "Date (Récent)", "Vues (Top)", "Durée (Long)"], label_visibility="collapsed")
+            if local_sort == "Pertinence (Score)" and st.session_state.search_key:
+                key = st.session_state.search_key
+                st.session_state.search_results = workflow.rank_results(
+                    st.session_state.search_results, query=key.query,
+                    duration_mode=key.duration_mode, active_categories=list(key.active_categories)
+                )
+            elif local_sort == "Date (Récent)":
                 st.session_state.search_results.sort(key=lambda x: x.publish_date or datetime.min, reverse=True)
             elif local_sort == "Vues (Top)":
-                st.session_state.search_results.sort(key=lambda x: x.views if hasattr(x, 'views') else 0, reverse=True)
+                st.session_state.search_results.sort(key=lambda x: x.views or 0, reverse=True)
             elif local_sort == "Durée (Long)":
                 st.session_state.search_results.sort(key=lambda x: x.length, reverse=True)
         
@@ -322,15 +335,13 @@ if st.session_state.nav_selection == "🔍 Sourcing":
         # Load More
         col_load_more, _ = st.columns([1, 2])
         with col_load_more:
-            if st.session_state.search_object and st.button("Charger plus (+20)", key="btn_load_more"):
+            if st.session_state.search_key and st.button("Charger plus (+20)", key="btn_load_more"):
                 with st.spinner("Récupération..."):
-                    dur_mode = st.session_state.get("filter_duration", "any")
-                    act_cats = st.session_state.get("active_categories", [])
-                    use_boost = st.session_state.get("use_boost", True)
-                    days_limit = st.session_state.get("days_limit", None)
-                    new_results = workflow.load_more_videos(st.session_state.search_object, duration_mode=dur_mode, active_categories=act_cats, enable_boost=use_boost, days_limit=days_limit)
+                    # Next page is prefetched in the background while the current one is displayed
+                    new_results = workflow.load_more(st.session_state.search_key, st.session_state.search_page + 1)
                     
                     if new_results:
+                         st.session_state.search_page += 1
                          current_urls = {v.watch_url for v in st.session_state.search_results}
                          for v in new_results:
                              if v.watch_url not in current_urls:
@@ -360,13 +371,13 @@ if st.session_state.nav_selection == "⚙️ Synthèse":
             for idx, v in enumerate(st.session_state.selection_basket):
                 c_thumb, c_info, c_del = st.columns([1, 3, 0.5])
                 with c_thumb:
-                    st.image(v.thumbnail_url, use_container_width=True)
+                    if v.thumbnail_url:
+                        st.image(v.thumbnail_url, use_container_width=True)
                 with c_info:
                     st.markdown(f"**{v.title}**")
                     st.caption(f"{v.author} • {time_since(v.publish_date)}")
                     
-                    description = getattr(v, 'description_attr', None) or getattr(v, 'description', '')
-                    safe_desc = html.escape(str(description))
+                    safe_desc = html.escape(v.description or "")
                     st.markdown(f"""
                     <div style="font-size: 0.9em; color: #D3D3D3; max-height: 120px; overflow-y: auto; background: rgba(255,255,255,0.05); padding: 8px; border-radius: 6px; margin-top: 8px; border: 1px solid rgba(255,255,255,0.1);">
                         {safe_desc}
@@ -446,10 +457,9 @@ if st.session_state.nav_selection == "⚙️ Synthèse":
                             
                             # Post-process
                             summary = clean_markdown_text(summary)
-                            html_summary = markdown.markdown(summary, extensions=['extra'])
                             
                             # Update State
-                            st.session_state.summary = html_summary
+                            st.session_state.summary_md = summary
                             st.session_state.title = custom_title if custom_title else title
                             st.session_state.source_info = source_info
                             st.session_state.generated = True
@@ -499,19 +509,9 @@ if st.session_state.nav_selection == "📝 Résultat" or st.session_state.nav_se
                     if refine_instructions:
                         with st.spinner("Refining summary..."):
                             try:
-                                # Convert current HTML back to text for the LLM context if needed, 
-                                # but using the raw summary might be safer if we stored it separately.
-                                # Here we use the current session state content (which is HTML from Quill)
-                                # So we convert it to MD first for the LLM
-                                current_md = md(st.session_state.summary, heading_style="ATX")
-                                
-                                new_summary_md = workflow.refine_summary(current_md, refine_instructions)
-                                
-                                # Clean and convert back to HTML for editor
-                                new_summary_md = clean_markdown_text(new_summary_md)
-                                new_summary_html = markdown.markdown(new_summary_md, extensions=['extra'])
-                                
-                                st.session_state.summary = new_summary_html
+                                # The canonical document is already Markdown: no conversion for the LLM
+                                new_summary_md = workflow.refine_summary(st.session_state.summary_md, refine_instructions)
+                                st.session_state.summary_md = clean_markdown_text(new_summary_md)
                                 st.session_state.quill_key += 1
                                 st.success("Summary refined!")
                                 st.rerun()
@@ -529,8 +529,9 @@ if st.session_state.nav_selection == "📝 Résultat" or st.session_state.nav_se
             if view_mode == "Éditeur":
                 st.subheader("Éditeur de Résumé")
                 # Quill Editor
+                summary_html = markdown_to_html(st.session_state.summary_md)
                 content = st_quill(
-                    value=st.session_state.summary,
+                    value=summary_html,
                     placeholder="Write your summary here...",
                     html=True,
                     key=f"quill_editor_{st.session_state.quill_key}",
@@ -545,12 +546,12 @@ if st.session_state.nav_selection == "📝 Résultat" or st.session_state.nav_se
                     ]
                 )
                 
-                # Update session state if edited (Quill returns HTML)
-                if content and content != st.session_state.summary:
-                    st.session_state.summary = content
+                # Update session state if edited (Quill returns HTML, converted once per content)
+                if content and content != summary_html:
+                    st.session_state.summary_md = html_to_markdown(content)
             else:
                  st.subheader("Aperçu du Résumé")
-                 st.markdown(st.session_state.summary, unsafe_allow_html=True)
+                 st.markdown(st.session_state.summary_md, unsafe_allow_html=True)
 
         with col_res_side:
             st.subheader("Actions")
@@ -562,19 +563,11 @@ if st.session_state.nav_selection == "📝 Résultat" or st.session_state.nav_se
             
             st.divider()
             
-            st.warning("⚠️ Editor content is HTML.")
-            
             output_format = st.selectbox("Format d'export", ["md", "txt", "html", "pdf"], index=2)
             
             if st.button("💾 Save Summary", type="primary"):
                 try:
-                    content_to_save = st.session_state.summary
-                    
-                    # Convert back to Markdown/Text if needed
-                    if output_format in ["md", "txt"]:
-                        content_to_save = md(content_to_save, heading_style="ATX")
-                    
-                    saved_path = workflow.save_summary(content_to_save, st.session_state.title, output_format, st.session_state.source_info)
+                    saved_path = workflow.save_summary(st.session_state.summary_md, st.session_state.title, output_format, st.session_state.source_info)
                     st.session_state.last_saved_path = saved_path
                     st.success(f"Saved to: {saved_path}")
                 except Exception as e:
@@ -608,28 +601,71 @@ if st.session_state.nav_selection == "📝 Résultat" or st.session_state.nav_se
             # Direct PDF Download
             st.divider()
             if st.button("📥 Télécharger PDF Directement"):
-                try:
-                    pdf_bytes = workflow.get_pdf_bytes(st.session_state.summary, st.session_state.title, st.session_state.source_info)
-                    
-                    # Prepare file name
+                # Rendered in the PDF worker process; an unchanged summary reuses the same job
+                st.session_state.pdf_job = workflow.submit_pdf(st.session_state.summary_md, st.session_state.title, st.session_state.source_info)
+
+            pdf_job = st.session_state.get("pdf_job")
+            if pdf_job is not None:
+                if not pdf_job.done():
+                    st.info("⏳ Génération du PDF en cours...")
+                    st.button("🔄 Actualiser", key="pdf_refresh")
+                elif pdf_job.status != "done":
+                    st.error(f"Error generating PDF: {pdf_job.error}")
+                else:
                     from utils import slugify
                     slug = slugify(st.session_state.title)
                     date_str = datetime.now().strftime("%Y-%m-%d")
-                    filename = f"{slug}_{date_str}.pdf"
-                    
-                    st.download_button(
-                        label="Cliquez pour sauvegarder le PDF",
-                        data=pdf_bytes,
-                        file_name=filename,
-                        mime="application/pdf"
-                    )
-                except Exception as e:
-                    st.error(f"Error generating PDF: {e}")
+                    filename = f"{slug}_{date_str}.{pdf_job.extension}"
+                    if pdf_job.kind != "pdf":
+                        st.warning("Document volumineux : version HTML imprimable (Imprimer > Enregistrer en PDF).")
+
+                    with open(pdf_job.path, "rb") as f:
+                        st.download_button(
+                            label="Cliquez pour sauvegarder le PDF" if pdf_job.kind == "pdf" else "Cliquez pour sauvegarder la version imprimable",
+                            data=f,
+                            file_name=filename,
+                            mime="application/pdf" if pdf_job.kind == "pdf" else "text/html"
+                        )
 
             # Copy Code Section
             st.divider()
             with st.expander("📋 Copy Raw Markdown"):
-                raw_md = md(st.session_state.summary, heading_style="ATX")
-                st.code(raw_md, language="markdown")
+                st.code(st.session_state.summary_md, language="markdown")
     else:
         st.info("No summary generated yet. Please use one of the other tabs to generate a summary.")
+
+if st.session_state.nav_selection == "📚 Bibliothèque":
+    st.header("📚 Bibliothèque")
+    library = get_library()
+    st.caption(f"{library.count()} documents indexés (transcriptions, résumés, synthèses)")
+
+    col_query, col_kind = st.columns([3, 1])
+    with col_query:
+        library_query = st.text_input("Rechercher", placeholder="Ex: transition énergétique", key="library_query")
+    with col_kind:
+        kind_labels = {"Tous": None, "Transcriptions": "transcript", "Résumés": "summary", "Synthèses": "synthesis"}
+        kind_label = st.selectbox("Type", list(kind_labels.keys()), key="library_kind")
+
+    if library_query:
+        hits = library.search(library_query, kind=kind_labels[kind_label], limit=50)
+        if not hits:
+            st.info("Aucun document trouvé.")
+        for hit in hits:
+            with st.expander(f"{hit.title or 'Sans titre'} — {hit.kind} ({hit.author or '?'})"):
+                st.markdown(hit.snippet)
+                if hit.url:
+                    st.caption(hit.url)
+                if hit.path:
+                    st.caption(f"Fichier : {hit.path}")
+
+                def _open_document(doc_id=hit.id):
+                    doc = library.get(doc_id)
+                    st.session_state.summary_md = clean_markdown_text(doc["content"])
+                    st.session_state.title = doc["title"]
+                    st.session_state.source_info = doc["sources"] or ([{"title": doc["title"], "url": doc["url"]}] if doc["url"] else [])
+                    st.session_state.generated = True
+                    st.session_state.quill_key += 1
+                    st.session_state.nav_selection = "📝 Résultat"
+                    st.session_state["nav_radio"] = "📝 Résultat"
+
+                st.button("📝 Ouvrir dans l'éditeur", key=f"lib_open_{hit.id}", on_click=_open_document)
@@ -0,0 +1,94 @@
+import os
+import subprocess
+from typing import Iterator
+
+import numpy as np
+
+SAMPLE_RATE = 16000  # what Whisper expects
+SEGMENT_SECONDS = int(os.getenv("SEGMENT_SECONDS", "600"))
+# Decode local videos straight into memory instead of writing mp3 segments
+IN_MEMORY_AUDIO = os.getenv("IN_MEMORY_AUDIO", "True").lower() in ("1", "true", "yes")
+
+_READ_SIZE = 1 << 20
+
+
+def ffmpeg_command(input_file: str, sample_rate: int = SAMPLE_RATE) -> list[str]:
+    """ffmpeg decoding any audio/video input to mono float32 PCM on stdout."""
+    return [
+        "ffmpeg", "-nostdin", "-loglevel", "error", "-threads", "0",
+        "-i", str(input_file),
+        "-vn", "-ac", "1", "-ar", str(sample_rate),
+        "-f", "f32le", "-",
+    ]
+
+
+def decode_audio(input_file: str, sample_rate: int = SAMPLE_RATE, command: list[str] = None) -> np.ndarray:
+    """
+    Decodes input_file with a single ffmpeg process and returns the samples as a float32 array.
+    The PCM stream is read into one growing buffer that the array wraps without a copy.
+    """
+    command = command or ffmpeg_command(input_file, sample_rate)
+    buffer = bytearray()
+    with subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE) as process:
+        while True:
+            data = process.stdout.read(_READ_SIZE)
+            if not data:
+                break
+            buffer += data
+        stderr = process.stderr.read()
+        process.wait()
+    if process.returncode != 0:
+        raise RuntimeError(f"Échec du décodage audio ({input_file}) : {stderr.decode(errors='ignore').strip()[-500:]}")
+    usable = len(buffer) - len(buffer) % 4
+    return np.frombuffer(memoryview(buffer)[:usable], dtype=np.float32)
+
+
+def iter_decoded_segments(input_file: str, segment_seconds: int = SEGMENT_SECONDS, sample_rate: int = SAMPLE_RATE,
+                          command: list[str] = None) -> Iterator[np.ndarray]:
+    """
+    Same segments as split_samples(decode_audio(...)), but read from the ffmpeg pipe
+    one at a time: memory stays at one segment whatever the length of the input.
+    ffmpeg is paused by the pipe while the current segment is being transcribed.
+    """
+    command = command or ffmpeg_command(input_file, sample_rate)
+    process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    try:
+        while True:
+            segment = np.empty(segment_seconds * sample_rate, dtype=np.float32)
+            filled = _read_into(process.stdout, memoryview(segment).cast("B"))
+            if filled >= 4:
+                yield segment[:filled // 4]
+            if filled < segment.nbytes:
+                break
+        stderr = process.stderr.read()
+        if process.wait() != 0:
+            raise RuntimeError(f"Échec du décodage audio ({input_file}) : {stderr.decode(errors='ignore').strip()[-500:]}")
+    finally:
+        # Consumer stopped early: do not leave ffmpeg blocked on a full pipe
+        if process.poll() is None:
+            process.kill()
+            process.wait()
+        process.stdout.close()
+        process.stderr.close()
+
+
+def _read_into(stream, view: memoryview) -> int:
+    filled = 0
+    while filled < len(view):
+        n = stream.readinto(view[filled:])
+        if not n:
+            break
+        filled += n
+    return filled
+
+
+def split_samples(audio: np.ndarray, segment_seconds: int = SEGMENT_SECONDS, sample_rate: int = SAMPLE_RATE) -> list[np.ndarray]:
+    """Cuts the audio into consecutive segments that are views of the same buffer (no copy)."""
+    step = segment_seconds * sample_rate
+    if len(audio) <= step:
+        return [audio] if len(audio) else []
+    return [audio[start:start + step] for start in range(0, len(audio), step)]
+
+
+def duration_of(audio: np.ndarray, sample_rate: int = SAMPLE_RATE) -> float:
+    return len(audio) / sample_rate
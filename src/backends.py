@@ -0,0 +1,169 @@
+import os
+import re
+from abc import ABC, abstractmethod
+from dataclasses import dataclass, field
+from typing import Optional, Union
+
+import numpy as np
+
+from audio import SAMPLE_RATE, decode_audio
+
+# whisper (openai-whisper, PyTorch), faster-whisper (CTranslate2), whisper-int8 (PyTorch dynamic quantization)
+TRANSCRIBE_BACKEND = os.getenv("TRANSCRIBE_BACKEND", "whisper")
+# CTranslate2 compute type of faster-whisper on CPU (int8, int8_float32, float32)
+CT2_COMPUTE_TYPE = os.getenv("CT2_COMPUTE_TYPE", "int8")
+CT2_CPU_THREADS = int(os.getenv("CT2_CPU_THREADS", "0"))
+
+Audio = Union[str, np.ndarray]
+
+
+@dataclass(slots=True)
+class Segment:
+    start: float
+    end: float
+    text: str
+
+
+@dataclass
+class Transcription:
+    """Output shared by every backend: full text, timestamped segments and language."""
+    text: str
+    segments: list[Segment] = field(default_factory=list)
+    language: Optional[str] = None
+
+
+def as_samples(audio: Audio) -> np.ndarray:
+    """16 kHz mono float32 samples of a path, a .npy spool file or an array."""
+    if isinstance(audio, np.ndarray):
+        return audio
+    audio = str(audio)
+    if audio.endswith(".npy"):
+        return np.load(audio)
+    return decode_audio(audio)
+
+
+class TranscriptionBackend(ABC):
+    """
+    A speech-to-text engine. Options follow the whisper.transcribe() names
+    (see decoding.py); each backend maps them to its own API.
+    """
+    name = ""
+
+    def __init__(self, model_size: str, device: str = "cpu", model=None):
+        self.model_size = model_size
+        self.device = device
+        self.model = model if model is not None else self._load_model()
+
+    @abstractmethod
+    def _load_model(self):
+        ...
+
+    @abstractmethod
+    def transcribe(self, audio: Audio, options: dict) -> Transcription:
+        ...
+
+    @abstractmethod
+    def detect_language(self, audio: Audio) -> str:
+        """Language of the first 30 seconds."""
+
+
+class WhisperBackend(TranscriptionBackend):
+    """openai-whisper on PyTorch (reference implementation)."""
+    name = "whisper"
+
+    def _load_model(self):
+        import whisper
+        return whisper.load_model(self.model_size, device=self.device)
+
+    def transcribe(self, audio: Audio, options: dict) -> Transcription:
+        if isinstance(audio, str) and audio.endswith(".npy"):
+            audio = np.load(audio)
+        result = self.model.transcribe(audio, **options)
+        return Transcription(
+            text=result["text"],
+            segments=[Segment(s["start"], s["end"], s["text"]) for s in result.get("segments", [])],
+            language=result.get("language"),
+        )
+
+    def detect_language(self, audio: Audio) -> str:
+        import whisper
+
+        mel = whisper.log_mel_spectrogram(whisper.pad_or_trim(as_samples(audio)), n_mels=getattr(self.model.dims, "n_mels", 80))
+        _, probs = self.model.detect_language(mel.to(self.model.device))
+        return max(probs, key=probs.get)
+
+
+class QuantizedWhisperBackend(WhisperBackend):
+    """openai-whisper with its Linear layers dynamically quantized to int8 (CPU only)."""
+    name = "whisper-int8"
+
+    def __init__(self, model_size: str, device: str = "cpu", model=None):
+        super().__init__(model_size, "cpu", model)
+
+    def _load_model(self):
+        import torch
+        import whisper
+
+        model = whisper.load_model(self.model_size, device="cpu")
+        # whisper subclasses nn.Linear (dtype casts only); quantize_dynamic maps exact types
+        for module in model.modules():
+            if isinstance(module, torch.nn.Linear):
+                module.__class__ = torch.nn.Linear
+        return torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+    def transcribe(self, audio: Audio, options: dict) -> Transcription:
+        return super().transcribe(audio, {**options, "fp16": False})
+
+
+class FasterWhisperBackend(TranscriptionBackend):
+    """faster-whisper: the same Whisper weights converted to CTranslate2, int8 on CPU."""
+    name = "faster-whisper"
+
+    def _load_model(self):
+        from faster_whisper import WhisperModel
+
+        compute_type = CT2_COMPUTE_TYPE if self.device == "cpu" else "float16"
+        return WhisperModel(self.model_size, device=self.device, compute_type=compute_type, cpu_threads=CT2_CPU_THREADS)
+
+    @staticmethod
+    def _options(options: dict) -> dict:
+        options = {k: v for k, v in options.items() if k != "fp16"}
+        # whisper's beam_size=None means greedy, which is beam_size=1 for CTranslate2
+        if options.get("beam_size") is None:
+            options["beam_size"] = 1
+        if options.get("best_of") is None:
+            options.pop("best_of", None)
+        return options
+
+    def transcribe(self, audio: Audio, options: dict) -> Transcription:
+        segments, info = self.model.transcribe(as_samples(audio), **self._options(options))
+        segments = [Segment(s.start, s.end, s.text) for s in segments]  # decoding runs while iterating
+        return Transcription(text="".join(s.text for s in segments), segments=segments, language=info.language)
+
+    def detect_language(self, audio: Audio) -> str:
+        # transcribe() detects the language eagerly; the segment generator is never consumed
+        _, info = self.model.transcribe(as_samples(audio)[:30 * SAMPLE_RATE], beam_size=1)
+        return info.language
+
+
+BACKENDS = {backend.name: backend for backend in (WhisperBackend, FasterWhisperBackend, QuantizedWhisperBackend)}
+
+
+def create_backend(name: str, model_size: str, device: str = "cpu") -> TranscriptionBackend:
+    if name not in BACKENDS:
+        raise ValueError(f"Moteur de transcription inconnu : {name} (choix : {', '.join(BACKENDS)})")
+    return BACKENDS[name](model_size, device)
+
+
+def word_error_rate(reference: str, hypothesis: str) -> float:
+    """Word-level Levenshtein distance divided by the number of reference words (case and punctuation ignored)."""
+    ref, hyp = re.findall(r"\w+", reference.lower()), re.findall(r"\w+", hypothesis.lower())
+    if not ref:
+        return float(bool(hyp))
+    previous = list(range(len(hyp) + 1))
+    for i, word in enumerate(ref, 1):
+        current = [i]
+        for j, other in enumerate(hyp, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (word != other)))
+        previous = current
+    return previous[-1] / len(ref)
@@ -0,0 +1,482 @@
+"""
+Task queue shared by the app and the worker daemons.
+
+The SQLite database (WAL mode) must stay on the disk of a single machine:
+processes on that machine use TaskBroker directly, workers on other nodes go
+through the broker server with BrokerClient. Never put the database on NFS/SMB.
+
+Usage (on the machine that holds the database):
+    python src/broker.py --host 0.0.0.0 --port 8700
+"""
+import argparse
+import json
+import os
+import sqlite3
+import threading
+import time
+import urllib.error
+import urllib.request
+import uuid
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Iterable, Iterator, List, Optional
+from urllib.parse import urlparse
+
+BROKER_DB = os.getenv("BROKER_DB", "./data/broker.db")
+# http://host:8700 of the broker server; empty = use the local BROKER_DB file
+BROKER_URL = os.getenv("BROKER_URL", "")
+BROKER_TOKEN = os.getenv("BROKER_TOKEN", "")  # shared secret between the broker server and its clients
+BROKER_HOST = os.getenv("BROKER_HOST", "127.0.0.1")
+BROKER_PORT = int(os.getenv("BROKER_PORT", "8700"))
+LEASE_SECONDS = float(os.getenv("BROKER_LEASE_SECONDS", "60"))
+MAX_ATTEMPTS = int(os.getenv("BROKER_MAX_ATTEMPTS", "3"))
+# Where in-memory segments are written for the workers (must be shared, like the audio folder)
+BROKER_SPOOL_DIR = os.getenv("BROKER_SPOOL_DIR", "./audio_segments/spool")
+# Send Whisper work to the worker daemons instead of loading the model in the app
+REMOTE_TRANSCRIPTION = os.getenv("REMOTE_TRANSCRIPTION", "False").lower() in ("1", "true", "yes")
+# Send the per-video summaries to the worker daemons (--kinds summarize)
+REMOTE_SUMMARIZATION = os.getenv("REMOTE_SUMMARIZATION", "False").lower() in ("1", "true", "yes")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS tasks (
+    id TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'queued',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    lease_owner TEXT,
+    lease_expires REAL,
+    result TEXT,
+    error TEXT,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_tasks_status ON tasks(status, kind, created_at);
+CREATE INDEX IF NOT EXISTS idx_tasks_lease ON tasks(status, lease_expires);
+"""
+
+
+class BrokerUnavailable(OSError):
+    """The broker server cannot be reached or failed (5xx): worth retrying later."""
+
+
+@dataclass
+class Task:
+    id: str
+    kind: str
+    payload: dict
+    status: str
+    attempts: int
+    lease_owner: Optional[str] = None
+    lease_expires: Optional[float] = None
+    result: object = None
+    error: Optional[str] = None
+
+    @property
+    def finished(self) -> bool:
+        return self.status in ("done", "failed")
+
+    @classmethod
+    def from_row(cls, row) -> "Task":
+        return cls(
+            id=row["id"],
+            kind=row["kind"],
+            payload=json.loads(row["payload"]),
+            status=row["status"],
+            attempts=row["attempts"],
+            lease_owner=row["lease_owner"],
+            lease_expires=row["lease_expires"],
+            result=json.loads(row["result"]) if row["result"] is not None else None,
+            error=row["error"],
+        )
+
+
+class _PollingWait:
+    """wait() for TaskBroker and BrokerClient: it only needs get()."""
+
+    def wait(self, task_ids: List[str], timeout: Optional[float] = None, poll_interval: float = 0.5) -> List[Task]:
+        """Blocks until every task is finished (done or failed) and returns them in order."""
+        deadline = time.monotonic() + timeout if timeout else None
+        pending = set(task_ids)
+        finished = {}
+        while pending:
+            for task_id in list(pending):
+                task = self.get(task_id)
+                if task is not None and task.finished:
+                    finished[task_id] = task
+                    pending.discard(task_id)
+            if not pending:
+                break
+            if deadline and time.monotonic() > deadline:
+                raise TimeoutError(f"{len(pending)} tâche(s) non terminée(s) après {timeout}s")
+            time.sleep(poll_interval)
+        return [finished[task_id] for task_id in task_ids]
+
+
+class TaskBroker(_PollingWait):
+    """
+    Task queue stored in SQLite, shared by the app and the worker daemons of one machine.
+
+    A worker leases a task for `lease_seconds` and must renew the lease with
+    heartbeats while it runs. A task whose lease expired (worker killed, node
+    lost) is delivered again to another worker, up to `max_attempts` times.
+    Only the current lease owner can complete or fail a task.
+    Other machines must use BrokerClient: WAL needs memory shared on one host.
+    """
+
+    def __init__(self, path: str = BROKER_DB, lease_seconds: float = LEASE_SECONDS, max_attempts: int = MAX_ATTEMPTS):
+        self.path = path
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with self._db() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        # One short-lived connection per operation: safe from any thread or process
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    @contextmanager
+    def _db(self):
+        conn = self._connect()
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    def enqueue(self, kind: str, payload: dict) -> str:
+        task_id = uuid.uuid4().hex
+        now = time.time()
+        with self._db() as conn:
+            conn.execute(
+                "INSERT INTO tasks (id, kind, payload, created_at, updated_at) VALUES (?, ?, ?, ?, ?)",
+                (task_id, kind, json.dumps(payload, default=str), now, now),
+            )
+        return task_id
+
+    def lease(self, worker_id: str, kinds: Optional[Iterable[str]] = None) -> Optional[Task]:
+        """Atomically takes the oldest queued (or abandoned) task of the given kinds."""
+        kinds = list(kinds or [])
+        kind_clause = f"AND kind IN ({', '.join('?' for _ in kinds)})" if kinds else ""
+        now = time.time()
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            # Abandoned tasks that used all their attempts are not delivered again
+            conn.execute(
+                "UPDATE tasks SET status = 'failed', error = 'Bail expiré : nombre maximal de tentatives atteint', "
+                "lease_owner = NULL, updated_at = ? WHERE status = 'leased' AND lease_expires < ? AND attempts >= ?",
+                (now, now, self.max_attempts),
+            )
+            row = conn.execute(
+                f"SELECT id FROM tasks WHERE (status = 'queued' OR (status = 'leased' AND lease_expires < ?)) {kind_clause} "
+                "ORDER BY created_at LIMIT 1",
+                [now, *kinds],
+            ).fetchone()
+            if row is None:
+                conn.execute("COMMIT")
+                return None
+            conn.execute(
+                "UPDATE tasks SET status = 'leased', lease_owner = ?, lease_expires = ?, attempts = attempts + 1, updated_at = ? "
+                "WHERE id = ?",
+                (worker_id, now + self.lease_seconds, now, row["id"]),
+            )
+            task = Task.from_row(conn.execute("SELECT * FROM tasks WHERE id = ?", (row["id"],)).fetchone())
+            conn.execute("COMMIT")
+            return task
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+    def _update_owned(self, task_id: str, worker_id: str, sql: str, params) -> bool:
+        with self._db() as conn:
+            cursor = conn.execute(
+                f"UPDATE tasks SET {sql}, updated_at = ? WHERE id = ? AND status = 'leased' AND lease_owner = ?",
+                [*params, time.time(), task_id, worker_id],
+            )
+            return cursor.rowcount == 1
+
+    def heartbeat(self, task_id: str, worker_id: str) -> bool:
+        """Extends the lease; False means the task was re-delivered and the work must stop."""
+        return self._update_owned(task_id, worker_id, "lease_expires = ?", [time.time() + self.lease_seconds])
+
+    def complete(self, task_id: str, worker_id: str, result) -> bool:
+        return self._update_owned(
+            task_id, worker_id, "status = 'done', result = ?, error = NULL, lease_owner = NULL, lease_expires = NULL",
+            [json.dumps(result, default=str)],
+        )
+
+    def fail(self, task_id: str, worker_id: str, error: str, retry: bool = True) -> bool:
+        """Records an error; the task goes back to the queue while attempts remain."""
+        task = self.get(task_id)
+        if task is None:
+            return False
+        status = "queued" if retry and task.attempts < self.max_attempts else "failed"
+        return self._update_owned(
+            task_id, worker_id, "status = ?, error = ?, lease_owner = NULL, lease_expires = NULL", [status, error]
+        )
+
+    def get(self, task_id: str) -> Optional[Task]:
+        with self._db() as conn:
+            row = conn.execute("SELECT * FROM tasks WHERE id = ?", (task_id,)).fetchone()
+        return Task.from_row(row) if row else None
+
+    def stats(self) -> dict:
+        with self._db() as conn:
+            rows = conn.execute("SELECT status, COUNT(*) AS n FROM tasks GROUP BY status").fetchall()
+        return {row["status"]: row["n"] for row in rows}
+
+
+class BrokerHandler(BaseHTTPRequestHandler):
+    """JSON routes of the broker server, one per TaskBroker method."""
+    server_version = "SynthetIA-Broker/1.0"
+
+    def log_message(self, format, *args):
+        pass  # every idle worker polls /lease
+
+    def _send_json(self, status: int, data):
+        body = json.dumps(data, ensure_ascii=False, default=str).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _authorized(self) -> bool:
+        token = self.server.token
+        if token and self.headers.get("Authorization") != f"Bearer {token}":
+            self._send_json(401, {"error": "Jeton du broker invalide"})
+            return False
+        return True
+
+    def do_GET(self):
+        if not self._authorized():
+            return
+        broker = self.server.broker
+        parts = [p for p in urlparse(self.path).path.split("/") if p]
+        if parts == ["health"]:
+            return self._send_json(200, {"lease_seconds": broker.lease_seconds, "max_attempts": broker.max_attempts, "tasks": broker.stats()})
+        if len(parts) == 2 and parts[0] == "tasks":
+            task = broker.get(parts[1])
+            return self._send_json(200, asdict(task)) if task else self._send_json(404, {"error": "Tâche inconnue"})
+        self._send_json(404, {"error": "Route inconnue"})
+
+    def do_POST(self):
+        if not self._authorized():
+            return
+        broker = self.server.broker
+        parts = [p for p in urlparse(self.path).path.split("/") if p]
+        try:
+            body = json.loads(self.rfile.read(int(self.headers.get("Content-Length") or 0)) or b"{}")
+        except json.JSONDecodeError as e:
+            return self._send_json(400, {"error": str(e)})
+        if parts == ["tasks"]:
+            return self._send_json(201, {"id": broker.enqueue(body["kind"], body["payload"])})
+        if parts == ["lease"]:
+            task = broker.lease(body["worker_id"], body.get("kinds"))
+            return self._send_json(200, {"task": asdict(task) if task else None})
+        if len(parts) == 3 and parts[0] == "tasks":
+            task_id, action = parts[1], parts[2]
+            if action == "heartbeat":
+                return self._send_json(200, {"ok": broker.heartbeat(task_id, body["worker_id"])})
+            if action == "complete":
+                return self._send_json(200, {"ok": broker.complete(task_id, body["worker_id"], body.get("result"))})
+            if action == "fail":
+                return self._send_json(200, {"ok": broker.fail(task_id, body["worker_id"], body["error"], body.get("retry", True))})
+        self._send_json(404, {"error": "Route inconnue"})
+
+
+def create_broker_server(broker: TaskBroker, host: str = BROKER_HOST, port: int = BROKER_PORT, token: str = BROKER_TOKEN) -> ThreadingHTTPServer:
+    server = ThreadingHTTPServer((host, port), BrokerHandler)
+    server.daemon_threads = True
+    server.broker = broker
+    server.token = token
+    return server
+
+
+class BrokerClient(_PollingWait):
+    """Same interface as TaskBroker, through the broker server: for workers on other machines."""
+
+    def __init__(self, url: str = BROKER_URL, token: str = BROKER_TOKEN, timeout: float = 30):
+        self.url = url.rstrip("/")
+        self.token = token
+        self.timeout = timeout
+        health = self._request("GET", "/health")
+        self.lease_seconds = health["lease_seconds"]
+        self.max_attempts = health["max_attempts"]
+
+    def _request(self, method: str, path: str, payload: dict = None):
+        headers = {"Content-Type": "application/json"}
+        if self.token:
+            headers["Authorization"] = f"Bearer {self.token}"
+        data = json.dumps(payload, default=str).encode("utf-8") if payload is not None else None
+        request = urllib.request.Request(self.url + path, data=data, method=method, headers=headers)
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                return json.loads(response.read())
+        except urllib.error.HTTPError as e:
+            if e.code == 404 and path.startswith("/tasks/"):
+                return None
+            detail = e.read().decode(errors="ignore")
+            if e.code in (401, 403):
+                raise RuntimeError(f"Broker {self.url} : accès refusé (HTTP {e.code}), vérifiez BROKER_TOKEN") from e
+            if e.code >= 500:
+                raise BrokerUnavailable(f"Broker {self.url} : HTTP {e.code} {detail}") from e
+            raise RuntimeError(f"Broker {self.url} : HTTP {e.code} {detail}") from e
+        except OSError as e:
+            # Connection refused, DNS, timeout: the server may be restarting
+            raise BrokerUnavailable(f"Broker {self.url} injoignable : {e}") from e
+
+    def enqueue(self, kind: str, payload: dict) -> str:
+        return self._request("POST", "/tasks", {"kind": kind, "payload": payload})["id"]
+
+    def lease(self, worker_id: str, kinds: Optional[Iterable[str]] = None) -> Optional[Task]:
+        data = self._request("POST", "/lease", {"worker_id": worker_id, "kinds": list(kinds or [])})["task"]
+        return Task(**data) if data else None
+
+    def heartbeat(self, task_id: str, worker_id: str) -> bool:
+        return self._request("POST", f"/tasks/{task_id}/heartbeat", {"worker_id": worker_id})["ok"]
+
+    def complete(self, task_id: str, worker_id: str, result) -> bool:
+        return self._request("POST", f"/tasks/{task_id}/complete", {"worker_id": worker_id, "result": result})["ok"]
+
+    def fail(self, task_id: str, worker_id: str, error: str, retry: bool = True) -> bool:
+        return self._request("POST", f"/tasks/{task_id}/fail", {"worker_id": worker_id, "error": error, "retry": retry})["ok"]
+
+    def get(self, task_id: str) -> Optional[Task]:
+        data = self._request("GET", f"/tasks/{task_id}")
+        return Task(**data) if data else None
+
+    def stats(self) -> dict:
+        return self._request("GET", "/health")["tasks"]
+
+
+def connect_broker():
+    """The broker server when BROKER_URL is set, otherwise the local database (same machine only)."""
+    return BrokerClient() if BROKER_URL else TaskBroker()
+
+
+class RemoteTranscriber:
+    """
+    Drop-in replacement for WhisperTranscriber that sends the audio to the worker daemons.
+    Segments are queued together, so several nodes transcribe one video in parallel.
+    Audio paths must be reachable by the workers (shared folder).
+    """
+
+    def __init__(self, broker: TaskBroker, timeout: Optional[float] = None, spool_dir: str = BROKER_SPOOL_DIR):
+        self.broker = broker
+        self.timeout = timeout
+        self.spool_dir = spool_dir
+
+    @staticmethod
+    def extract_subtitles(srt_content: str) -> str:
+        from transcriber import WhisperTranscriber
+        return WhisperTranscriber.extract_subtitles(srt_content)
+
+    def _spool(self, samples) -> str:
+        import numpy as np
+
+        os.makedirs(self.spool_dir, exist_ok=True)
+        path = os.path.abspath(os.path.join(self.spool_dir, f"{uuid.uuid4().hex}.npy"))
+        np.save(path, samples)
+        return path
+
+    def iter_segments(self, segments: Iterable) -> Iterator[str]:
+        """Queues every segment at once, then yields the texts in order as workers finish them."""
+        spooled, task_ids = [], []
+        try:
+            # One pass: `segments` may be a generator (local files decoded one segment at a time)
+            for segment in segments:
+                if isinstance(segment, (str, os.PathLike)):
+                    path = os.path.abspath(str(segment))
+                else:
+                    # In-memory segments (numpy arrays) are written as raw .npy samples, no re-encoding
+                    path = self._spool(segment)
+                    spooled.append(path)
+                task_ids.append(self.broker.enqueue("transcribe", {"path": path}))
+            print(f"DEBUG: {len(task_ids)} segment(s) envoyés aux workers")
+            for task_id in task_ids:
+                task = self.broker.wait([task_id], timeout=self.timeout)[0]
+                if task.status != "done":
+                    raise RuntimeError(f"Transcription distante échouée ({task.id}) : {task.error}")
+                yield task.result
+        finally:
+            for path in spooled:
+                if os.path.exists(path):
+                    os.remove(path)
+
+    def transcribe_segments(self, segments: Iterable) -> list[str]:
+        return list(self.iter_segments(segments))
+
+    def transcribe_audio(self, audio_file) -> str:
+        return self.transcribe_segments([audio_file])[0]
+
+
+class RemoteSummarizer:
+    """
+    Wraps the local Summarizer and sends the per-video summaries to the worker daemons.
+    queue() submits a whole batch at once, so several nodes summarize one synthesis in parallel;
+    everything else (global analysis, refinement, warm-up) stays on the local Summarizer.
+    """
+
+    def __init__(self, broker: TaskBroker, summarizer, timeout: Optional[float] = None):
+        self.broker = broker
+        self.local = summarizer
+        self.timeout = timeout
+        self._queued = {}
+        self._lock = threading.Lock()
+
+    def __getattr__(self, name):
+        return getattr(self.local, name)
+
+    def _enqueue(self, text: str, author: str) -> str:
+        return self.broker.enqueue("summarize", {
+            "text": text, "author": author, "model": self.local.model, "summary_type": self.local.summary_type,
+        })
+
+    def queue(self, items: Iterable) -> None:
+        """Submits every (text, author) pair now; summarize_long_text() then waits for its result."""
+        for text, author in items:
+            task_id = self._enqueue(text, author)
+            with self._lock:
+                self._queued.setdefault((text, author), []).append(task_id)
+
+    def summarize_long_text(self, text: str, author: str) -> str:
+        with self._lock:
+            queued = self._queued.get((text, author))
+            task_id = queued.pop(0) if queued else None
+            if queued == []:
+                del self._queued[(text, author)]
+        if task_id is None:
+            task_id = self._enqueue(text, author)
+        task = self.broker.wait([task_id], timeout=self.timeout)[0]
+        if task.status != "done":
+            raise RuntimeError(f"Résumé distant échoué ({task.id}) : {task.error}")
+        return task.result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serveur de la file de tâches (workers sur d'autres machines)")
+    parser.add_argument("--host", default=BROKER_HOST, help="Adresse d'écoute")
+    parser.add_argument("--port", type=int, default=BROKER_PORT, help="Port d'écoute")
+    parser.add_argument("--db", default=BROKER_DB, help="Base SQLite du broker (disque local, jamais un partage réseau)")
+    args = parser.parse_args()
+
+    server = create_broker_server(TaskBroker(args.db), args.host, args.port)
+    print(f"Broker prêt sur http://{args.host}:{args.port} ({args.db})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+import math
+import os
+from typing import Optional
+
+# Context sizes the planner can pick from (smallest that fits wins).
+NUM_CTX_BUCKETS = (2048, 4096, 8192, 16384, 32768)
+MAX_NUM_CTX = int(os.getenv("OLLAMA_MAX_CTX", "32768"))
+
+# French text averages a bit less than 4 characters per token.
+CHARS_PER_TOKEN = 3.5
+
+# Output caps per task. None means "proportional to the input" (rewrites).
+NUM_PREDICT = {
+    "validation": 16,
+    "chunk": 1024,
+    "full_text": 2048,
+    "multi": 3072,
+    "global": 4096,
+    "reformat": None,
+    "enhance": None,
+    "refine": None,
+}
+DEFAULT_NUM_PREDICT = 2048
+REWRITE_OVERHEAD = 256
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count for a prompt (no tokenizer round trip)."""
+    if not text:
+        return 0
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+class BudgetPlanner:
+    """
+    Chooses num_ctx and num_predict for each Ollama call.
+
+    The KV cache is sized after the prompt instead of a fixed 8k window, and
+    generation is capped per task so short answers stay short.
+    """
+
+    def __init__(self, max_ctx: int = MAX_NUM_CTX, buckets: tuple = NUM_CTX_BUCKETS, verbose: bool = True):
+        self.max_ctx = max_ctx
+        self.buckets = tuple(b for b in buckets if b <= max_ctx) or (max_ctx,)
+        self.verbose = verbose
+
+    def num_predict_for(self, task: str, prompt_tokens: int, source_tokens: Optional[int] = None) -> int:
+        cap = NUM_PREDICT.get(task, DEFAULT_NUM_PREDICT)
+        if cap is None:
+            # Rewrites output roughly as much text as they receive
+            base = source_tokens if source_tokens is not None else prompt_tokens
+            cap = int(base * 1.2) + REWRITE_OVERHEAD
+        return cap
+
+    def plan(self, messages: list, task: str, source_text: Optional[str] = None, min_ctx: Optional[int] = None) -> dict:
+        """
+        Returns the Ollama options for a chat call.
+        min_ctx pins a floor so a series of similar calls (chunks) keeps the same num_ctx.
+        """
+        prompt_tokens = sum(estimate_tokens(m.get("content", "")) for m in messages)
+        source_tokens = estimate_tokens(source_text) if source_text is not None else None
+        num_predict = self.num_predict_for(task, prompt_tokens, source_tokens)
+
+        needed = max(prompt_tokens + num_predict, min_ctx or 0)
+        num_ctx = next((b for b in self.buckets if b >= needed), self.buckets[-1])
+        if prompt_tokens + num_predict > num_ctx:
+            # Keep the whole prompt, shrink the output budget to what is left
+            num_predict = max(num_ctx - prompt_tokens, NUM_PREDICT["validation"])
+            print(f"Warning: prompt for '{task}' (~{prompt_tokens} tokens) close to the {num_ctx} context limit")
+
+        if self.verbose:
+            print(f"DEBUG: LLM budget [{task}] prompt~{prompt_tokens} tok -> num_ctx={num_ctx}, num_predict={num_predict}")
+        return {"num_ctx": num_ctx, "num_predict": num_predict}
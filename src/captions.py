@@ -0,0 +1,98 @@
+import os
+import re
+from dataclasses import dataclass
+from typing import Callable, Iterable, Optional
+
+# Caption languages by preference; the first one is also the translation target
+CAPTION_LANGS = [lang.strip().lower() for lang in os.getenv("CAPTION_LANGS", "fr,en").split(",") if lang.strip()]
+CAPTION_AUTO = os.getenv("CAPTION_AUTO", "True").lower() in ("1", "true", "yes")
+CAPTION_TRANSLATE = os.getenv("CAPTION_TRANSLATE", "True").lower() in ("1", "true", "yes")
+# Below this many characters of actual speech, captions are not trusted and Whisper is used
+MIN_CAPTION_CHARS = int(os.getenv("MIN_CAPTION_CHARS", "200"))
+
+_ANNOTATION_RE = re.compile(r"\[[^\]]*\]|\([^)]*\)|♪")
+
+
+def is_usable_caption(text: str, min_chars: int = MIN_CAPTION_CHARS) -> bool:
+    """True when the extracted captions hold enough speech once [Musique], (Applause), ♪ are removed."""
+    speech = _ANNOTATION_RE.sub(" ", text or "")
+    return len(" ".join(speech.split())) >= min_chars
+
+
+def parse_code(code: str) -> tuple[str, bool]:
+    """YouTube track code -> (base language, auto-generated). "a.fr" -> ("fr", True), "en-GB" -> ("en", False)."""
+    code = code.strip(".").lower()
+    auto = code.startswith("a.")
+    if auto:
+        code = code[2:]
+    return code.split("-")[0].split("_")[0], auto
+
+
+@dataclass(frozen=True)
+class CaptionChoice:
+    """A caption track to fetch, possibly translated by YouTube (tlang) into `target`."""
+    code: str
+    language: str
+    auto: bool
+    target: Optional[str] = None
+
+    @classmethod
+    def from_code(cls, code: str) -> "CaptionChoice":
+        return cls(code, *parse_code(code))
+
+    @property
+    def method(self) -> str:
+        """Path taken, stored with the transcript: subtitles:manual:fr, subtitles:translated:auto:es>fr..."""
+        kind = "auto" if self.auto else "manual"
+        if self.target:
+            return f"subtitles:translated:{kind}:{self.language}>{self.target}"
+        return f"subtitles:{kind}:{self.language}"
+
+
+class CaptionSelector:
+    """
+    Orders the caption tracks of a video from best to worst:
+      1. manual tracks in a preferred language (in preference order),
+      2. auto-generated tracks in a preferred language,
+      3. another track translated by YouTube into the first preferred language.
+    select() fetches them in that order and keeps the first non-empty one, so
+    the audio download + Whisper path is only used when nothing usable exists.
+    """
+
+    def __init__(self, languages: Iterable[str] = None, allow_auto: bool = CAPTION_AUTO, translate: bool = CAPTION_TRANSLATE):
+        self.languages = [lang.lower() for lang in (languages or CAPTION_LANGS)]
+        self.allow_auto = allow_auto
+        self.translate = translate
+
+    def rank(self, codes: Iterable[str]) -> list[CaptionChoice]:
+        tracks = [CaptionChoice.from_code(code) for code in codes]
+        if not self.allow_auto:
+            tracks = [t for t in tracks if not t.auto]
+        preference = {lang: i for i, lang in enumerate(self.languages)}
+
+        direct = [t for t in tracks if t.language in preference]
+        # Exact codes ("fr") before regional variants ("fr-ca") of the same language
+        direct.sort(key=lambda t: (t.auto, preference[t.language], t.code.strip(".").lower().removeprefix("a.") != t.language))
+
+        translated = []
+        if self.translate and self.languages:
+            target = self.languages[0]
+            others = [t for t in tracks if t.language not in preference]
+            for auto in (False, True):
+                source = next((t for t in others if t.auto == auto), None)
+                if source is not None:
+                    translated.append(CaptionChoice(source.code, source.language, source.auto, target=target))
+        return direct + translated
+
+    def select(self, codes: Iterable[str], fetch: Callable[[CaptionChoice], str]) -> Optional[tuple[str, CaptionChoice]]:
+        """Returns (srt, choice) for the first track that downloads with content, or None."""
+        for choice in self.rank(codes):
+            try:
+                srt = fetch(choice)
+            except Exception as e:
+                print(f"DEBUG: captions {choice.method} failed: {e}")
+                continue
+            if srt and "-->" in srt:
+                return srt, choice
+            print(f"DEBUG: captions {choice.method} are empty")
+        return None
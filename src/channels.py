@@ -0,0 +1,101 @@
+import re
+import unicodedata
+from collections import deque
+from functools import lru_cache
+from typing import Dict, Iterable, Optional, Tuple
+
+from config import PREFERRED_CHANNELS
+
+
+def normalize_name(name: str) -> str:
+    """Lowercases, strips accents and collapses punctuation ("HugoDécrypte" -> "hugodecrypte")."""
+    name = unicodedata.normalize("NFKD", (name or "").lower())
+    name = "".join(c for c in name if not unicodedata.combining(c))
+    return " ".join(re.sub(r"[^a-z0-9]+", " ", name).split())
+
+
+class ChannelMatcher:
+    """
+    Aho-Corasick automaton over the normalized preferred channel names.
+    A channel name is scanned once, whatever the size of the preferred list,
+    and every preferred name it contains is reported (substring semantics,
+    like the original `preferred.lower() in channel_name.lower()` check).
+    """
+
+    def __init__(self, preferred: Dict[str, list], categories: Optional[Iterable[str]] = None):
+        categories = list(categories) if categories else list(preferred.keys())
+        self._goto = [{}]
+        self._fail = [0]
+        self._out = [[]]  # per state: list of (pattern_length, categories)
+
+        patterns = {}
+        for category in categories:
+            for channel in preferred.get(category, []):
+                key = normalize_name(channel)
+                if key:
+                    patterns.setdefault(key, set()).add(category)
+
+        for pattern, cats in patterns.items():
+            self._add(pattern, frozenset(cats))
+        self._build()
+        self.size = len(patterns)
+
+    def _add(self, pattern: str, categories: frozenset):
+        state = 0
+        for char in pattern:
+            nxt = self._goto[state].get(char)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[state][char] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+            state = nxt
+        self._out[state].append((len(pattern), categories))
+
+    def _build(self):
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, nxt in self._goto[state].items():
+                queue.append(nxt)
+                fail = self._fail[state]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[nxt] = self._goto[fail].get(char, 0)
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+
+    def match(self, channel_name: str) -> Dict[str, float]:
+        """
+        Returns {category: score} for the categories whose channels appear in the name.
+        The score is the share of the channel name covered by the longest match
+        (1.0 for an exact name, lower for "TED" inside "TEDx Paris").
+        """
+        text = normalize_name(channel_name)
+        if not text:
+            return {}
+        scores = {}
+        state = 0
+        for char in text:
+            while state and char not in self._goto[state]:
+                state = self._fail[state]
+            state = self._goto[state].get(char, 0)
+            for length, categories in self._out[state]:
+                score = length / len(text)
+                for category in categories:
+                    if score > scores.get(category, 0.0):
+                        scores[category] = score
+        return scores
+
+    def is_preferred(self, channel_name: str) -> bool:
+        return bool(self.match(channel_name))
+
+
+@lru_cache(maxsize=64)
+def _cached_matcher(categories: Tuple[str, ...]) -> ChannelMatcher:
+    return ChannelMatcher(PREFERRED_CHANNELS, categories or None)
+
+
+def get_matcher(active_categories=None) -> ChannelMatcher:
+    """Matcher for a set of active categories (all categories when empty), built once per set."""
+    return _cached_matcher(tuple(sorted(active_categories or [])))
@@ -19,6 +19,11 @@ from summarizer import Summarizer
 from exporter import Exporter
 from utils import clean_files, time_since
 from prompts import PromptManager
+from validator import RelevanceValidator
+from library import KINDS, get_library
+from decoding import DECODING_PROFILES, WHISPER_PROFILE
+from streaming import in_background
+from captions import is_usable_caption
 
 console = Console()
 load_dotenv()
@@ -36,17 +41,21 @@ if FFMPEG_DIR:
 
 
 def get_video_text(url, device, model, transcribe, processor):
-    code = processor.check_subtitles(url)
-    if code:
-        subtitles_file, title, author, date = processor.get_subtitles(url, code)
+    captions = processor.fetch_subtitles(url)
+    result = transcribe.extract_subtitles(captions[0]) if captions else ""
+    # Same rule as the app: near-empty or "[Music]"-only captions go through Whisper
+    if is_usable_caption(result):
+        _, title, author, date, method = captions
         console.print(f"[blue]video a analyser =>[/blue] [yellow4]{title}[/yellow4] [dim]({date})[/dim]")
-        console.print("[blue]Sous-titre detectés[/blue]")
-        result = transcribe.extract_subtitles(subtitles_file)
+        console.print(f"[blue]Sous-titre detectés[/blue] [dim]({method})[/dim]")
 
     else:
         audio_file, title, author, date = processor.download_audio(url)
         console.print(f"[blue]video a analyser =>[/blue] [yellow4]{title}[/yellow4] [dim]({date})[/dim]")
-        console.print("[yellow]Pas de sous titre detecté[/yellow] -> [green]lancement du transcribe audio[/green]")
+        if captions:
+            console.print(f"[yellow]Sous-titres inutilisables ({len(result)} caractères)[/yellow] -> [green]lancement du transcribe audio[/green]")
+        else:
+            console.print("[yellow]Pas de sous titre detecté[/yellow] -> [green]lancement du transcribe audio[/green]")
         result = transcribe.transcribe_audio(audio_file)
 
     return result, title, author, date
@@ -62,8 +71,8 @@ def process_single_video(args, summarizer, transcribe, processor, exporter):
 
 
 def check_result(text, serach, summarizer):
-    check_valide_search = summarizer.check_synthese(text, serach)
-    return check_valide_search
+    validator = RelevanceValidator(llm_check=summarizer.check_synthese)
+    return validator.validate(text, serach)
 
 
 def process_multiple_videos(args, summarizer, transcribe, processor, exporter):
@@ -140,7 +149,7 @@ def synthesize_videos(selected_videos, args, summarizer, transcribe, processor,
             summary = "\n\n== Text suivant ==".join(texts)
         for _ in range(2):
             summary = summarizer.summarize_multi_texts(search_term, summary)
-        check = eval(check_result(summary, search_term, summarizer))
+        check = check_result(summary, search_term, summarizer)
         if check:
             break
 
@@ -196,13 +205,11 @@ def process_manual_videos(args, summarizer, transcribe, processor, exporter):
 
 def process_video_path(args, summarizer, transcribe, processor, exporter):
     video_path = Path(args.video_path)
-    segments = processor.extract_audio_from_mp4(video_path)
-    summary = transcribe.transcribe_segments(segments)
     title = video_path.stem
-    summary = "\n\n".join(summary)
     
-    # 1. Generate detailed summary (one pass only)
-    detailed_summary = summarizer.summarize_long_text(summary, author=title)
+    # 1. Generate detailed summary (one pass only), chunks summarized while later segments are transcribed
+    with processor.audio_segments(video_path) as segments:
+        detailed_summary = summarizer.summarize_stream(in_background(transcribe.iter_segments(segments)), author=title)
     
     # 2. Generate global analysis if type is long
     if args.type == "long":
@@ -217,6 +224,20 @@ def process_video_path(args, summarizer, transcribe, processor, exporter):
     exporter.save_summary(final_output, title, args.format, source_info) 
 
 
+def search_library(args):
+    library = get_library()
+    hits = library.search(args.library, kind=args.kind, limit=args.library_limit)
+    if not hits:
+        console.print(f"[yellow]Aucun document trouvé pour : {args.library}[/yellow]")
+        return
+    console.print(f"[blue]{len(hits)} document(s) trouvé(s) sur {library.count()}[/blue]\n")
+    for hit in hits:
+        console.print(f"[bold]#{hit.id}[/bold] [green]{hit.kind}[/green] [yellow4]{hit.title}[/yellow4] [dim]({hit.author} {hit.published})[/dim]")
+        console.print(f"[dim]{hit.path or hit.url}[/dim]")
+        console.print(Markdown(hit.snippet))
+        console.print()
+
+
 def main():
     parser = argparse.ArgumentParser(description="Résumé ou synthèse de vidéos YouTube")
     parser.add_argument("--url", help="URL d'une vidéo YouTube (mode résumé)")
@@ -225,22 +246,31 @@ def main():
     parser.add_argument("--limit", type=int, default=3, help="Nombre de sources YouTube à rechercher (défaut: 3)")
     parser.add_argument("--device", default=DEVICE, help="Choix du device (cpu ou cuda)")
     parser.add_argument("--model", default=MODEL, help="Taille du modèle Whisper (tiny, base, small, medium, large)")
+    parser.add_argument("--profile", default=WHISPER_PROFILE, choices=list(DECODING_PROFILES), help="Profil de décodage Whisper : fast (rapide), balanced, accurate (précis)")
     parser.add_argument("--output-dir", default=OUTPUT_DIR, help="Dossier de sortie")
     parser.add_argument("--format", default=FORMAT, choices=["md", "txt", "pdf"], help="Format de sortie")
     parser.add_argument("--type", default="short", choices=["short", "medium", "long"], help="Type de résumé : short (concis), medium (équilibré), long (exhaustif)")
     parser.add_argument("--manual", action="store_true", help="Mode saisie manuelle de vidéos")
+    parser.add_argument("--library", metavar="QUERY", help="Recherche plein texte dans la bibliothèque des transcriptions et résumés")
+    parser.add_argument("--kind", choices=KINDS, help="Type de document recherché dans la bibliothèque")
+    parser.add_argument("--library-limit", type=int, default=20, help="Nombre de résultats de la bibliothèque (défaut: 20)")
     args = parser.parse_args()
 
+    # Library search needs neither Whisper nor Ollama
+    if args.library:
+        search_library(args)
+        return
+
     list_path = ["./audio_segments", "./chunk_data", "./segments_text"]
     clean_files(list_path)
 
     try:
-        transcribe = WhisperTranscriber(model_size=args.model, device=args.device)
+        transcribe = WhisperTranscriber(model_size=args.model, device=args.device, profile=args.profile)
         processor = YouTubeAudioProcessor(output_dir="./audio_segments", source=args.limit)
         client = Client(host=OLLAMA_HOST)
         prompt_manager = PromptManager()
         summarizer = Summarizer(client, OLLAMA_MODEL, prompt_manager=prompt_manager, summary_type=args.type)
-        exporter = Exporter(args.output_dir)
+        exporter = Exporter(args.output_dir, library=get_library())
         
         if args.url:
             process_single_video(args, summarizer, transcribe, processor, exporter)
@@ -251,7 +281,7 @@ def main():
         elif args.manual:
             process_manual_videos(args, summarizer, transcribe, processor, exporter)
         else:
-            console.print("[red]Erreur : vous devez fournir --url, --search, --video-path ou --manual[/red]")
+            console.print("[red]Erreur : vous devez fournir --url, --search, --video-path, --manual ou --library[/red]")
 
 
     except Exception as e:
@@ -0,0 +1,44 @@
+import html
+
+import streamlit as st
+
+from utils import time_since, format_views
+
+
+def format_duration(seconds: int) -> str:
+    """Formats a duration in seconds as "1h02m" or "12m05s"."""
+    seconds = int(seconds or 0)
+    hours, rest = divmod(seconds, 3600)
+    minutes, secs = divmod(rest, 60)
+    if hours:
+        return f"{hours}h{minutes:02d}m"
+    return f"{minutes}m{secs:02d}s"
+
+
+def render_video_card(v, idx, basket_ids, session_state):
+    """Renders a search result (VideoMeta) with its basket toggle. Only reads stored metadata."""
+    if v.thumbnail_url:
+        st.image(v.thumbnail_url, use_container_width=True)
+
+    star = "⭐ " if v.is_boosted else ""
+    st.markdown(
+        f'<a class="card-title" href="{html.escape(v.watch_url)}" target="_blank">{star}{html.escape(v.title)}</a>',
+        unsafe_allow_html=True,
+    )
+    st.caption(f"{v.author} • {format_duration(v.length)} • {time_since(v.publish_date)} • {format_views(v.views)} vues")
+
+    safe_desc = html.escape(v.description or "")
+    st.markdown(f"""
+    <div style="font-size: 0.85em; color: #D3D3D3; max-height: 90px; overflow-y: auto; background: rgba(255,255,255,0.05); padding: 6px; border-radius: 6px; margin-bottom: 8px;">
+        {safe_desc}
+    </div>
+    """, unsafe_allow_html=True)
+
+    if v.watch_url in basket_ids:
+        if st.button("✅ Dans le panier (retirer)", key=f"rm_{idx}_{v.video_id}"):
+            session_state.selection_basket = [b for b in session_state.selection_basket if b.watch_url != v.watch_url]
+            st.rerun()
+    else:
+        if st.button("➕ Ajouter au panier", key=f"add_{idx}_{v.video_id}"):
+            session_state.selection_basket.append(v)
+            st.rerun()
@@ -66,3 +66,14 @@ PREFERRED_CHANNELS = {
         "France 24"
     ]
 }
+
+
+# Weights of the relevance score used to rank search results (see ranking.py).
+# They are normalized, only their ratios matter.
+RANKING_WEIGHTS = {
+    "views": 0.2,     # popularity (log of view count)
+    "recency": 0.25,  # publication date (30-day half-life)
+    "duration": 0.15, # fit to the selected duration mode
+    "channel": 0.3,   # preferred channel strength (PREFERRED_CHANNELS)
+    "terms": 0.1      # query terms found in title/description
+}
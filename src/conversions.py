@@ -0,0 +1,72 @@
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+
+import markdown
+from markdownify import markdownify
+
+from utils import clean_markdown_text
+
+CONVERSION_CACHE_SIZE = int(os.getenv("CONVERSION_CACHE_SIZE", "64"))
+
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+_stats = {"hits": 0, "misses": 0}
+
+
+def is_html(text: str) -> bool:
+    """Detects if text is likely HTML."""
+    text = text.strip()
+    return (
+        text.startswith("<") or
+        "<p>" in text or
+        "<div>" in text or
+        "<h1>" in text or
+        "<span" in text
+    )
+
+
+def _memoized(operation: str, text: str, convert):
+    """Runs convert(text) once per (operation, content hash); large documents are not re-parsed on reruns."""
+    key = (operation, hashlib.blake2b(text.encode("utf-8"), digest_size=16).digest())
+    with _cache_lock:
+        if key in _cache:
+            _cache.move_to_end(key)
+            _stats["hits"] += 1
+            return _cache[key]
+        _stats["misses"] += 1
+    result = convert(text)
+    with _cache_lock:
+        _cache[key] = result
+        while len(_cache) > CONVERSION_CACHE_SIZE:
+            _cache.popitem(last=False)
+    return result
+
+
+def markdown_to_html(text: str, extensions=("extra",)) -> str:
+    extensions = tuple(extensions)
+    return _memoized(f"md>html:{','.join(extensions)}", text or "",
+                     lambda t: markdown.markdown(clean_markdown_text(t), extensions=list(extensions)))
+
+
+def html_to_markdown(html: str) -> str:
+    return _memoized("html>md", html or "", lambda t: markdownify(t, heading_style="ATX"))
+
+
+def to_canonical(content: str) -> str:
+    """Canonical document format of the app: Markdown (editor HTML is converted back once)."""
+    if is_html(content or ""):
+        return html_to_markdown(content)
+    return clean_markdown_text(content or "")
+
+
+def cache_info() -> dict:
+    with _cache_lock:
+        return {**_stats, "size": len(_cache)}
+
+
+def cache_clear():
+    with _cache_lock:
+        _cache.clear()
+        _stats.update(hits=0, misses=0)
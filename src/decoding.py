@@ -0,0 +1,46 @@
+import os
+from typing import Optional
+
+# Whisper decoding presets, from throughput to quality. "balanced" matches the
+# defaults of whisper.transcribe(); every profile reuses one language per video.
+DECODING_PROFILES = {
+    "fast": {
+        # Greedy, single pass: no temperature fallback, no conditioning on the previous window
+        "temperature": 0.0,
+        "beam_size": None,
+        "best_of": None,
+        "condition_on_previous_text": False,
+    },
+    "balanced": {
+        "temperature": (0.0, 0.2, 0.4, 0.6, 0.8, 1.0),
+        "beam_size": None,
+        "best_of": 5,
+        "condition_on_previous_text": True,
+    },
+    "accurate": {
+        "temperature": (0.0, 0.2, 0.4, 0.6, 0.8, 1.0),
+        "beam_size": 5,
+        "best_of": 5,
+        "patience": 1.0,
+        "condition_on_previous_text": True,
+    },
+}
+
+WHISPER_PROFILE = os.getenv("WHISPER_PROFILE", "balanced")
+# Fixed transcription language (e.g. "fr"); empty = detected once per video
+WHISPER_LANGUAGE = os.getenv("WHISPER_LANGUAGE", "") or None
+
+
+def get_profile(name: str) -> str:
+    if name not in DECODING_PROFILES:
+        raise ValueError(f"Profil de décodage inconnu : {name} (choix : {', '.join(DECODING_PROFILES)})")
+    return name
+
+
+def decode_options(profile: str, device: str = "cpu", language: Optional[str] = None) -> dict:
+    """Keyword arguments for model.transcribe(): the profile, fp16 only on GPU, and the language if known."""
+    options = dict(DECODING_PROFILES[get_profile(profile)])
+    options["fp16"] = device.startswith("cuda")
+    if language:
+        options["language"] = language
+    return options
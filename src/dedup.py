@@ -0,0 +1,140 @@
+import os
+import re
+import zlib
+from dataclasses import dataclass
+from typing import List, Tuple
+
+import numpy as np
+
+from validator import fold
+
+DEDUP_THRESHOLD = float(os.getenv("DEDUP_THRESHOLD", "0.6"))  # estimated Jaccard similarity
+
+_PRIME = (1 << 31) - 1
+_SENTENCE_RE = re.compile(r"(?<=[.!?…])\s+")
+_WORD_RE = re.compile(r"[a-z0-9]+")
+_BULLET_RE = re.compile(r"^(\s*(?:[-*+]|\d+[.)])\s+)")
+
+
+def split_sentences(line: str) -> List[str]:
+    return [s for s in _SENTENCE_RE.split(line.strip()) if s]
+
+
+def shingles(sentence: str, size: int = 3) -> set:
+    """Word n-grams of the folded sentence (a single shingle for short sentences)."""
+    words = _WORD_RE.findall(fold(sentence))
+    if len(words) <= size:
+        return {" ".join(words)} if words else set()
+    return {" ".join(words[i:i + size]) for i in range(len(words) - size + 1)}
+
+
+@dataclass
+class DedupResult:
+    texts: List[str]
+    total: int
+    removed: int
+
+    @property
+    def ratio(self) -> float:
+        return self.removed / self.total if self.total else 0.0
+
+
+class SentenceDeduplicator:
+    """
+    Removes near-duplicate sentences across documents with MinHash + LSH banding.
+    The first occurrence is kept and credited with the other sources that said the same thing.
+    """
+
+    def __init__(self, threshold: float = DEDUP_THRESHOLD, num_perm: int = 64, bands: int = 16,
+                 shingle_size: int = 3, min_words: int = 6, seed: int = 42):
+        if num_perm % bands:
+            raise ValueError("num_perm doit être un multiple de bands")
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.shingle_size = shingle_size
+        self.min_words = min_words
+        rng = np.random.default_rng(seed)
+        self._a = rng.integers(1, _PRIME, size=num_perm, dtype=np.int64)
+        self._b = rng.integers(0, _PRIME, size=num_perm, dtype=np.int64)
+
+    def signature(self, shingle_set: set) -> np.ndarray:
+        hashes = np.array([zlib.crc32(s.encode("utf-8")) & _PRIME for s in shingle_set], dtype=np.int64)
+        return ((np.outer(hashes, self._a) + self._b) % _PRIME).min(axis=0)
+
+    def dedup(self, documents: List[Tuple[str, str]]) -> DedupResult:
+        """
+        documents: (source label, text) pairs, in priority order.
+        Returns the texts with duplicate sentences removed and kept sentences annotated
+        with "(également : source)" when other documents contained them.
+        """
+        buckets = {}
+        kept = []  # (signature, doc index, line index, sentence index)
+        credits = {}  # kept id -> list of other source labels
+        outputs = []
+        total = removed = 0
+
+        for doc_index, (label, text) in enumerate(documents):
+            lines = []
+            for line in text.splitlines():
+                if not line.strip() or line.lstrip().startswith("#"):
+                    lines.append([line])
+                    continue
+                bullet = _BULLET_RE.match(line)
+                prefix = bullet.group(1) if bullet else ""
+                sentences = []
+                for sentence in split_sentences(line[len(prefix):]):
+                    total += 1
+                    shingle_set = shingles(sentence, self.shingle_size)
+                    if len(_WORD_RE.findall(fold(sentence))) < self.min_words or not shingle_set:
+                        sentences.append(sentence)
+                        continue
+
+                    sig = self.signature(shingle_set)
+                    keys = [(band, sig[band * self.rows:(band + 1) * self.rows].tobytes()) for band in range(self.bands)]
+                    duplicate_of = None
+                    for key in keys:
+                        for candidate in buckets.get(key, ()):
+                            if kept[candidate][1] != doc_index and np.mean(kept[candidate][0] == sig) >= self.threshold:
+                                duplicate_of = candidate
+                                break
+                        if duplicate_of is not None:
+                            break
+
+                    if duplicate_of is not None:
+                        removed += 1
+                        sources = credits.setdefault(duplicate_of, [])
+                        if label not in sources:
+                            sources.append(label)
+                        continue
+
+                    kept_id = len(kept)
+                    kept.append((sig, doc_index))
+                    for key in keys:
+                        buckets.setdefault(key, []).append(kept_id)
+                    sentences.append((kept_id, sentence))
+                if sentences:
+                    lines.append([prefix] + sentences)
+            outputs.append(lines)
+
+        texts = []
+        for lines in outputs:
+            rendered = []
+            for parts in lines:
+                if len(parts) == 1 and isinstance(parts[0], str):
+                    rendered.append(parts[0])
+                    continue
+                prefix, sentences = parts[0], parts[1:]
+                words = []
+                for item in sentences:
+                    if isinstance(item, tuple):
+                        kept_id, sentence = item
+                        if kept_id in credits:
+                            sentence = f"{sentence} (également : {', '.join(credits[kept_id])})"
+                        words.append(sentence)
+                    else:
+                        words.append(item)
+                rendered.append(prefix + " ".join(words))
+            texts.append("\n".join(rendered))
+        return DedupResult(texts=texts, total=total, removed=removed)
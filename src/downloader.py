@@ -1,42 +1,107 @@
 import os
+import glob
 import datetime
+import shutil
+import tempfile
+import threading
 import time
+import concurrent.futures
+from contextlib import contextmanager
 from pytubefix import YouTube
 from pytubefix.cli import on_progress
 from pytubefix.contrib.search import Search, Filter
 from pytubefix.exceptions import RegexMatchError
+from pytubefix.captions import Caption
 import subprocess
-from pydub import AudioSegment
 from utils import slugify
+from models import VideoMeta
+from io_pool import get_io_pool
+from metadata_store import MetadataStore, get_metadata_store
+from captions import CaptionChoice, CaptionSelector
+from audio import IN_MEMORY_AUDIO, SEGMENT_SECONDS, iter_decoded_segments
+from ranged_download import DOWNLOAD_BACKOFF, BackgroundDownload, DownloadCancelled, RangedDownloader
+
+# Audio files downloaded at the same time (they share the global bandwidth cap)
+DOWNLOAD_CONCURRENCY = int(os.getenv("DOWNLOAD_CONCURRENCY", "3"))
+DEBUG = os.getenv("DEBUG", "False").lower() in ("1", "true", "yes")
 
 class YouTubeAudioProcessor:
-    def __init__(self, output_dir: str, num_segments: int = 10, source: int = 3):
+    def __init__(self, output_dir: str, num_segments: int = 10, source: int = 3, metadata_store: MetadataStore = None,
+                 caption_selector: CaptionSelector = None):
         self.output_dir = output_dir
         self.num_segments = num_segments
         self.source = source
+        self.metadata_store = metadata_store or get_metadata_store()
+        self.caption_selector = caption_selector or CaptionSelector()
+        self.downloader = RangedDownloader(range_in_query=True)
+        self.download_stats = {}
+        self._download_executor = concurrent.futures.ThreadPoolExecutor(max_workers=DOWNLOAD_CONCURRENCY, thread_name_prefix="download")
+        self._prefetched = {}
+        self._prefetch_lock = threading.Lock()
         os.makedirs(output_dir, exist_ok=True)
 
-    def download_audio(self, url: str) -> tuple[str, str, str, str]:
+    def download_audio(self, url: str, cancel: threading.Event = None) -> tuple[str, str, str, str]:
+        with self._prefetch_lock:
+            prefetched = self._prefetched.pop(url, None)
+        if prefetched is not None:
+            try:
+                result = prefetched.result()
+                if result:
+                    return result
+            except Exception as e:
+                print(f"DEBUG: prefetch of {url} failed, downloading again: {e}")
+        return self._download_audio(url, cancel)
+
+    def _download_audio(self, url: str, cancel: threading.Event = None) -> tuple[str, str, str, str]:
         max_retries = 3
         for attempt in range(max_retries):
+            if cancel is not None and cancel.is_set():
+                raise DownloadCancelled(url)
             try:
-                yt = YouTube(url, on_progress_callback=on_progress)
+                # A new YouTube object per attempt also refreshes an expired stream URL;
+                # the ranges already on disk are kept and the download resumes
+                yt = YouTube(url)
                 ys = yt.streams.get_audio_only()
-                safe_title = slugify(yt.title)
-                filename = f"{safe_title}.m4a"
-                audio_file = ys.download(output_path=self.output_dir, filename=filename)
+                # The id keeps two videos with the same title (downloaded together) apart
+                safe_title = f"{slugify(yt.title)}-{yt.video_id}"
+                audio_file = os.path.join(self.output_dir, f"{safe_title}.m4a")
+                stats = self.downloader.download(ys.url, audio_file, size=ys.filesize, cancel=cancel)
+                self.download_stats[url] = stats
+                print(f"DEBUG: audio {safe_title}: {stats}")
                 return audio_file, yt.title, yt.author, yt.publish_date
+            except DownloadCancelled:
+                raise
             except Exception as e:
                 print(f"Details of retry {attempt+1}/{max_retries} : {e}")
                 if attempt == max_retries - 1:
                     raise e
-                time.sleep(2)
+                time.sleep(DOWNLOAD_BACKOFF * 2 ** attempt)
         return "", "", "", ""
 
+    def download_audio_async(self, url: str) -> BackgroundDownload:
+        """
+        Starts the audio download in the background (or takes over the prefetch of this url).
+        The handle can cancel it, e.g. once captions turn out to be usable.
+        """
+        with self._prefetch_lock:
+            prefetched = self._prefetched.pop(url, None)
+        return prefetched or BackgroundDownload(self._download_executor, self._download_audio, url)
+
+    def prefetch_audio(self, urls: list[str]):
+        """
+        Starts, in the background, the audio downloads of a basket, so it downloads
+        concurrently while earlier videos are transcribed. download_audio_async() takes
+        each one over: the caller cancels it when the video has usable captions.
+        """
+        with self._prefetch_lock:
+            for url in urls:
+                if url not in self._prefetched:
+                    self._prefetched[url] = BackgroundDownload(self._download_executor, self._download_audio, url)
+
     def get_video_info(self, url: str):
         try:
             yt = YouTube(url)
-            return yt
+            return VideoMeta.from_youtube(yt)
         except RegexMatchError:
              print(f"Erreur : URL YouTube invalide ou vidéo non trouvée ('{url}')")
              return None
@@ -77,59 +142,39 @@ class YouTubeAudioProcessor:
             
         return Search(subject, filters=filters)
 
-    def filter_videos(self, videos, duration_mode, days_limit=None):
+    def filter_videos(self, videos, duration_mode, days_limit=None) -> list[VideoMeta]:
+        """
+        Fetches metadata for pytubefix videos (in parallel) and returns the matching ones
+        as VideoMeta records, so callers never touch the pytubefix objects again.
+        """
         # We always filter out shorts (less than 120s typically, or strictly shorts)
         filtered = []
         now = datetime.datetime.now(datetime.timezone.utc)
         
-        # Helper function for parallel processing
-        def get_meta(v):
-            try:
-                # Pre-fetch all attributes to ensure they are cached in the object
-                # and to validate they exist.
-                return {
-                    "video": v,
-                    "title": v.title,
-                    "length": v.length,
-                    "publish_date": v.publish_date,
-                    "views": v.views,
-                    "author": v.author,
-                    "thumbnail_url": v.thumbnail_url,
-                    "description": v.description,
-                    "success": True
-                }
-            except Exception as e:
-                # Optional: print error for debugging
-                # print(f"Meta fetch error for {v}: {e}")
-                return {"success": False}
+        # 1. Métadonnées : lecture du store local, puis extraction en parallèle des seules lignes absentes ou périmées
+        videos = list(videos)
+        cached = self.metadata_store.get_fresh(getattr(v, "video_id", None) for v in videos)
+        missing = [v for v in videos if getattr(v, "video_id", None) not in cached]
+
+        pool = get_io_pool()
+        fetched = dict(zip(map(id, missing), pool.map(VideoMeta.from_youtube, missing)))
+        fresh = [meta for meta in fetched.values() if meta is not None]
+        self.metadata_store.upsert_many(fresh)
+        if DEBUG:
+            if len(fresh) < len(missing):
+                print(f"DEBUG: metadata fetch: {len(missing) - len(fresh)}/{len(missing)} failed, stats={pool.stats()}")
+            print(f"DEBUG: metadata store: {len(videos) - len(missing)} hits, {len(missing)} fetched")
 
-        # 1. Extraction des métadonnées en parallèle
-        import concurrent.futures
         videos_metadata = []
-        
-        # Use ThreadPoolExecutor to fetch metadata in parallel
-        # max_workers=10 or 20 is reasonable for IO bound
-        with concurrent.futures.ThreadPoolExecutor(max_workers=20) as executor:
-            future_to_video = {executor.submit(get_meta, v): v for v in videos}
-            for future in concurrent.futures.as_completed(future_to_video):
-                res = future.result()
-                if res["success"]:
-                    videos_metadata.append(res)
-        
-        # 2. Filtrage via le dictionnaire
-        for item in videos_metadata:
-            v = item["video"]
-            length = item["length"]
-            pub_date = item["publish_date"]
-            
-            # Explicitly attach metadata for UI persistence
-            v.title_attr = item["title"]
-            v.author_attr = item["author"]
-            v.thumb_attr = item["thumbnail_url"]
-            v.views_attr = item["views"]
-            v.length_attr = item["length"]
-            v.publish_date_attr = item["publish_date"]
-            v.description_attr = item["description"]
+        for v in videos:
+            meta = fetched.get(id(v)) or cached.get(getattr(v, "video_id", None))
+            if meta is not None:
+                videos_metadata.append(meta)
+
+        # 2. Filtrage sur les métadonnées
+        for v in videos_metadata:
+            length = v.length
+            pub_date = v.publish_date
 
             # Global Safety Check (> 120s)
             if length < 120:
@@ -162,56 +207,83 @@ class YouTubeAudioProcessor:
         return [v for v in search_obj.results if v not in search_obj.shorts]
 
     def check_subtitles(self, url: str):
-        yt = YouTube(url, on_progress_callback=on_progress)
-        cles_fr = [cle for cle in yt.captions.keys() if "fr" in cle.code or "en" in cle.code]
-        return cles_fr[0].code if cles_fr else None
+        """Best caption track of the video (CaptionChoice), without downloading it, or None."""
+        yt = YouTube(url)
+        ranked = self.caption_selector.rank(caption.code for caption in yt.captions.keys())
+        return ranked[0] if ranked else None
 
-    def get_subtitles(self, url: str, code: str):
+    @staticmethod
+    def _caption_track(yt, choice: CaptionChoice):
+        caption = yt.captions[choice.code]
+        if not choice.target:
+            return caption
+        # YouTube translates any track server-side with the tlang parameter
+        return Caption({
+            "baseUrl": f"{caption.url}&tlang={choice.target}",
+            "name": {"simpleText": f"{caption.name} > {choice.target}"},
+            "vssId": f".{choice.target}",
+        })
+
+    def get_subtitles(self, url: str, code):
         yt = YouTube(url, on_progress_callback=on_progress)
-        caption = yt.captions[code]
+        choice = code if isinstance(code, CaptionChoice) else CaptionChoice.from_code(code)
+        caption = self._caption_track(yt, choice)
         title = yt.title if yt.title else "inconnue"
         return caption.generate_srt_captions(), title, yt.author, yt.publish_date
 
-    def extract_audio_from_mp4(self, input_video: str) -> list[str]:
-        audio_path = os.path.join(self.output_dir, "full_audio.mp3")
-        
+    def fetch_subtitles(self, url: str):
+        """
+        Downloads the best usable caption track, falling back through the ranked
+        tracks (manual, auto, translated). Returns (srt, title, author, date, method)
+        or None when the video has to go through audio + Whisper.
+        """
+        yt = YouTube(url)
+        codes = [caption.code for caption in yt.captions.keys()]
+        selected = self.caption_selector.select(codes, lambda choice: self._caption_track(yt, choice).generate_srt_captions())
+        if selected is None:
+            print(f"DEBUG: no usable captions for {url} (tracks: {codes})")
+            return None
+        srt, choice = selected
+        print(f"DEBUG: captions for {url}: {choice.method}")
+        title = yt.title if yt.title else "inconnue"
+        return srt, title, yt.author, yt.publish_date, choice.method
+
+    @contextmanager
+    def audio_segments(self, input_video: str):
+        """
+        Segments of a local file (see iter_audio_segments). The mp3 segments go to a folder
+        of their own, removed on exit: concurrent jobs (API workers, app + CLI) never share them.
+        """
+        segment_dir = tempfile.mkdtemp(prefix="segments_", dir=self.output_dir)
+        try:
+            yield self.iter_audio_segments(input_video, segment_dir)
+        finally:
+            shutil.rmtree(segment_dir, ignore_errors=True)
+
+    def iter_audio_segments(self, input_video: str, segment_dir: str):
+        """
+        Audio segments of a local file, ready for the transcriber: float32 arrays decoded
+        one at a time in memory mode, otherwise mp3 segment files cut into `segment_dir`.
+        """
+        if not IN_MEMORY_AUDIO:
+            yield from self.extract_audio_from_mp4(input_video, segment_dir)
+            return
+        yield from iter_decoded_segments(input_video)
+
+    def extract_audio_from_mp4(self, input_video: str, segment_dir: str) -> list[str]:
+        # The ffmpeg segment muxer cuts while encoding: no full-length mp3, no pydub decode in memory
+        pattern = os.path.join(segment_dir, "segment_%03d.mp3")
         command = [
             "ffmpeg",
-            "-i", input_video,
+            "-i", str(input_video),
             "-vn",
             "-acodec", "libmp3lame",
             "-ab", "80k",
+            "-f", "segment",
+            "-segment_time", str(SEGMENT_SECONDS),
+            "-reset_timestamps", "1",
             "-y",
-            audio_path
+            pattern
         ]
         subprocess.run(command, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
-        segments = self.split_audio_equal(audio_path)
-        os.remove(audio_path)
-        return segments
-
-    def split_audio_equal(self, input_file: str) -> list[str]:
-        audio = AudioSegment.from_file(input_file)
-        duration = len(audio)
-        # 10 minutes in milliseconds
-        segment_length = 10 * 60 * 1000
-        
-        # If video is shorter than segment_length, keep it as one segment
-        if duration <= segment_length:
-            num_segments = 1
-        else:
-            num_segments = (duration // segment_length) + 1
-
-        segments = []
-        for i in range(num_segments):
-            start = i * segment_length
-            end = min((i + 1) * segment_length, duration)
-            
-            # Avoid creating empty segment if duration is exact multiple
-            if start >= duration:
-                break
-                
-            segment = audio[start:end]
-            segment_path = os.path.join(self.output_dir, f"segment_{i}.mp3")
-            segment.export(segment_path, format="mp3")
-            segments.append(segment_path)
-        return segments
+        return sorted(glob.glob(os.path.join(segment_dir, "segment_[0-9][0-9][0-9].mp3")))
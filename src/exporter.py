@@ -1,12 +1,18 @@
 import os
-import io
+import json
+import shutil
+import hashlib
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
 from datetime import datetime
 
-import markdown
-from xhtml2pdf import pisa
-from markdownify import markdownify as md
 from utils import slugify, clean_markdown_text
+from conversions import is_html, markdown_to_html, html_to_markdown
 from abc import ABC, abstractmethod
+from pdf_worker import PDFJob, PDFRenderer, PRINT_SCRIPT
+
+EXPORT_CACHE_SIZE = int(os.getenv("EXPORT_CACHE_SIZE", "32"))
 
 # --- Helper Functions (Shared Logic) ---
 
@@ -17,28 +23,17 @@ def load_css():
             return f.read()
     return ""
 
-def is_html(text: str) -> bool:
-    """Detects if text is likely HTML."""
-    text = text.strip()
-    return (
-        text.startswith("<") or 
-        "<p>" in text or 
-        "<div>" in text or 
-        "<h1>" in text or 
-        "<span" in text
-    )
-
 def to_html(content: str) -> str:
     """Converts content to HTML."""
     if is_html(content):
         return content
     else:
-        return markdown.markdown(clean_markdown_text(content), extensions=['extra', 'codehilite'])
+        return markdown_to_html(content, extensions=("extra", "codehilite"))
 
 def to_markdown(content: str) -> str:
     """Converts content to Markdown."""
     if is_html(content):
-        return md(content, heading_style="ATX")
+        return html_to_markdown(content)
     else:
         return clean_markdown_text(content)
 
@@ -136,56 +131,80 @@ def wrap_html(html_body: str, title: str, css_content: str, source_info=None, fo
     </html>
     """
 
+# --- Intermediate Document ---
+
+@dataclass(frozen=True)
+class RenderedDocument:
+    """A summary parsed once: every export format is produced from these fields."""
+    key: str
+    title: str
+    markdown: str
+    html_body: str
+    source_info: tuple
+
+
+def document_key(summary: str, title: str, source_info=None) -> str:
+    """Content hash of everything that changes an exported file."""
+    payload = json.dumps([summary, title, source_info or []], default=str, ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def render_document(summary: str, title: str, source_info=None) -> RenderedDocument:
+    return RenderedDocument(
+        key=document_key(summary, title, source_info),
+        title=title,
+        markdown=to_markdown(summary),
+        html_body=to_html(summary),
+        source_info=tuple(source_info or []),
+    )
+
 # --- Strategies ---
 
 class ExportStrategy(ABC):
     @abstractmethod
-    def export(self, summary: str, output_file: str, title: str, source_info=None):
+    def render(self, doc: RenderedDocument) -> bytes:
         pass
 
-class MarkdownStrategy(ExportStrategy):
     def export(self, summary: str, output_file: str, title: str, source_info=None):
-        content = to_markdown(summary)
-        content += format_sources_md(source_info)
-        with open(output_file, "w", encoding="utf-8") as f:
-            f.write(content)
+        with open(output_file, "wb") as f:
+            f.write(self.render(render_document(summary, title, source_info)))
+
+class MarkdownStrategy(ExportStrategy):
+    def render(self, doc: RenderedDocument) -> bytes:
+        return (doc.markdown + format_sources_md(doc.source_info)).encode("utf-8")
 
 class TextStrategy(ExportStrategy):
-    def export(self, summary: str, output_file: str, title: str, source_info=None):
-        content = to_markdown(summary) # Reusing markdown logic as base
-        content += format_sources_md(source_info)
-        with open(output_file, "w", encoding="utf-8") as f:
-            f.write(content)
+    def render(self, doc: RenderedDocument) -> bytes:
+        # Reusing markdown logic as base
+        return (doc.markdown + format_sources_md(doc.source_info)).encode("utf-8")
 
 class HTMLStrategy(ExportStrategy):
     def __init__(self, css_content):
         self.css_content = css_content
 
-    def export(self, summary: str, output_file: str, title: str, source_info=None):
-        html_body = to_html(summary)
-        full_html = wrap_html(html_body, title, self.css_content, source_info, for_pdf=False)
-        with open(output_file, "w", encoding="utf-8") as f:
-            f.write(full_html)
+    def render(self, doc: RenderedDocument) -> bytes:
+        return wrap_html(doc.html_body, doc.title, self.css_content, doc.source_info, for_pdf=False).encode("utf-8")
 
 class PDFStrategy(ExportStrategy):
-    def __init__(self, css_content):
+    def __init__(self, css_content, renderer: PDFRenderer = None):
         self.css_content = css_content
+        self.renderer = renderer or PDFRenderer()
 
-    def export(self, summary: str, output_file: str, title: str, source_info=None):
-        html_body = to_html(summary)
-        full_html = wrap_html(html_body, title, self.css_content, source_info, for_pdf=True)
-        
-        pdf_file = io.BytesIO()
-        pisa.CreatePDF(full_html, dest=pdf_file)
-        
-        with open(output_file, "wb") as f:
-            f.write(pdf_file.getvalue())
+    def submit(self, doc: RenderedDocument) -> PDFJob:
+        """Starts the render in the PDF worker; large documents fall back to printable HTML."""
+        full_html = wrap_html(doc.html_body, doc.title, self.css_content, doc.source_info, for_pdf=True)
+        printable = wrap_html(doc.html_body, doc.title, self.css_content, doc.source_info, for_pdf=False) + PRINT_SCRIPT
+        return self.renderer.submit(full_html, fallback_html=printable)
+
+    def render(self, doc: RenderedDocument) -> bytes:
+        return self.submit(doc).read_pdf()
 
 # --- Context Class ---
 
 class Exporter:
-    def __init__(self, output_dir: str):
+    def __init__(self, output_dir: str, library=None, cache_size: int = EXPORT_CACHE_SIZE, pdf_renderer: PDFRenderer = None):
         self.output_dir = output_dir
+        self.library = library
         os.makedirs(self.output_dir, exist_ok=True)
         self.css_content = load_css()
         
@@ -194,26 +213,132 @@ class Exporter:
             "md": MarkdownStrategy(),
             "txt": TextStrategy(),
             "html": HTMLStrategy(self.css_content),
-            "pdf": PDFStrategy(self.css_content)
+            "pdf": PDFStrategy(self.css_content, pdf_renderer)
         }
 
-    def save_summary(self, summary: str, title: str, fmt: str, source_info=None):
+        # Rendered documents and artifacts, keyed by content hash (shared by every session)
+        self.cache_size = cache_size
+        self._documents = OrderedDict()
+        self._artifacts = OrderedDict()
+        self._cache_lock = threading.Lock()
+
+    def _cache_get(self, cache: OrderedDict, key):
+        with self._cache_lock:
+            value = cache.get(key)
+            if value is not None:
+                cache.move_to_end(key)
+            return value
+
+    def _cache_put(self, cache: OrderedDict, key, value):
+        with self._cache_lock:
+            cache[key] = value
+            cache.move_to_end(key)
+            while len(cache) > self.cache_size:
+                # An evicted PDF job keeps its file while a session still holds it (deleted on garbage collection)
+                cache.popitem(last=False)
+
+    def render(self, summary: str, title: str, source_info=None) -> RenderedDocument:
+        """Parses the summary once (Markdown + HTML body) and reuses it while the content is unchanged."""
+        key = document_key(summary, title, source_info)
+        doc = self._cache_get(self._documents, key)
+        if doc is None:
+            doc = render_document(summary, title, source_info)
+            self._cache_put(self._documents, key, doc)
+        return doc
+
+    def render_artifact(self, fmt: str, summary: str = None, title: str = None, source_info=None, doc: RenderedDocument = None) -> bytes:
+        """
+        Bytes of the export in `fmt`; an unchanged summary is never rendered twice.
+        Raises PDFTooLargeError for a PDF above PDF_MAX_HTML_CHARS (use submit_pdf for the printable HTML).
+        """
         if fmt not in self.strategies:
             raise ValueError(f"Format non supporté : {fmt}. Utilisez 'md', 'txt', 'html' ou 'pdf'.")
-            
+        doc = doc or self.render(summary, title, source_info)
+        if fmt == "pdf":
+            return self.submit_pdf(doc=doc).read_pdf()
+        artifact = self._cache_get(self._artifacts, (doc.key, fmt))
+        if artifact is None:
+            artifact = self.strategies[fmt].render(doc)
+            self._cache_put(self._artifacts, (doc.key, fmt), artifact)
+        else:
+            print(f"DEBUG: export cache hit ({fmt})")
+        return artifact
+
+    def submit_pdf(self, summary: str = None, title: str = None, source_info=None, doc: RenderedDocument = None) -> PDFJob:
+        """
+        Returns the background PDF job of a document, started only once per content.
+        The rendered file lives on disk: callers stream it instead of holding copies in memory.
+        """
+        doc = doc or self.render(summary, title, source_info)
+        job = self._cache_get(self._artifacts, (doc.key, "pdf"))
+        if job is None or (job.done() and job.status != "done"):
+            job = self.strategies["pdf"].submit(doc)
+            self._cache_put(self._artifacts, (doc.key, "pdf"), job)
+        else:
+            print("DEBUG: export cache hit (pdf)")
+        return job
+
+    def _output_path(self, title: str, fmt: str) -> str:
         slug = slugify(title)
         date_str = datetime.now().strftime("%Y-%m-%d")
-        filename = f"{slug}_{date_str}.{fmt}"
-        output_file = os.path.join(self.output_dir, filename)
+        return os.path.join(self.output_dir, f"{slug}_{date_str}.{fmt}")
 
-        self.strategies[fmt].export(summary, output_file, title, source_info)
+    def save_summary(self, summary: str, title: str, fmt: str, source_info=None):
+        """
+        Writes the summary and returns the file path. A PDF above PDF_MAX_HTML_CHARS is saved
+        as printable HTML: the returned path then ends with .print.html, not .pdf.
+        """
+        if fmt not in self.strategies:
+            raise ValueError(f"Format non supporté : {fmt}. Utilisez 'md', 'txt', 'html' ou 'pdf'.")
+
+        if fmt == "pdf":
+            job = self.submit_pdf(summary, title, source_info)
+            output_file = self._output_path(title, job.extension)
+            shutil.copyfile(job.result(), output_file)
+            if job.kind != "pdf":
+                print(f"Warning: document trop volumineux pour un PDF, version imprimable enregistrée : {output_file}")
+        else:
+            output_file = self._output_path(title, fmt)
+            with open(output_file, "wb") as f:
+                f.write(self.render_artifact(fmt, summary, title, source_info))
+        self.index_document(summary, title, output_file, source_info)
 
         return output_file
 
+    def export_all(self, summary: str, title: str, formats=("md", "txt", "html", "pdf"), source_info=None) -> dict:
+        """Writes several formats from a single parse of the summary. Returns {fmt: path}."""
+        doc = self.render(summary, title, source_info)
+        paths = {}
+        pdf_job = self.submit_pdf(doc=doc) if "pdf" in formats else None  # renders while the text formats are written
+        for fmt in formats:
+            if fmt == "pdf":
+                continue
+            paths[fmt] = self._output_path(title, fmt)
+            with open(paths[fmt], "wb") as f:
+                f.write(self.render_artifact(fmt, doc=doc))
+        if pdf_job is not None:
+            paths["pdf"] = self._output_path(title, pdf_job.extension)
+            shutil.copyfile(pdf_job.result(), paths["pdf"])
+        if paths:
+            self.index_document(summary, title, next(iter(paths.values())), source_info)
+        return paths
+
+    def index_document(self, summary: str, title: str, output_file: str, source_info=None):
+        """Adds a saved document to the library (a failure never blocks the export)."""
+        if self.library is None:
+            return None
+        sources = source_info or []
+        kind = "synthesis" if len(sources) > 1 else "summary"
+        first = sources[0] if sources else {}
+        try:
+            return self.library.add(
+                kind, self.render(summary, title, source_info).markdown, title=title, url=first.get("url", "") if len(sources) == 1 else "",
+                published=first.get("date") if len(sources) == 1 else None, path=output_file, sources=sources,
+            )
+        except Exception as e:
+            print(f"DEBUG: library indexing failed for {output_file}: {e}")
+            return None
+
     def generate_pdf_bytes(self, summary: str, title: str, source_info=None) -> bytes:
-        html_body = to_html(summary)
-        full_html = wrap_html(html_body, title, self.css_content, source_info, for_pdf=True)
-        
-        pdf_file = io.BytesIO()
-        pisa.CreatePDF(full_html, dest=pdf_file)
-        return pdf_file.getvalue()
+        """PDF bytes; raises PDFTooLargeError when only the printable HTML could be produced."""
+        return self.submit_pdf(summary, title, source_info).read_pdf()
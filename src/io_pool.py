@@ -0,0 +1,171 @@
+import os
+import threading
+import time
+import concurrent.futures
+from collections import Counter
+from typing import Callable, Iterable, List, Optional
+
+IO_MAX_WORKERS = int(os.getenv("IO_MAX_WORKERS", "32"))
+IO_INITIAL_CONCURRENCY = int(os.getenv("IO_INITIAL_CONCURRENCY", "8"))
+IO_TIMEOUT = float(os.getenv("IO_TIMEOUT", "30"))
+IO_RETRIES = int(os.getenv("IO_RETRIES", "2"))
+
+
+def is_throttled(error: Exception) -> bool:
+    """True for rate-limit answers (HTTP 429 / "Too Many Requests")."""
+    if getattr(error, "code", None) == 429 or getattr(error, "status", None) == 429:
+        return True
+    message = str(error)
+    return "429" in message or "Too Many Requests" in message
+
+
+class _Slot:
+    """Capacity held by one call attempt until it returns or runs past its deadline."""
+    __slots__ = ("deadline", "expired")
+
+    def __init__(self, deadline: float):
+        self.deadline = deadline
+        self.expired = False
+
+
+class AdaptiveIOPool:
+    """
+    Long-lived thread pool for network calls with AIMD concurrency control.
+
+    The number of calls in flight grows by one per "window" of successes
+    (additive increase) and is halved on each throttled answer (multiplicative
+    decrease). Failed calls are retried with exponential backoff and every
+    outcome is counted in `stats`. A call running past its timeout gives its
+    slot back: a hung socket keeps its thread, not a share of the limit.
+    """
+
+    def __init__(self, max_workers: int = IO_MAX_WORKERS, initial: int = IO_INITIAL_CONCURRENCY, min_limit: int = 1,
+                 timeout: float = IO_TIMEOUT, retries: int = IO_RETRIES, backoff: float = 0.5, tick: float = 0.05):
+        self.max_workers = max_workers
+        self.min_limit = min_limit
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.tick = tick
+        self._limit = float(min(initial, max_workers))
+        self._slots = set()
+        self._stuck = set()
+        self._cond = threading.Condition()
+        self._stats = Counter()
+        self._executor = self._new_executor()
+
+    def _new_executor(self):
+        return concurrent.futures.ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="io")
+
+    @property
+    def limit(self) -> int:
+        return max(self.min_limit, int(self._limit))
+
+    def _expire(self):
+        """Frees the slots of calls past their deadline (caller holds the lock)."""
+        now = time.monotonic()
+        expired = [slot for slot in self._slots if slot.deadline < now]
+        for slot in expired:
+            slot.expired = True
+            self._slots.discard(slot)
+        if expired:
+            self._stuck.update(expired)
+            self._stats["timeout"] += len(expired)
+            self._cond.notify_all()
+
+    def _acquire(self, timeout: float) -> _Slot:
+        with self._cond:
+            while True:
+                self._expire()
+                if len(self._slots) < self.limit:
+                    break
+                self._cond.wait(self.tick)
+            slot = _Slot(time.monotonic() + timeout)
+            self._slots.add(slot)
+            return slot
+
+    def _release(self, slot: _Slot):
+        with self._cond:
+            self._slots.discard(slot)
+            self._stuck.discard(slot)
+            self._cond.notify_all()
+
+    def _record(self, outcome: str, n: int = 1):
+        with self._cond:
+            self._stats[outcome] += n
+            if outcome == "ok":
+                self._limit = min(self.max_workers, self._limit + 1.0 / self._limit)
+            elif outcome == "throttled":
+                self._limit = max(self.min_limit, self._limit / 2)
+            self._cond.notify_all()
+
+    def _call(self, fn: Callable, item, timeout: float, current: list):
+        for attempt in range(self.retries + 1):
+            slot = self._acquire(timeout)
+            current[:] = [slot]
+            try:
+                result = fn(item)
+            except Exception as e:
+                error = e
+            else:
+                if not slot.expired:
+                    self._record("ok")
+                return result
+            finally:
+                self._release(slot)
+
+            if slot.expired:
+                raise error
+            self._record("throttled" if is_throttled(error) else "errors")
+            if attempt < self.retries:
+                self._record("retried")
+                time.sleep(self.backoff * (2 ** attempt))
+        self._record("failed")
+        raise error
+
+    def map(self, fn: Callable, items: Iterable, timeout: Optional[float] = None) -> List:
+        """
+        Runs fn over items and returns the results in order.
+        Items that fail after their retries, or whose call runs longer than
+        `timeout` seconds, give None.
+        """
+        timeout = timeout or self.timeout
+        with self._cond:
+            # Half the threads hang on dead sockets: new calls get fresh threads
+            if len(self._stuck) >= max(1, self.max_workers // 2):
+                print(f"Warning: {len(self._stuck)} appel(s) réseau bloqué(s), nouveau pool de threads")
+                self._executor.shutdown(wait=False)
+                self._executor = self._new_executor()
+                self._stuck.clear()
+            executor = self._executor
+        items = list(items)
+        current = [[] for _ in items]
+        futures = [executor.submit(self._call, fn, item, timeout, slot) for item, slot in zip(items, current)]
+
+        pending = set(futures)
+        while pending:
+            _, pending = concurrent.futures.wait(pending, timeout=self.tick)
+            with self._cond:
+                self._expire()
+            pending = {f for f, slot in zip(futures, current) if f in pending and not (slot and slot[0].expired)}
+
+        return [f.result() if f.done() and f.exception() is None else None for f in futures]
+
+    def stats(self) -> dict:
+        with self._cond:
+            snapshot = dict(self._stats)
+            snapshot["concurrency"] = self.limit
+            return snapshot
+
+
+_shared_pool = None
+_shared_lock = threading.Lock()
+
+
+def get_io_pool() -> AdaptiveIOPool:
+    """Process-wide pool shared by every metadata fetch."""
+    global _shared_pool
+    with _shared_lock:
+        if _shared_pool is None:
+            _shared_pool = AdaptiveIOPool()
+        return _shared_pool
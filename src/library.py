@@ -0,0 +1,158 @@
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from typing import Iterable, List, Optional, Union
+
+LIBRARY_DB = os.getenv("LIBRARY_DB", "./data/library.db")
+KINDS = ("transcript", "summary", "synthesis")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    id INTEGER PRIMARY KEY,
+    kind TEXT NOT NULL,
+    title TEXT,
+    author TEXT,
+    url TEXT,
+    published TEXT,
+    method TEXT,
+    path TEXT,
+    sources TEXT,
+    content TEXT NOT NULL,
+    content_hash TEXT NOT NULL UNIQUE,
+    created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_documents_kind ON documents(kind);
+CREATE INDEX IF NOT EXISTS idx_documents_url ON documents(url);
+CREATE VIRTUAL TABLE IF NOT EXISTS documents_fts USING fts5(
+    title, author, content,
+    content='documents', content_rowid='id',
+    tokenize='unicode61 remove_diacritics 2'
+);
+"""
+
+_TERM_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def to_fts_query(text: str) -> str:
+    """Turns free user input into a safe FTS5 query (every word required, prefix match)."""
+    return " ".join(f'"{term}"*' for term in _TERM_RE.findall(text or ""))
+
+
+@dataclass(slots=True)
+class LibraryHit:
+    id: int
+    kind: str
+    title: str
+    author: str
+    url: str
+    published: str
+    path: str
+    created_at: float
+    snippet: str
+    score: float
+
+
+class Library:
+    """
+    Full-text index (SQLite FTS5) of transcripts, per-video summaries and syntheses.
+    Documents are added as they are produced or saved; identical documents are only stored once.
+    """
+
+    def __init__(self, path: str = LIBRARY_DB):
+        self.path = path
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        if path != ":memory:":
+            self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(_SCHEMA)
+
+    def add(self, kind: str, content: Union[str, Iterable[str]], title: str = "", author: str = "", url: str = "", published=None,
+            method: str = "", path: str = "", sources=None) -> Optional[int]:
+        """
+        Indexes a document and returns its id (None when empty or already indexed).
+        `content` may be the pieces of a streamed transcript; they are joined with blank lines.
+        """
+        if kind not in KINDS:
+            raise ValueError(f"Type de document inconnu : {kind}. Utilisez {', '.join(KINDS)}.")
+        if not isinstance(content, str):
+            content = "\n\n".join(content)
+        if not content or not content.strip():
+            return None
+        content_hash = hashlib.sha1(f"{kind}\0{url}\0{content}".encode("utf-8")).hexdigest()
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                "INSERT OR IGNORE INTO documents (kind, title, author, url, published, method, path, sources, content, content_hash, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (kind, title or "", author or "", url or "", str(published) if published else "", method or "", path or "",
+                 json.dumps(sources, default=str) if sources else "", content, content_hash, time.time()),
+            )
+            if cursor.rowcount == 0:
+                return None
+            doc_id = cursor.lastrowid
+            self._conn.execute(
+                "INSERT INTO documents_fts (rowid, title, author, content) VALUES (?, ?, ?, ?)",
+                (doc_id, title or "", author or "", content),
+            )
+        return doc_id
+
+    def search(self, query: str, kind: Optional[str] = None, limit: int = 20) -> List[LibraryHit]:
+        """Ranked (BM25, title weighted) search; returns the best hits with a highlighted snippet."""
+        fts_query = to_fts_query(query)
+        if not fts_query:
+            return []
+        sql = (
+            "SELECT d.id, d.kind, d.title, d.author, d.url, d.published, d.path, d.created_at, "
+            "snippet(documents_fts, 2, '**', '**', '…', 24) AS snippet, "
+            "bm25(documents_fts, 5.0, 2.0, 1.0) AS score "
+            "FROM documents_fts JOIN documents d ON d.id = documents_fts.rowid "
+            "WHERE documents_fts MATCH ?"
+        )
+        params = [fts_query]
+        if kind:
+            sql += " AND d.kind = ?"
+            params.append(kind)
+        sql += " ORDER BY score LIMIT ?"
+        params.append(limit)
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        return [LibraryHit(**dict(row)) for row in rows]
+
+    def get(self, doc_id: int) -> Optional[dict]:
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM documents WHERE id = ?", (doc_id,)).fetchone()
+        if row is None:
+            return None
+        doc = dict(row)
+        doc["sources"] = json.loads(doc["sources"]) if doc["sources"] else []
+        return doc
+
+    def count(self, kind: Optional[str] = None) -> int:
+        with self._lock:
+            if kind:
+                return self._conn.execute("SELECT COUNT(*) FROM documents WHERE kind = ?", (kind,)).fetchone()[0]
+            return self._conn.execute("SELECT COUNT(*) FROM documents").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+_shared_library = None
+_shared_lock = threading.Lock()
+
+
+def get_library() -> Library:
+    """Library shared by the app, the CLI and the workflow (LIBRARY_DB)."""
+    global _shared_library
+    with _shared_lock:
+        if _shared_library is None:
+            _shared_library = Library()
+        return _shared_library
@@ -0,0 +1,121 @@
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Dict, Iterable, Optional
+
+from models import VideoMeta
+
+METADATA_DB = os.getenv("METADATA_DB", "./data/metadata.db")
+METADATA_TTL = int(os.getenv("METADATA_TTL", "86400"))  # seconds before a row is fetched again
+
+_COLUMNS = ("video_id", "watch_url", "title", "author", "length", "views", "publish_date", "thumbnail_url", "description", "fetched_at")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS videos (
+    video_id TEXT PRIMARY KEY,
+    watch_url TEXT NOT NULL,
+    title TEXT,
+    author TEXT,
+    length INTEGER,
+    views INTEGER,
+    publish_date REAL,
+    thumbnail_url TEXT,
+    description TEXT,
+    fetched_at REAL NOT NULL
+);
+"""
+
+
+def _to_timestamp(date: Optional[datetime]) -> Optional[float]:
+    if not date:
+        return None
+    if date.tzinfo is None:
+        date = date.replace(tzinfo=timezone.utc)
+    return date.timestamp()
+
+
+class MetadataStore:
+    """
+    SQLite store of video metadata keyed by video ID.
+    Every fetch is recorded with its timestamp so later searches only refresh stale rows.
+    """
+
+    def __init__(self, path: str = METADATA_DB, ttl: int = METADATA_TTL):
+        self.path = path
+        self.ttl = ttl
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        if path != ":memory:":
+            self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(_SCHEMA)
+
+    def _row_to_meta(self, row) -> VideoMeta:
+        publish_date = row["publish_date"]
+        return VideoMeta(
+            watch_url=row["watch_url"],
+            title=row["title"] or "",
+            author=row["author"] or "",
+            length=row["length"] or 0,
+            views=row["views"] or 0,
+            publish_date=datetime.fromtimestamp(publish_date, timezone.utc) if publish_date is not None else None,
+            thumbnail_url=row["thumbnail_url"] or "",
+            description=row["description"] or "",
+        )
+
+    def upsert_many(self, videos: Iterable[VideoMeta], fetched_at: Optional[float] = None):
+        fetched_at = fetched_at if fetched_at is not None else time.time()
+        rows = [
+            (v.video_id, v.watch_url, v.title, v.author, v.length, v.views,
+             _to_timestamp(v.publish_date), v.thumbnail_url, v.description, fetched_at)
+            for v in videos
+        ]
+        if not rows:
+            return
+        placeholders = ", ".join("?" for _ in _COLUMNS)
+        with self._lock, self._conn:
+            self._conn.executemany(
+                f"INSERT OR REPLACE INTO videos ({', '.join(_COLUMNS)}) VALUES ({placeholders})", rows
+            )
+
+    def get_fresh(self, video_ids: Iterable[str], max_age: Optional[float] = None) -> Dict[str, VideoMeta]:
+        """Returns {video_id: VideoMeta} for the ids fetched less than `max_age` seconds ago."""
+        max_age = self.ttl if max_age is None else max_age
+        cutoff = time.time() - max_age
+        ids = list(dict.fromkeys(video_ids))
+        found = {}
+        with self._lock:
+            for start in range(0, len(ids), 500):
+                batch = ids[start:start + 500]
+                rows = self._conn.execute(
+                    f"SELECT * FROM videos WHERE fetched_at >= ? AND video_id IN ({', '.join('?' for _ in batch)})",
+                    [cutoff, *batch],
+                ).fetchall()
+                for row in rows:
+                    found[row["video_id"]] = self._row_to_meta(row)
+        return found
+
+    def count(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM videos").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+_shared_store = None
+_shared_lock = threading.Lock()
+
+
+def get_metadata_store() -> MetadataStore:
+    """Store shared by every processor of the process (METADATA_DB)."""
+    global _shared_store
+    with _shared_lock:
+        if _shared_store is None:
+            _shared_store = MetadataStore()
+        return _shared_store
@@ -0,0 +1,53 @@
+import re
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Optional
+
+_VIDEO_ID_RE = re.compile(r"(?:v=|youtu\.be/|shorts/|embed/)([\w-]{11})")
+
+
+@dataclass(slots=True)
+class VideoMeta:
+    """
+    Plain metadata record for a video.
+    Filled once from a pytubefix object, then used by the UI and the workflow
+    so reruns, sorts and the basket never trigger lazy network fetches.
+    """
+    watch_url: str
+    title: str = ""
+    author: str = ""
+    length: int = 0
+    views: int = 0
+    publish_date: Optional[datetime] = None
+    thumbnail_url: str = ""
+    description: str = ""
+    is_boosted: bool = False
+
+    @property
+    def video_id(self) -> str:
+        match = _VIDEO_ID_RE.search(self.watch_url)
+        return match.group(1) if match else self.watch_url
+
+    @classmethod
+    def from_youtube(cls, yt) -> "VideoMeta":
+        """Reads every attribute of a pytubefix YouTube object (network access happens here only)."""
+        return cls(
+            watch_url=yt.watch_url,
+            title=yt.title or "",
+            author=yt.author or "",
+            length=yt.length or 0,
+            views=yt.views or 0,
+            publish_date=yt.publish_date,
+            thumbnail_url=yt.thumbnail_url or "",
+            description=yt.description or "",
+        )
+
+
+@dataclass(slots=True)
+class LocalVideo(VideoMeta):
+    """A file uploaded from disk, handled like a video in the basket (watch_url is the file path)."""
+
+    def __post_init__(self):
+        self.author = self.author or "Fichier Local"
+        if self.publish_date is None:
+            self.publish_date = datetime.now(timezone.utc)
@@ -0,0 +1,231 @@
+import os
+import glob
+import signal
+import tempfile
+import threading
+import time
+import weakref
+import multiprocessing
+from collections import OrderedDict
+from typing import Callable, Optional
+
+PDF_WORKERS = int(os.getenv("PDF_WORKERS", "1"))
+PDF_TIMEOUT = float(os.getenv("PDF_TIMEOUT", "60"))  # seconds, base budget of a job
+PDF_CHARS_PER_SECOND = int(os.getenv("PDF_CHARS_PER_SECOND", "20000"))  # extra budget for long documents
+PDF_MAX_HTML_CHARS = int(os.getenv("PDF_MAX_HTML_CHARS", "600000"))  # above this, printable HTML instead of PDF
+PDF_TMP_DIR = os.getenv("PDF_TMP_DIR") or None
+PDF_TMP_TTL = int(os.getenv("PDF_TMP_TTL", "86400"))  # seconds before a leftover render file is swept
+
+PRINT_SCRIPT = "<script>window.addEventListener('load', function () { window.print(); });</script>"
+TMP_PREFIX = "synthetia_"
+
+
+class PDFTooLargeError(ValueError):
+    """The document is above PDF_MAX_HTML_CHARS: only the printable HTML version was produced."""
+
+
+def _remove_file(path: str):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+_started = None  # queue of (path, pid) in each worker process
+
+
+def _init_worker(started):
+    global _started
+    _started = started
+
+
+def _run_job(render_fn: Callable, html: str, path: str) -> str:
+    """Worker side: announces its pid so a timeout kills this process only."""
+    if not os.path.exists(path):
+        # Job timed out or was dropped while it was queued
+        return path
+    _started.put((path, os.getpid()))
+    return render_fn(html, path)
+
+
+def render_pdf_file(html: str, path: str) -> str:
+    """Runs in a worker process: xhtml2pdf writes straight to the file, no in-memory copy."""
+    from xhtml2pdf import pisa
+
+    with open(path, "wb") as f:
+        status = pisa.CreatePDF(html, dest=f)
+    if getattr(status, "err", 0):
+        raise RuntimeError(f"xhtml2pdf a signalé {status.err} erreur(s)")
+    return path
+
+
+class PDFJob:
+    """
+    Handle on a background render: poll with done(), wait with result(), then read the file.
+    The file lives as long as a handle on it: it is deleted once the job is garbage collected.
+    """
+
+    def __init__(self, renderer, path: str, kind: str = "pdf", async_result=None, timeout: float = PDF_TIMEOUT):
+        self.renderer = renderer
+        self.path = path
+        self.kind = kind  # "pdf", or "html" for the printable fallback
+        self.async_result = async_result
+        self.timeout = timeout
+        self.deadline = time.monotonic() + timeout
+        self.generation = renderer.generation
+        self.error = None
+        self.status = "pending" if async_result is not None else "done"
+        self._finalizer = weakref.finalize(self, _remove_file, path)
+
+    def _check(self, wait: float = 0) -> bool:
+        if self.status != "pending":
+            return True
+        if self.generation != self.renderer.generation and not self.async_result.ready():
+            self.status, self.error = "failed", RuntimeError("Rendu annulé (worker PDF redémarré)")
+            return True
+        try:
+            self.async_result.get(timeout=max(0.0, min(wait, self.deadline - time.monotonic())))
+            self.status = "done"
+        except multiprocessing.TimeoutError:
+            if time.monotonic() < self.deadline:
+                return False
+            self.status, self.error = "timeout", TimeoutError(f"Rendu PDF interrompu après {self.timeout:.0f}s")
+            self.renderer.cancel(self.path)
+        except Exception as e:
+            self.status, self.error = "failed", e
+        return True
+
+    @property
+    def extension(self) -> str:
+        return "pdf" if self.kind == "pdf" else "print.html"
+
+    @property
+    def mime(self) -> str:
+        return "application/pdf" if self.kind == "pdf" else "text/html; charset=utf-8"
+
+    def done(self) -> bool:
+        return self._check()
+
+    def result(self) -> str:
+        """Waits for the job (bounded by its timeout) and returns the output file path."""
+        while not self._check(wait=0.5):
+            pass
+        if self.status != "done":
+            raise self.error
+        return self.path
+
+    def read_bytes(self) -> bytes:
+        with open(self.result(), "rb") as f:
+            return f.read()
+
+    def read_pdf(self) -> bytes:
+        """Like read_bytes(), but refuses the printable HTML fallback."""
+        if self.kind != "pdf":
+            raise PDFTooLargeError("Document trop volumineux pour un PDF : seule la version HTML imprimable est disponible.")
+        return self.read_bytes()
+
+    def discard(self):
+        self._finalizer()
+
+
+class PDFRenderer:
+    """
+    Renders PDFs in a process pool so a long document never blocks the caller.
+    Timeouts grow with the document size and only kill the worker of the late job;
+    oversized documents get a printable HTML file instead.
+    """
+
+    def __init__(self, workers: int = PDF_WORKERS, timeout: float = PDF_TIMEOUT, chars_per_second: int = PDF_CHARS_PER_SECOND,
+                 max_html_chars: int = PDF_MAX_HTML_CHARS, render_fn: Callable = render_pdf_file, tmp_dir: Optional[str] = PDF_TMP_DIR):
+        self.workers = workers
+        self.timeout = timeout
+        self.chars_per_second = chars_per_second
+        self.max_html_chars = max_html_chars
+        self.render_fn = render_fn
+        self.tmp_dir = tmp_dir
+        self.generation = 0
+        self._pool = None
+        self._started = None
+        self._pids = OrderedDict()
+        self._lock = threading.Lock()
+        self._last_sweep = None
+
+    def timeout_for(self, html: str) -> float:
+        return self.timeout + len(html) / self.chars_per_second
+
+    def _get_pool(self):
+        with self._lock:
+            if self._pool is None:
+                # spawn: no fork of a multi-threaded Streamlit server
+                context = multiprocessing.get_context("spawn")
+                self._started = context.SimpleQueue()
+                self._pool = context.Pool(processes=self.workers, initializer=_init_worker, initargs=(self._started,))
+            return self._pool
+
+    def _temp_path(self, suffix: str) -> str:
+        fd, path = tempfile.mkstemp(suffix=suffix, prefix=TMP_PREFIX, dir=self.tmp_dir)
+        os.close(fd)
+        return path
+
+    def sweep(self, max_age: float = PDF_TMP_TTL) -> int:
+        """Removes render files older than max_age left by crashed processes or abandoned jobs."""
+        self._last_sweep = time.monotonic()
+        limit = time.time() - max_age
+        removed = 0
+        for path in glob.glob(os.path.join(self.tmp_dir or tempfile.gettempdir(), f"{TMP_PREFIX}*")):
+            try:
+                if os.path.getmtime(path) < limit:
+                    os.remove(path)
+                    removed += 1
+            except OSError:
+                pass
+        if removed:
+            print(f"DEBUG: PDF sweep removed {removed} leftover file(s)")
+        return removed
+
+    def submit(self, html: str, fallback_html: Optional[str] = None) -> PDFJob:
+        if self._last_sweep is None or time.monotonic() - self._last_sweep > 3600:
+            self.sweep()
+        if fallback_html is not None and len(html) > self.max_html_chars:
+            print(f"DEBUG: PDF fallback to printable HTML ({len(html)} chars > {self.max_html_chars})")
+            path = self._temp_path(".html")
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(fallback_html)
+            return PDFJob(self, path, kind="html")
+
+        path = self._temp_path(".pdf")
+        timeout = self.timeout_for(html)
+        async_result = self._get_pool().apply_async(_run_job, (self.render_fn, html, path))
+        return PDFJob(self, path, async_result=async_result, timeout=timeout)
+
+    def cancel(self, path: str):
+        """Stops one render: its worker is killed (the pool starts a new one), other jobs keep running."""
+        with self._lock:
+            while self._started is not None and not self._started.empty():
+                started_path, pid = self._started.get()
+                self._pids[started_path] = pid
+                while len(self._pids) > 256:
+                    self._pids.popitem(last=False)
+            pid = self._pids.pop(path, None)
+        _remove_file(path)  # a job still queued is skipped when its turn comes
+        if pid is not None:
+            print(f"DEBUG: killing PDF worker {pid} ({path})")
+            try:
+                os.kill(pid, getattr(signal, "SIGKILL", signal.SIGTERM))
+            except OSError:
+                pass
+
+    def reset(self):
+        """Kills the workers (stuck render) and invalidates every pending job."""
+        with self._lock:
+            if self._pool is not None:
+                self._pool.terminate()
+                self._pool = None
+            self.generation += 1
+
+    def close(self):
+        with self._lock:
+            if self._pool is not None:
+                self._pool.close()
+                self._pool.join()
+                self._pool = None
@@ -1,10 +1,36 @@
-from typing import List, Union
+from typing import List, Tuple, Union
 
 class PromptManager:
+    """
+    Builds prompts as a (system, user) pair.
+    The system part only holds the fixed instructions of a summary type/context,
+    so every chunk of the same type shares an identical prefix that Ollama can
+    keep in its KV cache. The variable text always goes into the user part.
+    """
+
+    def get_messages(self, summary_type: str, context: str, text: Union[str, dict]) -> List[dict]:
+        """Returns the chat messages (static system message first, then the variable user message)."""
+        system, user = self._get_parts(summary_type, context, text)
+        messages = []
+        if system:
+            messages.append({"role": "system", "content": system.strip()})
+        messages.append({"role": "user", "content": user.strip()})
+        return messages
+
+    def get_system_prompt(self, summary_type: str, context: str) -> str:
+        """Returns only the static part of a prompt (used to warm the prefix cache)."""
+        sample = {"search": "", "content": "", "instructions": ""} if context in ("multi", "global") else ""
+        system, _ = self._get_parts(summary_type, context, sample)
+        return system.strip()
+
     def get_prompt(self, summary_type: str, context: str, text: str) -> str:
         """
-        Retrieves the appropriate prompt based on summary type and context.
+        Retrieves the appropriate prompt as a single string (static instructions first).
         """
+        system, user = self._get_parts(summary_type, context, text)
+        return f"{system.strip()}\n\n{user.strip()}".strip()
+
+    def _get_parts(self, summary_type: str, context: str, text) -> Tuple[str, str]:
         if summary_type == "short":
             return self._get_short_prompt(context, text)
         elif summary_type == "medium":
@@ -18,13 +44,12 @@ class PromptManager:
         else:
             return self._get_short_prompt(context, text) # Default
 
-    def _get_short_prompt(self, context: str, text: str) -> str:
+    def _get_short_prompt(self, context: str, text: Union[str, dict]) -> Tuple[str, str]:
         if context == "chunk":
-            return f"""
-   Tu es un assistant qui doit produire uniquement un résumé.
+            system = """
+Tu es un assistant qui doit produire uniquement un résumé.
 
-Texte à résumer (issu d'une transcription audio) :
-{text}
+Le texte à résumer (issu d'une transcription audio) est fourni dans le message suivant.
 
 OBJECTIFS :
 - **Synthèse courte des éléments** : Aller droit au but.
@@ -43,12 +68,16 @@ CONTRAINTES DE SORTIE :
 - Pas de conclusion.
 - La sortie doit être uniquement le résumé demandé.
 """
+            user = f"""
+Texte à résumer (issu d'une transcription audio) :
+{text}
+"""
+            return system, user
         elif context == "full_text":
-            return f"""
+            system = """
 Tu es un assistant qui doit produire uniquement un résumé.
 
-Texte à résumer (issu d'une transcription audio) :
-{text}
+Le texte à résumer (issu d'une transcription audio) est fourni dans le message suivant.
 
 OBJECTIFS :
 - Synthèse claire, concise et fidèle au contenu
@@ -71,11 +100,14 @@ CONTRAINTES DE SORTIE :
   1. Informations descendantes
   2. Actions attendues
 """
+            user = f"""
+Texte à résumer (issu d'une transcription audio) :
+{text}
+"""
+            return system, user
         elif context == "multi":
-            return f"""
-Tu es un rédacteur professionnel. Ta mission est de créer une synthèse concise à partir des informations suivantes :
-Sujet : {text['search']}
-Sources : {text['content']}
+            system = """
+Tu es un rédacteur professionnel. Ta mission est de créer une synthèse concise à partir du sujet et des sources fournis dans le message suivant.
 
 OBJECTIF :
 Produire un texte fluide et direct qui synthétise les informations clés des différentes sources sur le sujet demandé.
@@ -87,15 +119,19 @@ CONTRAINTES STRICTES :
 
 Le résultat doit ressembler à un article de presse ou une note de synthèse professionnelle.
 """
-        return ""
+            user = f"""
+Sujet : {text['search']}
+Sources : {text['content']}
+"""
+            return system, user
+        return "", ""
 
-    def _get_medium_prompt(self, context: str, text: str) -> str:
+    def _get_medium_prompt(self, context: str, text: Union[str, dict]) -> Tuple[str, str]:
         if context == "chunk":
-            return f"""
+            system = """
 Tu es un assistant expert en synthèse de documents.
 
-Texte à résumer :
-{text}
+Le texte à résumer est fourni dans le message suivant.
 
 OBJECTIFS :
 - **Synthèse de longueur moyenne** : Équilibre parfait entre détails et concision.
@@ -116,12 +152,16 @@ CONTRAINTES :
 - Ton IMPERSONNEL et OBJECTIF. Pas de "Je", "Mon", "Nous".
 - NE JAMAIS inventer de dates, de lieux ou de noms s'ils ne sont pas explicitement dans le texte.
 """
+            user = f"""
+Texte à résumer :
+{text}
+"""
+            return system, user
         elif context == "full_text":
-            return f"""
+            system = """
 Tu es un assistant expert en synthèse.
 
-Texte à résumer :
-{text}
+Le texte à résumer est fourni dans le message suivant.
 
 OBJECTIFS :
 - Fournir une vue d'ensemble complète et STRUCTURÉE.
@@ -154,12 +194,14 @@ CONTRAINTES :
 - Ton IMPERSONNEL et OBJECTIF. Pas de "Je", "Mon", "Nous".
 - NE JAMAIS inventer de dates, de lieux ou de noms s'ils ne sont pas explicitement dans le texte.
 """
+            user = f"""
+Texte à résumer :
+{text}
+"""
+            return system, user
         elif context == "multi":
-            return f"""
-Rédige une synthèse thématique sur : {text['search']}.
-
-Sources :
-{text['content']}
+            system = """
+Rédige une synthèse thématique sur le sujet indiqué, à partir des sources fournies dans le message suivant.
 
 OBJECTIFS :
 - Croiser les informations des différentes sources.
@@ -191,14 +233,18 @@ CONTRAINTES :
 - FUSIONNER les informations. NE PAS dire "Les sources disent", "La première vidéo...". Rédiger un texte unique et cohérent.
 - NE JAMAIS inventer de dates, de lieux ou de noms s'ils ne sont pas explicitement dans le texte.
 """
-        return ""
+            user = f"""
+Rédige une synthèse thématique sur : {text['search']}.
 
-    def _get_long_prompt(self, context: str, text: str) -> str:
-        if context == "chunk":
-            return f"""
-Texte à traiter :
-{text}
+Sources :
+{text['content']}
+"""
+            return system, user
+        return "", ""
 
+    def _get_long_prompt(self, context: str, text: Union[str, dict]) -> Tuple[str, str]:
+        if context == "chunk":
+            system = """
 Tu es un moteur d'extraction d'information haute fidélité. Ta tâche est de traiter une SECTION d'un document pour en extraire TOUTE la substance.
 
 OBJECTIFS :
@@ -210,11 +256,13 @@ CONTRAINTES :
 -   Ne supprime aucun détail technique.
 -   Pas de "titre de document" (c'est juste un fragment).
 """
-        elif context == "full_text":
-            return f"""
+            user = f"""
 Texte à traiter :
 {text}
-
+"""
+            return system, user
+        elif context == "full_text":
+            system = """
 Tu es un Éditeur Senior dans un grand média d'analyse. Ta mission est de transformer ce contenu brut en un ARTICLE DE FOND de qualité "Premium", destiné à être publié.
 
 OBJECTIFS EDITORIAUX :
@@ -241,13 +289,13 @@ RÉGLAGE DE LA LONGUEUR :
 -   Il est CRITIQUE que tu fournisses le maximum de détails. Si le texte original est long, ton article DOIT être long. Ne synthétise pas pour raccourcir, mais reformule pour clarifier.
 
 """
+            user = f"""
+Texte à traiter :
+{text}
+"""
+            return system, user
         elif context == "multi":
-            return f"""
-Sources :
-{text['content']}
-
-Sujet : {text['search']}
-
+            system = """
 Tu es un Journaliste d'Investigation Spécialisé. Tu dois rédiger un DOSSIER COMPLET sur le sujet, en croisant ces sources.
 
 OBJECTIF : Créer le dossier de référence ultime sur ce thème.
@@ -275,14 +323,18 @@ ATTENTION :
 -   Ceci n'est pas un résumé scolaire. C'est une œuvre de rédaction.
 -   Prends de la hauteur. Analyse les implications.
 """
-        return ""
+            user = f"""
+Sources :
+{text['content']}
 
-    def _get_news_prompt(self, context: str, text: str) -> str:
-        if context == "chunk":
-            return f"""
-Texte à analyser (fragment) :
-{text}
+Sujet : {text['search']}
+"""
+            return system, user
+        return "", ""
 
+    def _get_news_prompt(self, context: str, text: Union[str, dict]) -> Tuple[str, str]:
+        if context == "chunk":
+            system = """
 Tu es un journaliste d'investigation chargé de repérer les ACTUALITÉS et NOUVEAUTÉS.
 OBJECTIFS :
 - Extraire UNIQUEMENT les faits récents, les annonces, les dates clés et les changements.
@@ -292,11 +344,13 @@ OBJECTIFS :
 Sortie attendue :
 - Liste de points concis et factuels.
 """
-        elif context == "full_text":
-            return f"""
-Texte à traiter :
+            user = f"""
+Texte à analyser (fragment) :
 {text}
-
+"""
+            return system, user
+        elif context == "full_text":
+            system = """
 Tu es Rédacteur en Chef d'un site d'actualité technologique/scientifique.
 OBJECTIF : Rédiger un ARTICLE D'ACTUALITÉ percutant.
 
@@ -313,13 +367,13 @@ STYLE :
 - CITE TES SOURCES : "Selon la vidéo X...", "Comme annoncé le [Date]..."
 - METS EN AVANT LA DATE.
 """
+            user = f"""
+Texte à traiter :
+{text}
+"""
+            return system, user
         elif context == "multi":
-            return f"""
-Sources (classées par ordre chronologique, les plus récentes en PREMIER) :
-{text['content']}
-
-Sujet : {text['search']}
-
+            system = """
 Tu es un JOURNALISTE EXPERT. Tu dois rédiger un article de synthèse sur les **DERNIÈRES ACTUALITÉS** concernant ce sujet.
 IMPORTANT : Les informations les plus récentes (en haut de la liste des sources) ont LA PRIORITÉ ABSOLUE.
 
@@ -342,9 +396,16 @@ RÈGLES D'OR :
 -   Hésite pas à utiliser des encadrés markdown ( > Citation) pour les déclarations chocs.
 -   Si les sources se contredisent, la source la plus RÉCENTE a raison (mais mentionne le changement).
 """
-        return ""
+            user = f"""
+Sources (classées par ordre chronologique, les plus récentes en PREMIER) :
+{text['content']}
+
+Sujet : {text['search']}
+"""
+            return system, user
+        return "", ""
 
-    def _get_analysis_prompt(self, context: str, text: Union[str, dict]) -> str:
+    def _get_analysis_prompt(self, context: str, text: Union[str, dict]) -> Tuple[str, str]:
         if context == "global":
             # Handle both string (legacy) and dict (with instructions)
             content = text
@@ -357,12 +418,11 @@ RÈGLES D'OR :
             if instructions:
                 instruction_block = f"\n\nCONSIGNE SPÉCIFIQUE DU RÉDACTEUR EN CHEF :\n{instructions}\n(Tu DOIS respecter cette consigne priorité)\n"
 
-            return f"""
+            system = """
 Tu es un Rédacteur en Chef d'un grand média.
-Voici un ensemble de notes détaillées provenant de plusieurs sources ou sections :
-{content}
+Le message suivant contient un ensemble de notes détaillées provenant de plusieurs sources ou sections,
+et éventuellement une consigne spécifique du rédacteur en chef (elle est alors PRIORITAIRE).
 
-{instruction_block}
 Ta mission est de RÉDIGER LE DOCUMENT FINAL COMPLET. Il s'agit d'une fusion intégrale de toutes les informations.
 
 OBJECTIF SUPRÊME :
@@ -390,7 +450,12 @@ STRUCTURE SUGGÉRÉE :
 -   **LE CŒUR DU SUJET** (Organisé par thèmes H2/H3 - 90% du texte)
 -   **SYNTHÈSE FINALE** (Ouverture)
 """
-        return ""
+            user = f"""
+Voici les notes détaillées :
+{content}
+{instruction_block}"""
+            return system, user
+        return "", ""
 
     def get_refinement_instruction(self, size_opt, tone_opt, fmt_opt, lang_opt, custom_instr):
         instructions_list = []
@@ -0,0 +1,270 @@
+import json
+import os
+import threading
+import time
+import urllib.request
+import concurrent.futures
+from dataclasses import dataclass
+from typing import Callable, Optional
+
+from io_pool import is_throttled
+
+DOWNLOAD_CHUNK_SIZE = int(os.getenv("DOWNLOAD_CHUNK_SIZE", str(4 * 1024 * 1024)))
+DOWNLOAD_RANGES = int(os.getenv("DOWNLOAD_RANGES", "4"))
+DOWNLOAD_RETRIES = int(os.getenv("DOWNLOAD_RETRIES", "5"))
+DOWNLOAD_BACKOFF = float(os.getenv("DOWNLOAD_BACKOFF", "1"))
+DOWNLOAD_MAX_BACKOFF = float(os.getenv("DOWNLOAD_MAX_BACKOFF", "30"))
+DOWNLOAD_TIMEOUT = float(os.getenv("DOWNLOAD_TIMEOUT", "30"))
+# Global cap shared by every download of the process, in MB/s (0 = unlimited)
+DOWNLOAD_BANDWIDTH_MB = float(os.getenv("DOWNLOAD_BANDWIDTH_MB", "0"))
+
+_BLOCK_SIZE = 64 * 1024
+
+
+class DownloadCancelled(Exception):
+    """Raised when the cancel event is set; the partial file of `path` is kept for a later resume."""
+    path: Optional[str] = None
+
+
+def discard_partial(path: str):
+    """Deletes the .part file and its sidecar: for downloads that will never be resumed."""
+    for leftover in (f"{path}.part", f"{path}.part.json", f"{path}.part.json.tmp"):
+        if os.path.exists(leftover):
+            os.remove(leftover)
+
+
+class TokenBucket:
+    """Thread-safe bandwidth limiter: consume(n) blocks until n bytes fit in the rate."""
+
+    def __init__(self, rate: float, burst: Optional[float] = None):
+        self.rate = rate
+        self.burst = burst or rate
+        self._tokens = self.burst
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def consume(self, n: int):
+        if not self.rate:
+            return
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._last) * self.rate)
+            self._last = now
+            # Going into debt keeps callers in arrival order and lets reads larger than the burst through
+            self._tokens -= n
+            deficit = -self._tokens
+        if deficit > 0:
+            time.sleep(deficit / self.rate)
+
+
+@dataclass
+class DownloadStats:
+    size: int
+    downloaded: int = 0
+    resumed: int = 0
+    retries: int = 0
+    chunks: int = 0
+    elapsed: float = 0.0
+
+    @property
+    def throughput(self) -> float:
+        """Bytes per second actually transferred by this run."""
+        return self.downloaded / self.elapsed if self.elapsed else 0.0
+
+    def __str__(self):
+        return (f"{self.downloaded / 1e6:.1f} MB en {self.elapsed:.1f}s ({self.throughput / 1e6:.2f} MB/s), "
+                f"{self.chunks} plages, {self.retries} reprises, {self.resumed / 1e6:.1f} MB déjà présents")
+
+
+class RangedDownloader:
+    """
+    Downloads a file as fixed-size byte ranges fetched in parallel.
+
+    Data goes to `<path>.part` and the finished ranges are recorded in a
+    `<path>.part.json` sidecar, so an interrupted download (error, cancel,
+    restart) resumes where it stopped. A failed range is retried with
+    exponential backoff from its last received byte. Every read goes through
+    the shared TokenBucket, which caps the bandwidth of all downloads together.
+    """
+
+    def __init__(self, chunk_size: int = DOWNLOAD_CHUNK_SIZE, parallel: int = DOWNLOAD_RANGES, retries: int = DOWNLOAD_RETRIES,
+                 backoff: float = DOWNLOAD_BACKOFF, max_backoff: float = DOWNLOAD_MAX_BACKOFF, timeout: float = DOWNLOAD_TIMEOUT,
+                 bucket: Optional[TokenBucket] = None, range_in_query: bool = False, opener: Optional[Callable] = None):
+        self.chunk_size = chunk_size
+        self.parallel = parallel
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.timeout = timeout
+        self.bucket = bucket or get_bandwidth_limiter()
+        # googlevideo.com expects the range as a "&range=a-b" query parameter rather than a header
+        self.range_in_query = range_in_query
+        self.opener = opener or urllib.request.urlopen
+
+    def _request(self, url: str, start: int, end: int):
+        if self.range_in_query:
+            sep = "&" if "?" in url else "?"
+            request = urllib.request.Request(f"{url}{sep}range={start}-{end}")
+        else:
+            request = urllib.request.Request(url, headers={"Range": f"bytes={start}-{end}"})
+        return self.opener(request, timeout=self.timeout)
+
+    def probe_size(self, url: str) -> int:
+        with self._request(url, 0, 0) as response:
+            content_range = response.headers.get("Content-Range", "")
+            if "/" in content_range:
+                return int(content_range.rsplit("/", 1)[1])
+            return int(response.headers.get("Content-Length", 0))
+
+    @staticmethod
+    def _load_done(sidecar: str, size: int, chunk_size: int) -> set:
+        try:
+            with open(sidecar, encoding="utf-8") as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return set()
+        if state.get("size") != size or state.get("chunk_size") != chunk_size:
+            return set()
+        return set(state.get("done", []))
+
+    @staticmethod
+    def _save_done(sidecar: str, size: int, chunk_size: int, done: set):
+        tmp = f"{sidecar}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"size": size, "chunk_size": chunk_size, "done": sorted(done)}, f)
+        os.replace(tmp, sidecar)
+
+    def _fetch_range(self, url: str, part: str, start: int, end: int, stats: DownloadStats, lock: threading.Lock,
+                     stop: threading.Event):
+        offset = start
+        for attempt in range(self.retries + 1):
+            try:
+                with self._request(url, offset, end) as response, open(part, "r+b") as f:
+                    f.seek(offset)
+                    while offset <= end:
+                        if stop.is_set():
+                            raise DownloadCancelled(url)
+                        block = response.read(min(_BLOCK_SIZE, end - offset + 1))
+                        if not block:
+                            raise ConnectionError(f"Plage {start}-{end} interrompue à l'octet {offset}")
+                        self.bucket.consume(len(block))
+                        f.write(block)
+                        offset += len(block)
+                        with lock:
+                            stats.downloaded += len(block)
+                return
+            except DownloadCancelled:
+                raise
+            except Exception as e:
+                if attempt == self.retries:
+                    raise
+                delay = min(self.max_backoff, self.backoff * 2 ** attempt)
+                if is_throttled(e):
+                    delay = self.max_backoff
+                with lock:
+                    stats.retries += 1
+                print(f"DEBUG: range {start}-{end} retry {attempt + 1}/{self.retries} from byte {offset} in {delay:.1f}s: {e}")
+                if stop.wait(delay):
+                    raise DownloadCancelled(url)
+
+    def download(self, url: str, path: str, size: Optional[int] = None, cancel: Optional[threading.Event] = None) -> DownloadStats:
+        """Downloads url to path and returns the transfer metrics of this run."""
+        if cancel is not None and cancel.is_set():
+            raise DownloadCancelled(url)
+        size = size or self.probe_size(url)
+        part, sidecar = f"{path}.part", f"{path}.part.json"
+        done = self._load_done(sidecar, size, self.chunk_size) if os.path.exists(part) else set()
+        if not done:
+            with open(part, "wb") as f:
+                f.truncate(size)
+
+        ranges = [(i, i * self.chunk_size, min(size, (i + 1) * self.chunk_size) - 1)
+                  for i in range((size + self.chunk_size - 1) // self.chunk_size)]
+        todo = [r for r in ranges if r[0] not in done]
+        stats = DownloadStats(size=size, resumed=sum(end - start + 1 for i, start, end in ranges if i in done))
+        lock = threading.Lock()
+        # Set by the caller's cancel event or by a range that failed for good
+        stop = threading.Event()
+
+        def fetch(index: int, start: int, end: int):
+            self._fetch_range(url, part, start, end, stats, lock, stop)
+            with lock:
+                done.add(index)
+                stats.chunks += 1
+                self._save_done(sidecar, size, self.chunk_size, done)
+
+        started = time.perf_counter()
+        try:
+            with concurrent.futures.ThreadPoolExecutor(max_workers=max(1, self.parallel), thread_name_prefix="range") as executor:
+                futures = [executor.submit(fetch, *r) for r in todo]
+                pending = set(futures)
+                try:
+                    while pending:
+                        finished, pending = concurrent.futures.wait(pending, timeout=0.2, return_when=concurrent.futures.FIRST_EXCEPTION)
+                        for future in finished:
+                            future.result()
+                        if cancel is not None and cancel.is_set():
+                            raise DownloadCancelled(url)
+                except BaseException:
+                    # Stop the other ranges quickly; what they already wrote stays resumable
+                    stop.set()
+                    for future in futures:
+                        future.cancel()
+                    raise
+        except DownloadCancelled as e:
+            # Raised once every range thread has stopped: the caller may delete the partial file
+            e.path = path
+            raise
+        finally:
+            stats.elapsed = time.perf_counter() - started
+
+        os.replace(part, path)
+        if os.path.exists(sidecar):
+            os.remove(sidecar)
+        return stats
+
+
+class BackgroundDownload:
+    """
+    Download started before knowing it is needed. fn must accept a `cancel` event;
+    cancel() stops it and deletes what it left on disk: the finished file, or the
+    partial file and its sidecar (a speculative download is never resumed).
+    fn returns the path, or a tuple whose first item is the path.
+    """
+
+    def __init__(self, executor: concurrent.futures.Executor, fn: Callable, *args):
+        self.cancel_event = threading.Event()
+        self.future = executor.submit(fn, *args, cancel=self.cancel_event)
+
+    def result(self, timeout: Optional[float] = None):
+        return self.future.result(timeout)
+
+    def cancel(self):
+        self.cancel_event.set()
+        if not self.future.cancel():
+            self.future.add_done_callback(self._discard)
+
+    @staticmethod
+    def _discard(future: concurrent.futures.Future):
+        error = future.exception()
+        if isinstance(error, DownloadCancelled) and error.path:
+            discard_partial(error.path)
+        if error is not None:
+            return
+        result = future.result()
+        path = result[0] if isinstance(result, tuple) else result
+        if path and os.path.exists(path):
+            os.remove(path)
+
+
+_shared_bucket = None
+_shared_lock = threading.Lock()
+
+
+def get_bandwidth_limiter() -> TokenBucket:
+    """Process-wide bucket: concurrent downloads share DOWNLOAD_BANDWIDTH_MB together."""
+    global _shared_bucket
+    with _shared_lock:
+        if _shared_bucket is None:
+            _shared_bucket = TokenBucket(DOWNLOAD_BANDWIDTH_MB * 1e6)
+        return _shared_bucket
@@ -0,0 +1,118 @@
+import math
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from channels import get_matcher
+from config import RANKING_WEIGHTS
+from validator import extract_terms
+
+# Accepted length range (seconds) per duration mode, same bounds as filter_videos
+DURATION_RANGES = {
+    "short": (0, 300),
+    "medium": (300, 1200),
+    "long": (1200, math.inf),
+}
+FEATURES = ("views", "recency", "duration", "channel", "terms")
+
+
+@dataclass
+class FeatureTable:
+    """
+    Raw per-video features, extracted once from the metadata.
+    Everything that depends on filters or weights is then computed with NumPy.
+    """
+    videos: list
+    views: np.ndarray
+    timestamps: np.ndarray  # POSIX seconds, NaN when unknown
+    lengths: np.ndarray
+    channel: np.ndarray
+    terms: np.ndarray
+
+    @classmethod
+    def from_videos(cls, videos, query: str = "", active_categories=None) -> "FeatureTable":
+        matcher = get_matcher(active_categories)
+        query_terms = extract_terms(query or "")
+
+        def term_match(v):
+            if not query_terms:
+                return 0.0
+            return len(query_terms & extract_terms(f"{v.title} {v.description}")) / len(query_terms)
+
+        def timestamp(v):
+            date = v.publish_date
+            if not date:
+                return np.nan
+            if date.tzinfo is None:
+                date = date.replace(tzinfo=timezone.utc)
+            return date.timestamp()
+
+        return cls(
+            videos=list(videos),
+            views=np.array([v.views or 0 for v in videos], dtype=np.float64),
+            timestamps=np.array([timestamp(v) for v in videos], dtype=np.float64),
+            lengths=np.array([v.length or 0 for v in videos], dtype=np.float64),
+            channel=np.array([max(matcher.match(v.author).values(), default=0.0) for v in videos], dtype=np.float64),
+            terms=np.array([term_match(v) for v in videos], dtype=np.float64),
+        )
+
+    def reorder(self, videos) -> "FeatureTable":
+        """Same features for the same videos in another order (no extraction)."""
+        position = {v.watch_url: i for i, v in enumerate(self.videos)}
+        index = np.array([position[v.watch_url] for v in videos], dtype=np.intp)
+        return FeatureTable(
+            videos=list(videos),
+            views=self.views[index],
+            timestamps=self.timestamps[index],
+            lengths=self.lengths[index],
+            channel=self.channel[index],
+            terms=self.terms[index],
+        )
+
+
+class RankingEngine:
+    """Weighted relevance score over search results (views, recency, duration fit, channel, terms)."""
+
+    def __init__(self, weights: Optional[Dict[str, float]] = None, recency_half_life_days: float = 30.0, duration_tolerance: float = 300.0):
+        self.weights = dict(RANKING_WEIGHTS)
+        self.weights.update(weights or {})
+        self.recency_half_life_days = recency_half_life_days
+        self.duration_tolerance = duration_tolerance
+
+    def feature_matrix(self, table: FeatureTable, duration_mode: str = "any", now: Optional[datetime] = None) -> np.ndarray:
+        """Returns an (n_videos, len(FEATURES)) matrix of features scaled to [0, 1]."""
+        n = len(table.videos)
+        if n == 0:
+            return np.zeros((0, len(FEATURES)))
+
+        log_views = np.log1p(table.views)
+        views = log_views / log_views.max() if log_views.max() > 0 else np.zeros(n)
+
+        now_ts = (now or datetime.now(timezone.utc)).timestamp()
+        age_days = np.clip((now_ts - table.timestamps) / 86400.0, 0, None)
+        recency = np.nan_to_num(np.exp(-age_days * math.log(2) / self.recency_half_life_days), nan=0.0)
+
+        bounds = DURATION_RANGES.get(duration_mode)
+        if bounds is None:
+            duration = np.ones(n)
+        else:
+            low, high = bounds
+            distance = np.maximum(low - table.lengths, 0) + np.maximum(table.lengths - high, 0)
+            duration = np.exp(-distance / self.duration_tolerance)
+
+        return np.column_stack([views, recency, duration, table.channel, table.terms])
+
+    def score(self, table: FeatureTable, duration_mode: str = "any", now: Optional[datetime] = None) -> np.ndarray:
+        weights = np.array([self.weights.get(name, 0.0) for name in FEATURES], dtype=np.float64)
+        total = weights.sum()
+        if total > 0:
+            weights = weights / total
+        return self.feature_matrix(table, duration_mode, now) @ weights
+
+    def rank(self, table: FeatureTable, duration_mode: str = "any", now: Optional[datetime] = None) -> List:
+        """Videos sorted by descending score (ties keep the search order)."""
+        scores = self.score(table, duration_mode, now)
+        order = np.argsort(-scores, kind="stable")
+        return [table.videos[i] for i in order]
@@ -0,0 +1,102 @@
+import os
+from typing import Dict, Hashable, List, Sequence, Tuple
+
+import numpy as np
+
+EMBED_MODEL = os.getenv("EMBED_MODEL", "nomic-embed-text")
+RETRIEVAL_TOP_K = int(os.getenv("RETRIEVAL_TOP_K", "12"))
+RETRIEVAL_CHUNK_CHARS = int(os.getenv("RETRIEVAL_CHUNK_CHARS", "1500"))
+
+
+def split_passages(text: str, max_chars: int = RETRIEVAL_CHUNK_CHARS) -> List[str]:
+    """Cuts a transcript into passages of at most max_chars, on word boundaries."""
+    passages = []
+    start = 0
+    while start < len(text):
+        end = start + max_chars
+        if end < len(text):
+            space = text.rfind(" ", start, end)
+            end = space if space > start else end
+        passage = text[start:end].strip()
+        if passage:
+            passages.append(passage)
+        start = end
+    return passages
+
+
+class OllamaEmbedder:
+    """Embeds texts with a local Ollama embedding model (EMBED_MODEL)."""
+
+    def __init__(self, client, model: str = EMBED_MODEL, batch_size: int = 32):
+        self.client = client
+        self.model = model
+        self.batch_size = batch_size
+
+    def embed(self, texts: Sequence[str]) -> np.ndarray:
+        vectors = []
+        for start in range(0, len(texts), self.batch_size):
+            response = self.client.embed(model=self.model, input=list(texts[start:start + self.batch_size]))
+            vectors.extend(response["embeddings"])
+        return np.asarray(vectors, dtype=np.float32)
+
+
+class EmbeddingIndex:
+    """In-memory vector index: L2-normalized NumPy matrix, cosine top-k by dot product."""
+
+    def __init__(self):
+        self.vectors = None
+        self.payloads = []
+
+    def __len__(self):
+        return len(self.payloads)
+
+    def add(self, vectors: np.ndarray, payloads: Sequence):
+        vectors = np.asarray(vectors, dtype=np.float32)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        vectors = vectors / np.where(norms == 0, 1, norms)
+        self.vectors = vectors if self.vectors is None else np.vstack([self.vectors, vectors])
+        self.payloads.extend(payloads)
+
+    def search(self, query_vector: np.ndarray, k: int) -> List[Tuple[float, object]]:
+        if not self.payloads:
+            return []
+        query = np.asarray(query_vector, dtype=np.float32).ravel()
+        query = query / (np.linalg.norm(query) or 1)
+        scores = self.vectors @ query
+        k = min(k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top], kind="stable")]
+        return [(float(scores[i]), self.payloads[i]) for i in top]
+
+
+class ChunkRetriever:
+    """
+    Keeps only the transcript passages relevant to a focused request.
+    Passages of every document are indexed together, so the top-k is taken over the whole basket.
+    """
+
+    def __init__(self, embedder, top_k: int = RETRIEVAL_TOP_K, chunk_chars: int = RETRIEVAL_CHUNK_CHARS):
+        self.embedder = embedder
+        self.top_k = top_k
+        self.chunk_chars = chunk_chars
+
+    def select(self, documents: Sequence[Tuple[Hashable, str]], query: str) -> Dict[Hashable, List[str]]:
+        """Returns {doc_id: [relevant passages in reading order]}; documents with no relevant passage are absent."""
+        owners, passages = [], []
+        for doc_id, text in documents:
+            for passage in split_passages(text, self.chunk_chars):
+                owners.append(doc_id)
+                passages.append(passage)
+        if not passages:
+            return {}
+
+        index = EmbeddingIndex()
+        index.add(self.embedder.embed(passages), range(len(passages)))
+        query_vector = self.embedder.embed([query])[0]
+        hits = index.search(query_vector, self.top_k)
+
+        selected = {}
+        for i in sorted(i for _, i in hits):
+            selected.setdefault(owners[i], []).append(passages[i])
+        print(f"DEBUG: Retrieval kept {len(hits)}/{len(passages)} passages for '{query}'")
+        return selected
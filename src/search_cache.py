@@ -0,0 +1,117 @@
+import os
+import threading
+import time
+import concurrent.futures
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, List, NamedTuple, Optional, Tuple
+
+SEARCH_CACHE_TTL = int(os.getenv("SEARCH_CACHE_TTL", "900"))  # seconds
+SEARCH_CACHE_SIZE = int(os.getenv("SEARCH_CACHE_SIZE", "200"))
+
+
+class SearchKey(NamedTuple):
+    """Everything that changes the content of a result list."""
+    query: str
+    sort_by: str
+    upload_date: Optional[str]
+    exclude_terms: str
+    duration_mode: str
+    active_categories: Tuple[str, ...]
+    enable_boost: bool
+    days_limit: Optional[int]
+
+
+def make_search_key(query, sort_by="relevance", upload_date=None, exclude_terms=None, duration_mode="any",
+                    active_categories=None, enable_boost=True, days_limit=None) -> SearchKey:
+    return SearchKey(
+        query=" ".join((query or "").lower().split()),
+        sort_by=sort_by or "relevance",
+        upload_date=upload_date,
+        exclude_terms=" ".join(sorted((exclude_terms or "").lower().split())),
+        duration_mode=duration_mode or "any",
+        active_categories=tuple(sorted(active_categories or [])),
+        enable_boost=bool(enable_boost),
+        days_limit=days_limit,
+    )
+
+
+@dataclass
+class SearchEntry:
+    """A search session shared by every user running the same query."""
+    key: SearchKey
+    search_obj: Any
+    pages: List[list] = field(default_factory=list)
+    seen_urls: set = field(default_factory=set)
+    created_at: float = field(default_factory=time.monotonic)
+    exhausted: bool = False
+    prefetch: Optional[concurrent.futures.Future] = None
+    lock: threading.RLock = field(default_factory=threading.RLock)
+
+    def add_page(self, videos, fetched: Optional[int] = None) -> list:
+        """
+        Stores the unseen videos as a new page. `fetched` is the size of the raw page
+        returned by pytubefix: only an empty raw page ends the search, a page whose
+        videos were all filtered out or already seen does not.
+        """
+        page = [v for v in videos if v.watch_url not in self.seen_urls]
+        self.seen_urls.update(v.watch_url for v in page)
+        if page:
+            self.pages.append(page)
+        elif not (len(videos) if fetched is None else fetched):
+            self.exhausted = True
+        return page
+
+
+class SearchCache:
+    """
+    Process-wide cache of search sessions with a TTL.
+    Filtered/boosted pages are stored per SearchKey, and the next page is
+    fetched in the background so "Charger plus" can be served immediately.
+    """
+
+    def __init__(self, ttl: int = SEARCH_CACHE_TTL, max_entries: int = SEARCH_CACHE_SIZE, max_workers: int = 4):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._executor = concurrent.futures.ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="search-prefetch")
+
+    def get(self, key: SearchKey) -> Optional[SearchEntry]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if time.monotonic() - entry.created_at > self.ttl:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def put(self, entry: SearchEntry) -> SearchEntry:
+        with self._lock:
+            self._entries[entry.key] = entry
+            self._entries.move_to_end(entry.key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return entry
+
+    def schedule_prefetch(self, entry: SearchEntry, fetch_page) -> None:
+        """Fetches the page after the last cached one, unless one is already on its way."""
+        with entry.lock:
+            if entry.exhausted or (entry.prefetch and not entry.prefetch.done()):
+                return
+            entry.prefetch = self._executor.submit(self._prefetch, entry, fetch_page)
+
+    def _prefetch(self, entry: SearchEntry, fetch_page):
+        try:
+            with entry.lock:
+                if entry.exhausted:
+                    return
+                entry.add_page(*fetch_page(entry))
+        except Exception as e:
+            print(f"Warning: search prefetch failed: {e}")
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
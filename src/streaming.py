@@ -0,0 +1,95 @@
+import os
+import queue
+import threading
+from typing import Iterable, Iterator, List, Optional
+
+_DONE = object()
+
+
+class StreamingChunker:
+    """
+    Incremental version of Summarizer.chunk_text: texts are fed as they are
+    produced and a chunk is released as soon as it is full. Fed pieces are
+    joined with `separator`, so the chunks match chunk_text(separator.join(pieces)).
+    """
+
+    def __init__(self, max_chars: int, separator: str = "\n\n"):
+        self.max_chars = max_chars
+        self.separator = separator
+        self._buffer = ""
+        self._started = False
+
+    def feed(self, text: str) -> List[str]:
+        self._buffer += (self.separator if self._started else "") + text
+        self._started = True
+        chunks = []
+        # A chunk is only cut once more text than max_chars is buffered, as chunk_text does
+        while len(self._buffer) > self.max_chars:
+            end = self._buffer.rfind(" ", 0, self.max_chars)
+            if end <= 0:
+                end = self.max_chars
+            chunks.append(self._buffer[:end].strip())
+            self._buffer = self._buffer[end:]
+        return chunks
+
+    def flush(self) -> List[str]:
+        rest, self._buffer = self._buffer, ""
+        return [rest.strip()] if rest else []
+
+
+def in_background(items: Iterable, maxsize: int = 2) -> Iterator:
+    """
+    Iterates `items` in a producer thread and yields the results as they come,
+    so producing the next item overlaps with consuming the current one.
+    A producer exception is raised in the consumer; closing the consumer stops the producer.
+    """
+    results = queue.Queue(maxsize=maxsize)
+    stop = threading.Event()
+
+    def put(item) -> bool:
+        while not stop.is_set():
+            try:
+                results.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def produce():
+        try:
+            for item in items:
+                if not put(item):
+                    return
+        except BaseException as e:
+            put(e)
+            return
+        put(_DONE)
+
+    thread = threading.Thread(target=produce, daemon=True, name="producer")
+    thread.start()
+    try:
+        while True:
+            item = results.get()
+            if item is _DONE:
+                return
+            if isinstance(item, BaseException):
+                raise item
+            yield item
+    finally:
+        stop.set()
+
+
+def transcribe_to_file(transcriber, segments: Iterable, path: str, pieces: Optional[List[str]] = None) -> Iterator[str]:
+    """
+    Transcribes segments one by one, appending each text to `path` as it is produced,
+    and yields it for the summarizer. Texts are also collected in `pieces` when given
+    (library indexing), so the file never has to be read back.
+    """
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        for i, text in enumerate(transcriber.iter_segments(segments)):
+            f.write(("\n\n" if i else "") + text)
+            f.flush()
+            if pieces is not None:
+                pieces.append(text)
+            yield text
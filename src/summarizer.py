@@ -1,16 +1,52 @@
-from typing import List
+from typing import Iterable, List, Union
+import os
 import re
 import time
 from tqdm import tqdm
 
 from utils import write_data
+from budget import BudgetPlanner, estimate_tokens, NUM_PREDICT
+from streaming import StreamingChunker
+
+# How long Ollama keeps the model loaded between calls ("30m", "-1" = forever)
+KEEP_ALIVE = os.getenv("OLLAMA_KEEP_ALIVE", "30m")
 
 class Summarizer:
-    def __init__(self, client, model: str, prompt_manager, summary_type: str = "short"):
+    def __init__(self, client, model: str, prompt_manager, summary_type: str = "short", budget: BudgetPlanner = None, keep_alive: str = KEEP_ALIVE):
         self.client = client
         self.model = model
         self.summary_type = summary_type
         self.prompt_manager = prompt_manager
+        self.budget = budget or BudgetPlanner()
+        self.keep_alive = keep_alive
+
+    def _chat(self, messages: Union[str, list], task: str, source_text: str = None, min_ctx: int = None, **kwargs) -> str:
+        """Sends messages to Ollama with a context/output budget sized for the task."""
+        if isinstance(messages, str):
+            messages = [{"role": "user", "content": messages}]
+        options = self.budget.plan(messages, task, source_text=source_text, min_ctx=min_ctx)
+        options.update(kwargs.pop("options", {}))
+        response = self.client.chat(model=self.model, messages=messages, options=options, keep_alive=self.keep_alive, **kwargs)
+        return response["message"]["content"]
+
+    def _chunk_ctx_floor(self) -> int:
+        """
+        Context needed by the largest chunk of the current summary type.
+        Using it for every chunk keeps num_ctx constant, so Ollama neither
+        reloads the model nor drops the cached system-prompt prefix between chunks.
+        """
+        system = self.prompt_manager.get_system_prompt(self.summary_type, "chunk")
+        return estimate_tokens(system) + estimate_tokens("x" * self._get_chunk_size()) + NUM_PREDICT["chunk"]
+
+    def warm_up(self) -> bool:
+        """Loads the model and primes the KV cache with the chunk system prompt."""
+        messages = self.prompt_manager.get_messages(self.summary_type, "chunk", "")
+        try:
+            self._chat(messages, "chunk", min_ctx=self._chunk_ctx_floor(), options={"num_predict": 1})
+            return True
+        except Exception as e:
+            print(f"Warning: LLM warm-up failed: {e}")
+            return False
 
     def _get_chunk_size(self) -> int:
         if self.summary_type == "long":
@@ -22,37 +58,30 @@ class Summarizer:
         return 6000
 
     def generate_global_analysis(self, text: str, context: str = "") -> str:
-        prompt = self.prompt_manager.get_prompt("analysis", "global", text)
-        response = self.client.chat(model=self.model, messages=[{"role": "user", "content": prompt}], options={"num_ctx": 8192, "num_predict":-1})
-        return self._reformat_to_paragraphs(response["message"]["content"])
+        messages = self.prompt_manager.get_messages("analysis", "global", text)
+        return self._reformat_to_paragraphs(self._chat(messages, "global"))
 
     def summarize_chunk(self, text: str) -> str:
-        prompt = self.prompt_manager.get_prompt(self.summary_type, "chunk", text)
-        response = self.client.chat(model=self.model, messages=[{"role": "user", "content": prompt}], options={"num_ctx": 8192, "num_predict":-1})
-        return self._reformat_to_paragraphs(response["message"]["content"])
+        messages = self.prompt_manager.get_messages(self.summary_type, "chunk", text)
+        return self._reformat_to_paragraphs(self._chat(messages, "chunk", min_ctx=self._chunk_ctx_floor()))
 
 
     def summarize_text(self, text: str, author: str) -> str:
-        prompt = self.prompt_manager.get_prompt(self.summary_type, "full_text", text)
-        response = self.client.chat(model=self.model, messages=[{"role": "user", "content": prompt}], options={"num_ctx": 8192, "num_predict":-1})
-        return self._reformat_to_paragraphs(response["message"]["content"])
+        messages = self.prompt_manager.get_messages(self.summary_type, "full_text", text)
+        return self._reformat_to_paragraphs(self._chat(messages, "full_text"))
 
 
     def summarize_multi_texts(self, search: str, text: str) -> str:
-        prompt = self.prompt_manager.get_prompt(self.summary_type, "multi", {'search': search, 'content': text})
-        response = self.client.chat(model=self.model, messages=[{"role": "user", "content": prompt}], options={"num_ctx": 8192, "num_predict":-1})
-        return self._reformat_to_paragraphs(response["message"]["content"])
+        messages = self.prompt_manager.get_messages(self.summary_type, "multi", {'search': search, 'content': text})
+        return self._reformat_to_paragraphs(self._chat(messages, "multi"))
 
 
     def _reformat_to_paragraphs(self, text: str) -> str:
         """
         Uses the LLM to rewrite the text, specifically transforming bullet points into paragraphs.
         """
-        prompt = f"""
-        Tu es un éditeur expert. Ta mission est de reformuler le texte suivant pour améliorer sa fluidité.
-        
-        Texte à traiter :
-        {text}
+        system = """
+        Tu es un éditeur expert. Ta mission est de reformuler le texte fourni dans le message suivant pour améliorer sa fluidité.
         
         CONSIGNES STRICTES :
         1. **TRANSFORME TOUTES LES LISTES À PUCES EN PARAGRAPHES**. C'est ta priorité absolue.
@@ -63,21 +92,21 @@ class Summarizer:
         6. Ne fais AUCUN commentaire (pas de "Voici le texte", "J'ai reformulé...").
         7. Renvoie UNIQUEMENT le texte réécrit.
         """
+        messages = [
+            {"role": "system", "content": system.strip()},
+            {"role": "user", "content": f"Texte à traiter :\n{text}"},
+        ]
         
         try:
-            response = self.client.chat(model=self.model, messages=[{"role": "user", "content": prompt}], options={"num_ctx": 8192, "num_predict":-1})
-            return response["message"]["content"].strip()
+            return self._chat(messages, "reformat", source_text=text).strip()
         except Exception as e:
             print(f"Error in LLM reformat: {e}")
             return text.strip()
 
     def enhance_markdown(self, text: str)-> str:
-        prompt = f"""
+        system = """
             Tu es une MACHINE DE FORMATAGE MARKDOWN. Tu n'es PAS un humain. Tu n'es PAS un critique littéraire.
-            Ta SEULE et UNIQUE fonction est de prendre le texte en entrée et de le reformater en Markdown propre.
-
-            Texte à traiter :
-            {text}
+            Ta SEULE et UNIQUE fonction est de prendre le texte en entrée (message suivant) et de le reformater en Markdown propre.
 
             CONSIGNES ABSOLUES :
             1.  **RECOPIE ET FORMATE** le texte complet. Ne change PAS le sens. Ne supprime PAS d'informations.
@@ -93,27 +122,35 @@ class Summarizer:
 
             FORMATAGE UNIQUEMENT. COMMENCE MAINTENANT.
             """
-        response = self.client.chat(model=self.model, messages=[{"role": "user", "content": prompt}], options={"num_ctx": 8192, "num_predict":-1})
-        return self._reformat_to_paragraphs(response["message"]["content"])
+        messages = [
+            {"role": "system", "content": system.strip()},
+            {"role": "user", "content": f"Texte à traiter :\n{text}"},
+        ]
+        return self._reformat_to_paragraphs(self._chat(messages, "enhance", source_text=text))
 
 
-    def check_synthese(self, text: str, subject: str):
-        prompt = f"""
+    def check_synthese(self, text: str, subject: str, max_chars: int = 3000):
+        """
+        Asks the LLM whether the text covers the subject.
+        Only an excerpt is sent and the answer is constrained to a tiny JSON object,
+        to be parsed with validator.parse_verdict (never eval).
+        """
+        system = """
             Tu es un validateur automatique.
-            Ton rôle est de vérifier si le texte fourni traite principalement du sujet demandé.
-
-            Sujet attendu : {subject}
-            Texte à analyser : {text}
+            Ton rôle est de vérifier si le texte fourni (message suivant) traite principalement du sujet demandé.
 
             Consigne stricte :
             - Ignore les formules de politesse ou d'introduction du texte à analyser.
             - Concentre-toi sur le FOND : est-ce que ça parle du sujet ?
-            - Si le texte traite du sujet demandé (même partiellement), réponds : True
-            - Si le texte est HORS SUJET ou parle de tout autre chose, réponds : False
-            - Réponds UNIQUEMENT par True ou False.
+            - Si le texte traite du sujet demandé (même partiellement), réponds : {"pertinent": true}
+            - Si le texte est HORS SUJET ou parle de tout autre chose, réponds : {"pertinent": false}
+            - Réponds UNIQUEMENT avec cet objet JSON.
             """
-        response = self.client.chat(model=self.model, messages=[{"role": "user", "content": prompt}], options={"num_ctx": 8192, "num_predict":-1})
-        return response["message"]["content"]
+        messages = [
+            {"role": "system", "content": system.strip()},
+            {"role": "user", "content": f"Sujet attendu : {subject}\nTexte à analyser (extrait) : {text[:max_chars]}"},
+        ]
+        return self._chat(messages, "validation", format="json", options={"temperature": 0})
 
 
     def chunk_text(self, text: str) -> List[str]:
@@ -141,6 +178,28 @@ class Summarizer:
 
     def summarize_long_text(self, text: str, author: str) -> str:
         text_parts = self.sumarize_part_chunk(text)
+        return self._save_parts(text_parts, author)
+
+    def summarize_stream(self, texts: Iterable[str], author: str) -> str:
+        """
+        Same result as summarize_long_text("\n\n".join(texts)), but each chunk is
+        summarized as soon as enough text has arrived (e.g. while Whisper transcribes
+        the next segments in a producer thread).
+        """
+        chunker = StreamingChunker(self._get_chunk_size())
+        partial_summaries = []
+        progress = tqdm(desc="Analyse des chunks", unit="chunk")
+        for text in texts:
+            for chunk in chunker.feed(text):
+                partial_summaries.append(self.summarize_chunk(chunk))
+                progress.update()
+        for chunk in chunker.flush():
+            partial_summaries.append(self.summarize_chunk(chunk))
+            progress.update()
+        progress.close()
+        return self._save_parts(partial_summaries, author)
+
+    def _save_parts(self, text_parts: List[str], author: str) -> str:
         text = "\n\n".join(text_parts)
         current_time = time.localtime()
         formatted_time = time.strftime("%H-%M-%S", current_time)
@@ -152,17 +211,11 @@ class Summarizer:
         return text.strip()
 
     def refine_summary(self, current_summary: str, instructions: str) -> str:
-        prompt = f"""
+        system = """
         Tu es un assistant de rédaction expert.
         
-        Texte actuel :
-        {current_summary}
-        
-        Consigne de réécriture / modification :
-        {instructions}
-        
         Ta tâche :
-        Réécris ou modifie le texte actuel pour respecter la consigne donnée.
+        Réécris ou modifie le texte actuel (fourni dans le message suivant) pour respecter la consigne donnée.
         
         OBJECTIFS :
         - Conserver le sens et les informations clés (sauf si la consigne demande de raccourcir drastiquement).
@@ -173,5 +226,8 @@ class Summarizer:
         - PAS de méta-commentaires ("Voici le texte modifié", "J'ai appliqué...").
         - SORTIE PURE : Uniquement le nouveau texte.
         """
-        response = self.client.chat(model=self.model, messages=[{"role": "user", "content": prompt}], options={"num_ctx": 8192, "num_predict":-1})
-        return self._reformat_to_paragraphs(response["message"]["content"])
+        messages = [
+            {"role": "system", "content": system.strip()},
+            {"role": "user", "content": f"Texte actuel :\n{current_summary}\n\nConsigne de réécriture / modification :\n{instructions}"},
+        ]
+        return self._reformat_to_paragraphs(self._chat(messages, "refine", source_text=current_summary))
@@ -1,17 +1,33 @@
-
-import whisper
 import os
 import time
+from typing import Iterable, Iterator, Optional, Union
+
+import numpy as np
+
+from backends import TRANSCRIBE_BACKEND, Transcription, TranscriptionBackend, create_backend
+from decoding import WHISPER_LANGUAGE, WHISPER_PROFILE, decode_options, get_profile
 
 class WhisperTranscriber:
-    def __init__(self, model_size: str, device: str):
+    def __init__(self, model_size: str, device: str, profile: str = WHISPER_PROFILE, language: Optional[str] = WHISPER_LANGUAGE,
+                 backend: Union[str, TranscriptionBackend] = TRANSCRIBE_BACKEND):
         self.model_size = model_size
         self.device = device
-        self.model = whisper.load_model(model_size, device=device)
+        self.profile = get_profile(profile)
+        self.language = language
+        self.backend = create_backend(backend, model_size, device) if isinstance(backend, str) else backend
 
-    def transcribe_audio(self, audio_file: str) -> str:
-        result = self.model.transcribe(audio_file)
-        return result['text']
+    def detect_language(self, audio_file: Union[str, np.ndarray]) -> str:
+        """Language of the first 30 seconds."""
+        return self.backend.detect_language(audio_file)
+
+    def transcribe_detailed(self, audio_file: Union[str, np.ndarray], language: Optional[str] = None) -> Transcription:
+        """Text plus timestamped segments, identical in shape whatever the backend."""
+        options = decode_options(self.profile, self.device, language or self.language)
+        return self.backend.transcribe(audio_file, options)
+
+    def transcribe_audio(self, audio_file: Union[str, np.ndarray], language: Optional[str] = None) -> str:
+        """Accepts a file path or 16 kHz mono float32 samples (no ffmpeg spawn for arrays)."""
+        return self.transcribe_detailed(audio_file, language).text
 
     @staticmethod
     def extract_subtitles(srt_content: str) -> str:
@@ -45,13 +61,22 @@ class WhisperTranscriber:
             
         return " ".join(clean_text)
 
-    def transcribe_segments(self, segments: list[str]) -> list[str]:
-        text_results = []
+    def iter_segments(self, segments: Iterable) -> Iterator[str]:
+        """Yields the text of each segment as soon as it is transcribed; segments may be a generator."""
         start_time = time.time()
+        total = len(segments) if hasattr(segments, "__len__") else "?"
+        # Detected once for the whole video instead of once per segment
+        language = self.language
+        count = 0
         for i, segment in enumerate(segments):
-            print(f"Traitement du segment {i+1}/{len(segments)} en cours...")
-            transcription = self.transcribe_audio(segment)
-            text_results.append(transcription)
+            if language is None and total != 1:
+                language = self.detect_language(segment)
+                print(f"DEBUG: detected language '{language}' for the whole video")
+            print(f"Traitement du segment {i+1}/{total} en cours...")
+            yield self.transcribe_audio(segment, language=language)
+            count += 1
         elapsed = time.time() - start_time
-        print(f"\n✅ Transcription terminée : {len(segments)} segments traités en {elapsed:.2f} secondes")
-        return text_results
+        print(f"\n✅ Transcription terminée : {count} segments traités en {elapsed:.2f} secondes (profil {self.profile}, moteur {self.backend.name})")
+
+    def transcribe_segments(self, segments: list) -> list[str]:
+        return list(self.iter_segments(segments))
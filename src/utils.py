@@ -75,6 +75,15 @@ def write_data(output_dir, data, seg):
 
 
 
+def save_stream(fileobj, path: str, chunk_size: int = 1024 * 1024) -> str:
+    """Copies a file-like object (e.g. an upload) to disk by blocks, without building a second copy in memory."""
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    if hasattr(fileobj, "seek"):
+        fileobj.seek(0)
+    with open(path, "wb") as f:
+        shutil.copyfileobj(fileobj, f, length=chunk_size)
+    return path
+
 def clean_files(list_path: List[str]):
     for path in list_path:
         if os.path.exists(path):
@@ -0,0 +1,105 @@
+import json
+import re
+import unicodedata
+from typing import Callable, Optional
+
+# Words that carry no topical signal (French/English function words and the
+# generic vocabulary users put in titles such as "Synthèse Vidéo").
+STOPWORDS = {
+    "les", "des", "une", "un", "le", "la", "de", "du", "et", "ou", "en", "au", "aux",
+    "sur", "pour", "par", "dans", "avec", "sans", "que", "qui", "quoi", "dont", "est",
+    "sont", "ces", "cet", "cette", "son", "sa", "ses", "leur", "leurs", "mon", "ma",
+    "mes", "nos", "vos", "pas", "plus", "moins", "tres", "tout", "tous", "toute",
+    "toutes", "fais", "faire", "fait", "rediger", "redige", "focalisee", "focalise",
+    "sujet", "angle", "synthese", "syntheses", "analytique", "globale", "global",
+    "video", "videos", "resume", "document", "final", "manuelle",
+    "the", "and", "for", "with", "about", "this", "that", "from", "are", "was",
+    "what", "how", "why", "summary",
+}
+
+MIN_TERM_LENGTH = 3
+STEM_LENGTH = 6
+
+
+def fold(text: str) -> str:
+    """Lowercases text and strips accents ("Économie" -> "economie")."""
+    text = unicodedata.normalize("NFKD", text.lower())
+    return "".join(c for c in text if not unicodedata.combining(c))
+
+
+def extract_terms(text: str) -> set:
+    """Returns the stemmed content words of a text."""
+    words = re.findall(r"[a-z0-9]+", fold(text))
+    return {
+        w[:STEM_LENGTH]
+        for w in words
+        if len(w) >= MIN_TERM_LENGTH and w not in STOPWORDS
+    }
+
+
+def parse_verdict(raw: str) -> Optional[bool]:
+    """
+    Parses a True/False answer from the LLM without eval().
+    Accepts JSON ({"pertinent": true}) as well as free text ("True.", "Vrai", "non").
+    Returns None when no verdict can be found.
+    """
+    raw = (raw or "").strip()
+    try:
+        data = json.loads(raw)
+        if isinstance(data, bool):
+            return data
+        if isinstance(data, dict):
+            for value in data.values():
+                if isinstance(value, bool):
+                    return value
+                if isinstance(value, str):
+                    return parse_verdict(value)
+    except (ValueError, TypeError):
+        pass
+
+    match = re.search(r"\b(true|vrai|oui|yes|false|faux|non|no)\b", fold(raw))
+    if not match:
+        return None
+    return match.group(1) in ("true", "vrai", "oui", "yes")
+
+
+class RelevanceValidator:
+    """
+    Checks that a generated synthesis actually covers the requested subject.
+
+    The main score is a local keyword overlap between the subject and the text,
+    so no extra LLM pass is needed. An optional LLM check (constrained JSON
+    answer, a few tokens) is only used when the local score is borderline.
+    """
+
+    def __init__(self, threshold: float = 0.5, margin: float = 0.15, llm_check: Optional[Callable[[str, str], str]] = None):
+        self.threshold = threshold
+        self.margin = margin
+        self.llm_check = llm_check
+
+    def score(self, text: str, subject: str) -> float:
+        """Fraction of the subject's content words found in the text (0.0 - 1.0)."""
+        subject_terms = extract_terms(subject or "")
+        if not subject_terms:
+            return 1.0
+        text_terms = extract_terms(text or "")
+        hits = len(subject_terms & text_terms)
+        return hits / len(subject_terms)
+
+    def validate(self, text: str, subject: str) -> bool:
+        if not text or not text.strip():
+            return False
+
+        score = self.score(text, subject)
+        print(f"DEBUG: Relevance score {score:.2f} (threshold {self.threshold:.2f})")
+
+        borderline = abs(score - self.threshold) < self.margin
+        if borderline and self.llm_check:
+            try:
+                verdict = parse_verdict(self.llm_check(text, subject))
+                if verdict is not None:
+                    return verdict
+            except Exception as e:
+                print(f"DEBUG: LLM relevance check failed: {e}")
+
+        return score >= self.threshold
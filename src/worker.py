@@ -0,0 +1,144 @@
+"""
+Worker daemon: pulls transcription / summarization tasks from the broker.
+
+On the machine that holds the broker database:
+    python src/worker.py --kinds transcribe summarize
+On other nodes, through the broker server (the audio folder must be shared):
+    python src/worker.py --broker-url http://broker-host:8700 --kinds transcribe summarize
+"""
+import argparse
+import os
+import socket
+import threading
+import time
+import uuid
+from typing import Callable, Dict, Optional
+
+from dotenv import load_dotenv
+
+from broker import BROKER_DB, BROKER_URL, BrokerClient, BrokerUnavailable, TaskBroker
+from decoding import DECODING_PROFILES, WHISPER_PROFILE
+
+load_dotenv()
+
+DEVICE = os.getenv("DEVICE", "cpu")
+MODEL = os.getenv("MODEL", "medium")
+OLLAMA_HOST = os.getenv("OLLAMA_HOST", "http://localhost:11434")
+OLLAMA_MODEL = os.getenv("OLLAMA_MODEL", "gemma3:4b")
+WORKER_POLL_INTERVAL = float(os.getenv("WORKER_POLL_INTERVAL", "1"))
+
+
+class Worker:
+    """Leases tasks, runs the matching handler and renews the lease while it runs."""
+
+    def __init__(self, broker: TaskBroker, handlers: Dict[str, Callable[[dict], object]], worker_id: Optional[str] = None,
+                 poll_interval: float = WORKER_POLL_INTERVAL, heartbeat_interval: Optional[float] = None):
+        self.broker = broker
+        self.handlers = handlers
+        self.worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:6]}"
+        self.poll_interval = poll_interval
+        self.heartbeat_interval = heartbeat_interval or broker.lease_seconds / 3
+        self.stop_event = threading.Event()
+        self.processed = 0
+
+    def _heartbeat(self, task_id: str, done: threading.Event, lost: threading.Event):
+        while not done.wait(self.heartbeat_interval):
+            try:
+                renewed = self.broker.heartbeat(task_id, self.worker_id)
+            except BrokerUnavailable as e:
+                # Broker unreachable for a moment: the lease survives until it expires
+                print(f"DEBUG: heartbeat of {task_id} failed: {e}")
+                continue
+            if not renewed:
+                print(f"DEBUG: worker {self.worker_id} lost the lease of {task_id}")
+                lost.set()
+                return
+
+    def run_once(self) -> bool:
+        """Processes at most one task. Returns False when the queue was empty."""
+        task = self.broker.lease(self.worker_id, self.handlers.keys())
+        if task is None:
+            return False
+
+        print(f"DEBUG: worker {self.worker_id} runs {task.kind} {task.id} (attempt {task.attempts})")
+        done, lost = threading.Event(), threading.Event()
+        beat = threading.Thread(target=self._heartbeat, args=(task.id, done, lost), daemon=True)
+        beat.start()
+        try:
+            result = self.handlers[task.kind](task.payload)
+        except Exception as e:
+            done.set()
+            print(f"DEBUG: task {task.id} failed: {e}")
+            self.broker.fail(task.id, self.worker_id, str(e))
+        else:
+            done.set()
+            # A lost lease means the task was re-delivered: the other worker's result wins
+            if not lost.is_set():
+                self.broker.complete(task.id, self.worker_id, result)
+        beat.join()
+        self.processed += 1
+        return True
+
+    def run_forever(self, max_tasks: Optional[int] = None):
+        while not self.stop_event.is_set():
+            if max_tasks is not None and self.processed >= max_tasks:
+                break
+            try:
+                busy = self.run_once()
+            except BrokerUnavailable as e:
+                print(f"DEBUG: worker {self.worker_id} cannot reach the broker: {e}")
+                busy = False
+            if not busy:
+                self.stop_event.wait(self.poll_interval)
+
+    def stop(self):
+        self.stop_event.set()
+
+
+def build_handlers(kinds, device: str = DEVICE, model: str = MODEL, profile: str = WHISPER_PROFILE) -> Dict[str, Callable]:
+    """Loads the models needed by the requested task kinds, once per worker."""
+    handlers = {}
+    if "transcribe" in kinds:
+        from transcriber import WhisperTranscriber
+
+        transcriber = WhisperTranscriber(model_size=model, device=device, profile=profile)
+        handlers["transcribe"] = lambda payload: transcriber.transcribe_audio(payload["path"])
+    if "summarize" in kinds:
+        from ollama import Client
+        from prompts import PromptManager
+        from summarizer import Summarizer
+
+        client, prompt_manager, summarizers = Client(host=OLLAMA_HOST), PromptManager(), {}
+
+        def summarize(payload):
+            # The app sends its Ollama model and summary type with the text
+            key = (payload.get("model") or OLLAMA_MODEL, payload.get("summary_type") or "short")
+            if key not in summarizers:
+                summarizers[key] = Summarizer(client, key[0], prompt_manager=prompt_manager, summary_type=key[1])
+            return summarizers[key].summarize_long_text(payload["text"], payload.get("author", ""))
+
+        handlers["summarize"] = summarize
+    return handlers
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Worker de transcription / résumé distribué")
+    parser.add_argument("--kinds", nargs="+", default=["transcribe"], choices=["transcribe", "summarize"], help="Types de tâches acceptées")
+    parser.add_argument("--broker-url", default=BROKER_URL, help="Serveur du broker (python src/broker.py) pour les autres machines")
+    parser.add_argument("--db", default=BROKER_DB, help="Base SQLite du broker, si elle est sur cette machine")
+    parser.add_argument("--device", default=DEVICE, help="Choix du device (cpu ou cuda)")
+    parser.add_argument("--model", default=MODEL, help="Taille du modèle Whisper")
+    parser.add_argument("--profile", default=WHISPER_PROFILE, choices=list(DECODING_PROFILES), help="Profil de décodage Whisper")
+    args = parser.parse_args()
+
+    broker = BrokerClient(args.broker_url) if args.broker_url else TaskBroker(args.db)
+    worker = Worker(broker, build_handlers(args.kinds, args.device, args.model, args.profile))
+    print(f"Worker {worker.worker_id} prêt sur {args.broker_url or args.db}")
+    try:
+        worker.run_forever()
+    except KeyboardInterrupt:
+        worker.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,7 @@
 import os
 import datetime
+import threading
+import uuid
 import warnings
 from pathlib import Path
 from rich.console import Console
@@ -10,8 +12,16 @@ from downloader import YouTubeAudioProcessor
 from transcriber import WhisperTranscriber
 from summarizer import Summarizer
 from exporter import Exporter
-from utils import clean_files, time_since
+from utils import clean_files, slugify, time_since
 from prompts import PromptManager
+from validator import RelevanceValidator
+from search_cache import SearchCache, SearchEntry, make_search_key
+from channels import get_matcher
+from ranking import FeatureTable, RankingEngine
+from dedup import SentenceDeduplicator
+from retrieval import ChunkRetriever, OllamaEmbedder
+from captions import is_usable_caption
+from streaming import in_background, transcribe_to_file
 
 # Load environment variables
 load_dotenv()
@@ -25,21 +35,41 @@ OLLAMA_HOST = os.getenv("OLLAMA_HOST", "http://localhost:11434")
 OLLAMA_MODEL = os.getenv("OLLAMA_MODEL", "gemma3:4b")
 FFMPEG_DIR = os.getenv("FFMPEG")
 DEBUG = os.getenv("DEBUG", "False")
+RELEVANCE_THRESHOLD = float(os.getenv("RELEVANCE_THRESHOLD", "0.5"))
+RELEVANCE_LLM_CHECK = os.getenv("RELEVANCE_LLM_CHECK", "False").lower() in ("1", "true", "yes")
+OLLAMA_WARMUP = os.getenv("OLLAMA_WARMUP", "True").lower() in ("1", "true", "yes")
+FOCUSED_RETRIEVAL = os.getenv("FOCUSED_RETRIEVAL", "False").lower() in ("1", "true", "yes")
+# Transcripts of local files are written here as they are produced (wiped by cleanup)
+TRANSCRIPT_DIR = "./segments_text"
+# Start the audio download while captions are fetched, cancel it once captions are usable.
+# Off by default: it costs bandwidth and a metadata request on every video that has captions.
+SPECULATIVE_AUDIO = os.getenv("SPECULATIVE_AUDIO", "False").lower() in ("1", "true", "yes")
 
 if FFMPEG_DIR:
     os.environ["PATH"] += os.pathsep + FFMPEG_DIR
 
 warnings.filterwarnings("ignore")
 
-from config import PREFERRED_CHANNELS
-
 class WorkflowManager:
-    def __init__(self, processor, transcriber, summarizer, exporter):
+    def __init__(self, processor, transcriber, summarizer, exporter, validator=None, search_cache=None, library=None, retriever=None):
         # Dependencies injected
         self.processor = processor
         self.transcriber = transcriber
         self.summarizer = summarizer
         self.exporter = exporter
+        if validator is None:
+            llm_check = summarizer.check_synthese if RELEVANCE_LLM_CHECK else None
+            validator = RelevanceValidator(threshold=RELEVANCE_THRESHOLD, llm_check=llm_check)
+        self.validator = validator
+        # Shared by every Streamlit session (the manager is a cached resource)
+        self.search_cache = search_cache or SearchCache()
+        self.ranking = RankingEngine()
+        self._feature_tables = {}
+        self.library = library if library is not None else getattr(exporter, "library", None)
+        self.deduplicator = SentenceDeduplicator()
+        if retriever is None and FOCUSED_RETRIEVAL:
+            retriever = ChunkRetriever(OllamaEmbedder(summarizer.client))
+        self.retriever = retriever
 
     def _log_debug(self, var_name, content):
         """Helper to log variables to a file if DEBUG is enabled."""
@@ -55,6 +85,34 @@ class WorkflowManager:
             except Exception as e:
                 print(f"Failed to write to debug log: {e}")
 
+    def _index(self, kind, content, **meta):
+        """Adds a transcript or summary to the library (never blocks processing)."""
+        if self.library is None:
+            return None
+        try:
+            return self.library.add(kind, content, **meta)
+        except Exception as e:
+            print(f"DEBUG: library indexing failed ({kind}): {e}")
+            return None
+
+    @staticmethod
+    def _notify(progress, stage, message, output=None):
+        """Reports a processing step to an optional callback (API jobs stream them to clients)."""
+        if progress is None:
+            return
+        try:
+            progress(stage, message, output)
+        except Exception as e:
+            print(f"DEBUG: progress callback failed: {e}")
+
+    def warm_up(self):
+        """Loads the Ollama model in the background while videos are fetched/transcribed."""
+        if not OLLAMA_WARMUP:
+            return None
+        thread = threading.Thread(target=self.summarizer.warm_up, daemon=True)
+        thread.start()
+        return thread
+
     def get_video_text(self, url):
         """Extracts text from a video (subtitles or audio transcription)."""
         # Check if it's a local file
@@ -62,36 +120,53 @@ class WorkflowManager:
             try:
                 video_path = Path(url)
                 # Use processor to extract audio/split
-                segments = self.processor.extract_audio_from_mp4(video_path)
-                # Transcribe segments
-                texts = self.transcriber.transcribe_segments(segments)
+                with self.processor.audio_segments(video_path) as segments:
+                    # Transcribe segments (decoded one at a time)
+                    texts = self.transcriber.transcribe_segments(segments)
                 result = "\n".join(texts)
                 
                 title = video_path.stem
                 author = "Fichier Local"
                 date = datetime.datetime.now().strftime("%Y-%m-%d")
                 method = "local_mp4"
+                self._index("transcript", result, title=title, author=author, url=str(video_path.absolute()), published=date, method=method)
                 return result, title, author, date, method
             except Exception as e:
                 print(f"Error processing local file: {e}")
                 # Fallback to default (might retry as URL or fail)
 
-        code = self.processor.check_subtitles(url)
-        if code:
-            subtitles_file, title, author, date = self.processor.get_subtitles(url, code)
-            result = self.transcriber.extract_subtitles(subtitles_file)
-            method = "subtitles"
+        download = self.processor.download_audio_async(url) if SPECULATIVE_AUDIO else None
+        try:
+            captions = self.processor.fetch_subtitles(url)
+            result = self.transcriber.extract_subtitles(captions[0]) if captions else ""
+        except Exception:
+            if download is not None:
+                download.cancel()
+            raise
+
+        if is_usable_caption(result):
+            if download is not None:
+                download.cancel()
+            _, title, author, date, method = captions
         else:
-            audio_file, title, author, date = self.processor.download_audio(url)
+            if captions:
+                print(f"DEBUG: captions of {url} too short ({len(result)} chars), using audio")
+            audio = download.result() if download is not None else None
+            audio_file, title, author, date = audio or self.processor.download_audio(url)
             result = self.transcriber.transcribe_audio(audio_file)
             method = "audio"
-        
+
+        self._index("transcript", result, title=title, author=author, url=url, published=date, method=method)
         return result, title, author, date, method
 
-    def process_single_video(self, url):
+    def process_single_video(self, url, progress=None):
         """Processes a single video and returns the summary."""
+        self.warm_up()
+        self._notify(progress, "transcript", f"Récupération du texte : {url}")
         text, title, author, date, method = self.get_video_text(url)
+        self._notify(progress, "summary", f"Résumé de {title}")
         summary = self.summarizer.summarize_long_text(text, author)
+        self._notify(progress, "done", title, output=summary)
         
         source_info = [{"title": title, "url": url, "date": date}]
         return summary, title, source_info
@@ -114,16 +189,26 @@ class WorkflowManager:
         """Checks if a channel is in the preferred list for the active categories."""
         if not channel_name:
             return False
-            
-        # If no categories are active, check ALL preferred channels
-        categories_to_check = active_categories if active_categories else PREFERRED_CHANNELS.keys()
-            
-        for category in categories_to_check:
-            if category in PREFERRED_CHANNELS:
-                for preferred in PREFERRED_CHANNELS[category]:
-                    if preferred.lower() in channel_name.lower():
-                        return True
-        return False
+        # If no categories are active, the matcher covers ALL preferred channels
+        return get_matcher(active_categories).is_preferred(channel_name)
+
+    def rank_results(self, videos, query="", duration_mode="any", active_categories=None, weights=None):
+        """Sorts videos by weighted relevance score. Features are extracted once per result set."""
+        urls = [v.watch_url for v in videos]
+        # Keyed on the set: the same results in another order (e.g. after load_more) reuse their features.
+        # Weights only apply at scoring time, so they are not part of the key
+        key = (frozenset(urls), query, tuple(sorted(active_categories or [])))
+        table = self._feature_tables.get(key)
+        if table is None:
+            if len(self._feature_tables) > 32:
+                self._feature_tables.clear()
+            table = FeatureTable.from_videos(videos, query, active_categories)
+            self._feature_tables[key] = table
+        elif [v.watch_url for v in table.videos] != urls:
+            # Ties keep the current search order
+            table = table.reorder(videos)
+        engine = RankingEngine(weights) if weights else self.ranking
+        return engine.rank(table, duration_mode)
 
     def _filter_and_boost_videos(self, videos, duration_mode="any", active_categories=None, enable_boost=True, days_limit=None):
         """Filters videos and applies boosting logic for preferred channels."""
@@ -137,7 +222,7 @@ class WorkflowManager:
         regular = []
         
         for v in filtered:
-            # Monkey-patching for UI
+            # VideoMeta records carry the flag for the UI
             is_fav = self.is_channel_preferred(v.author, active_categories)
             v.is_boosted = is_fav 
             
@@ -157,7 +242,7 @@ class WorkflowManager:
         
         # Helper to count boosted
         def count_boosted(videos):
-            return sum(1 for v in videos if getattr(v, 'is_boosted', False))
+            return sum(1 for v in videos if v.is_boosted)
 
         attempts = 0
         max_attempts = 3
@@ -201,8 +286,8 @@ class WorkflowManager:
                 # Let's just manually re-sort 'combined' based on is_boosted.
                 
                 if enable_boost:
-                    boosted = [v for v in combined if getattr(v, 'is_boosted', False)]
-                    regular = [v for v in combined if not getattr(v, 'is_boosted', False)]
+                    boosted = [v for v in combined if v.is_boosted]
+                    regular = [v for v in combined if not v.is_boosted]
                     processed_videos = boosted + regular
                 else:
                     processed_videos = combined
@@ -219,28 +304,97 @@ class WorkflowManager:
             
         return processed_videos
 
-    def load_more_videos(self, search_obj, duration_mode="any", active_categories=None, enable_boost=True, days_limit=None):
-        """Fetches more videos for an existing search session."""
-        new_videos = self.processor.fetch_next(search_obj)
-        return self._filter_and_boost_videos(new_videos, duration_mode, active_categories, enable_boost, days_limit)
+    def search(self, query, sort_by="relevance", upload_date=None, exclude_terms=None, duration_mode="any", active_categories=None, enable_boost=True, days_limit=None):
+        """Returns (search_key, first page of results), served from the shared cache when possible."""
+        key = make_search_key(query, sort_by, upload_date, exclude_terms, duration_mode, active_categories, enable_boost, days_limit)
+        entry = self._get_search_entry(key)
+        return key, list(entry.pages[0]) if entry.pages else []
+
+    def load_more(self, search_key, page_index):
+        """Returns page `page_index` of a cached search; it is usually already prefetched."""
+        entry = self._get_search_entry(search_key)
+        with entry.lock:
+            # Blocks on a running prefetch instead of racing it on the Search object
+            while len(entry.pages) <= page_index and not entry.exhausted:
+                entry.add_page(*self._fetch_search_page(entry))
+            page = list(entry.pages[page_index]) if page_index < len(entry.pages) else []
+        self.search_cache.schedule_prefetch(entry, self._fetch_search_page)
+        return page
+
+    def _get_search_entry(self, key):
+        entry = self.search_cache.get(key)
+        if entry is None:
+            search_obj = self.init_search(key.query, key.sort_by, key.upload_date, key.exclude_terms)
+            entry = SearchEntry(key=key, search_obj=search_obj)
+            first_page = self.get_search_results(search_obj, key.duration_mode, list(key.active_categories), key.enable_boost, key.days_limit)
+            entry.add_page(first_page, len(search_obj.results))
+            self.search_cache.put(entry)
+            self.search_cache.schedule_prefetch(entry, self._fetch_search_page)
+        return entry
+
+    def _fetch_search_page(self, entry):
+        """Returns (filtered videos, size of the raw pytubefix page)."""
+        key = entry.key
+        try:
+            raw = self.processor.fetch_next(entry.search_obj)
+        except IndexError:
+            # pytubefix has no continuation left
+            return [], 0
+        return self._filter_and_boost_videos(raw, key.duration_mode, list(key.active_categories), key.enable_boost, key.days_limit), len(raw)
 
     def get_video_info(self, url):
         """Wrapper for processor.get_video_info"""
         return self.processor.get_video_info(url)
 
-    def synthesize_videos(self, selected_videos, search_term, title_doc):
+    def synthesize_videos(self, selected_videos, search_term, title_doc, progress=None):
         """Synthesizes multiple videos into a single document."""
+        self.warm_up()
         texts = []
         source_info = []
         final_search_term = search_term if search_term else "est de rédiger une SYNTHÈSE ANALYTIQUE GLOBALE"
         
         # 1. Pre-process all videos (transcribe + summarize individual) ONCE
         print("DEBUG: Starting batch processing of videos...")
+        # Speculative audio: the basket starts downloading together (bounded, shared bandwidth cap);
+        # get_video_text takes each download over and cancels it when captions are usable
+        if SPECULATIVE_AUDIO:
+            self.processor.prefetch_audio([video.watch_url for video in selected_videos])
+        transcripts = []
         for video in selected_videos:
             try:
-                text, title, author, date, method = self.get_video_text(video.watch_url)
+                self._notify(progress, "transcript", f"Récupération du texte : {video.title or video.watch_url}")
+                transcripts.append((video, *self.get_video_text(video.watch_url)))
+            except Exception as e:
+                print(f"Error processing video {video.watch_url}: {e}")
+                continue
+
+        # Focused request: only the passages relevant to the requested angle are summarized
+        passages = self._select_passages([text for _, text, *_ in transcripts], search_term)
+
+        to_summarize = []
+        for i, (video, text, title, author, date, method) in enumerate(transcripts):
+            if passages is not None:
+                if i not in passages:
+                    print(f"DEBUG: No passage relevant to '{search_term}' in {title}, skipped")
+                    continue
+                text = "\n\n[...]\n\n".join(passages[i])
+            to_summarize.append((video, text, title, author, date, method))
+
+        # Remote summarizer: every summary is queued at once, so several workers share the batch
+        queue = getattr(self.summarizer, "queue", None)
+        if queue is not None:
+            try:
+                queue([(text, author) for _, text, _, author, _, _ in to_summarize])
+            except Exception as e:
+                print(f"DEBUG: could not queue the summaries: {e}")
+
+        for video, text, title, author, date, method in to_summarize:
+            try:
+                self._notify(progress, "summary", f"Résumé de {title}")
                 video_summary = self.summarizer.summarize_long_text(text, author)
-                texts.append(f"Source : {title} (Auteur : {author}, Date: {date})\n{video_summary}")
+                self._notify(progress, "partial", title, output=video_summary)
+                self._index("summary", video_summary, title=title, author=author, url=video.watch_url, published=date, method=method)
+                texts.append((title, f"Source : {title} (Auteur : {author}, Date: {date})", video_summary))
                 source_info.append({"title": title, "url": video.watch_url, "date": video.publish_date})
             except Exception as e:
                 print(f"Error processing video {video.watch_url}: {e}")
@@ -250,7 +404,14 @@ class WorkflowManager:
         if not texts:
             raise Exception("No videos could be processed successfully.")
 
-        summary_of_texts = "\n\n== Text suivant ==".join(texts)
+        # Near-duplicate sentences across videos (same news story) are kept once, with their sources
+        deduped = self.deduplicator.dedup([(title, video_summary) for title, _, video_summary in texts])
+        before = sum(len(video_summary) for _, _, video_summary in texts)
+        after = sum(len(text) for text in deduped.texts)
+        print(f"DEBUG: Dedup removed {deduped.removed}/{deduped.total} sentences ({before} -> {after} chars)")
+        summary_of_texts = "\n\n== Text suivant ==".join(
+            f"{header}\n{text}" for (_, header, _), text in zip(texts, deduped.texts)
+        )
         
         # 2. Retry loop ONLY for the Global Analysis part
         # Pass instructions via a dict
@@ -261,17 +422,16 @@ class WorkflowManager:
         }
         
         global_analysis = ""
-        
-        for attempt in range(3): 
+        subject = f"{title_doc or ''} {final_search_term}".strip()
+
+        for attempt in range(3):
             print(f"DEBUG: Global Analysis Generation - Attempt {attempt+1}")
+            self._notify(progress, "analysis", f"Analyse globale (tentative {attempt+1})")
             try:
                 global_analysis = self.summarizer.generate_global_analysis(analysis_input, "global")
-                
-                # Validate if needed
-                check_valide_search = self.summarizer.check_synthese(global_analysis, title_doc)
-                check = eval(check_valide_search) # Caveat: eval is risky but kept as requested
-                
-                if check:
+
+                # Local relevance check (keyword overlap, LLM only on borderline scores)
+                if self.validator.validate(global_analysis, subject):
                     break
                 else:
                     print(f"DEBUG: Attempt {attempt+1} failed validation.")
@@ -280,311 +440,19 @@ class WorkflowManager:
         
         # Concatenate Global Analysis + Details
         full_summary = global_analysis
+        self._notify(progress, "done", title_doc or final_search_term, output=full_summary)
         
         return full_summary, final_search_term, source_info
 
-    def refine_summary(self, current_summary, instructions):
-        """Refines the summary based on user instructions."""
-        return self.summarizer.refine_summary(current_summary, instructions)
-
-    def get_refinement_instruction(self, size_opt, tone_opt, fmt_opt, lang_opt, custom_instr):
-        """Builds the instruction string via PromptManager."""
-        return self.summarizer.prompt_manager.get_refinement_instruction(size_opt, tone_opt, fmt_opt, lang_opt, custom_instr)
-
-
-    def process_video_path(self, video_path_str, title):
-        """Processes a local video file."""
-        video_path = Path(video_path_str)
-        segments = self.processor.extract_audio_from_mp4(video_path)
-        summary_segments = self.transcriber.transcribe_segments(segments)
-    
-        self._log_debug("TITLE", title)
-        self._log_debug("SEGMENTS", segments)
-        
-        full_text = "\n\n".join(summary_segments)
-        self._log_debug("SUMMARY_SEGMENTS", summary_segments)
-        
-    
-        detailed_summary = self.summarizer.summarize_long_text(full_text, author=title)
-        self._log_debug("DETAILED_SUMMARY", detailed_summary)
-        
-    
-        global_analysis = self.summarizer.generate_global_analysis(detailed_summary)
-        self._log_debug("GLOBAL_ANALYSIS", global_analysis)
-        final_output = f"{global_analysis}\n\n---\n\n# Détails des Sections\n\n{detailed_summary}"
-            
-        source_info = [{"title": title, "url": str(video_path.absolute())}]
-        return final_output, title, source_info
-
-    def save_summary(self, summary, title, fmt, source_info):
-        """Saves the summary using the exporter."""
-        return self.exporter.save_summary(summary, title, fmt, source_info)
-
-    def get_pdf_bytes(self, summary, title, source_info):
-        """Generates PDF bytes for download."""
-        return self.exporter.generate_pdf_bytes(summary, title, source_info)
-
-    def cleanup(self):
-        """Cleans up temporary files."""
-        list_path = ["./audio_segments", "./chunk_data", "./segments_text"]
-        clean_files(list_path)
-
-from pathlib import Path
-from rich.console import Console
-from rich.markdown import Markdown
-from dotenv import load_dotenv
-
-from downloader import YouTubeAudioProcessor
-from transcriber import WhisperTranscriber
-from summarizer import Summarizer
-from exporter import Exporter
-from utils import clean_files, time_since
-from prompts import PromptManager
-
-# Load environment variables
-load_dotenv()
-
-# Constants
-DEVICE = os.getenv("DEVICE", "cpu")
-MODEL = os.getenv("MODEL", "medium")
-OUTPUT_DIR = os.getenv("OUTPUT_DIR", "./summaries")
-FORMAT = os.getenv("FORMAT", "md")
-OLLAMA_HOST = os.getenv("OLLAMA_HOST", "http://localhost:11434")
-OLLAMA_MODEL = os.getenv("OLLAMA_MODEL", "gemma3:4b")
-FFMPEG_DIR = os.getenv("FFMPEG")
-DEBUG = os.getenv("DEBUG", "False")
-
-if FFMPEG_DIR:
-    os.environ["PATH"] += os.pathsep + FFMPEG_DIR
-
-warnings.filterwarnings("ignore")
-
-from config import PREFERRED_CHANNELS
-
-class WorkflowManager:
-    def __init__(self, processor, transcriber, summarizer, exporter):
-        # Dependencies injected
-        self.processor = processor
-        self.transcriber = transcriber
-        self.summarizer = summarizer
-        self.exporter = exporter
-
-    def _log_debug(self, var_name, content):
-        """Helper to log variables to a file if DEBUG is enabled."""
-        if DEBUG:
-            debug_dir = Path("./debug")
-            debug_dir.mkdir(exist_ok=True)
-            log_file = debug_dir / "debug_log.txt"
-            
-            timestamp = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            try:
-                with open(log_file, "a", encoding="utf-8") as f:
-                    f.write(f"[{timestamp}] {var_name}:\n{content}\n{'-'*40}\n")
-            except Exception as e:
-                print(f"Failed to write to debug log: {e}")
-
-    def get_video_text(self, url):
-        """Extracts text from a video (subtitles or audio transcription)."""
-        # Check if it's a local file
-        if os.path.exists(url):
-            try:
-                video_path = Path(url)
-                # Use processor to extract audio/split
-                segments = self.processor.extract_audio_from_mp4(video_path)
-                # Transcribe segments
-                texts = self.transcriber.transcribe_segments(segments)
-                result = "\n".join(texts)
-                
-                title = video_path.stem
-                author = "Fichier Local"
-                date = datetime.datetime.now().strftime("%Y-%m-%d")
-                method = "local_mp4"
-                return result, title, author, date, method
-            except Exception as e:
-                print(f"Error processing local file: {e}")
-                # Fallback to default (might retry as URL or fail)
-
-        code = self.processor.check_subtitles(url)
-        if code:
-            subtitles_file, title, author, date = self.processor.get_subtitles(url, code)
-            result = self.transcriber.extract_subtitles(subtitles_file)
-            method = "subtitles"
-        else:
-            audio_file, title, author, date = self.processor.download_audio(url)
-            result = self.transcriber.transcribe_audio(audio_file)
-            method = "audio"
-        
-        return result, title, author, date, method
-
-    def process_single_video(self, url):
-        """Processes a single video and returns the summary."""
-        text, title, author, date, method = self.get_video_text(url)
-        summary = self.summarizer.summarize_long_text(text, author)
-        
-        source_info = [{"title": title, "url": url, "date": date}]
-        return summary, title, source_info
-
-    def search_videos(self, query, limit=3):
-        """Searches for videos and returns a list of video objects."""
-        videos = self.processor.search_subject(query)
-        if not videos:
-            return []
-        return videos[:limit]
-
-    def init_search(self, query, sort_by="relevance", upload_date=None, exclude_terms=None):
-        """Initializes a search session."""
-        search_obj = self.processor.get_search_object(query, sort_by, upload_date, exclude_terms)
-        # Initial fetch (pytubefix Search object fetches on init usually, or we access results)
-        # We return the object to maintain state
-        return search_obj
-
-    def is_channel_preferred(self, channel_name, active_categories):
-        """Checks if a channel is in the preferred list for the active categories."""
-        if not channel_name:
-            return False
-            
-        # If no categories are active, check ALL preferred channels
-        categories_to_check = active_categories if active_categories else PREFERRED_CHANNELS.keys()
-            
-        for category in categories_to_check:
-            if category in PREFERRED_CHANNELS:
-                for preferred in PREFERRED_CHANNELS[category]:
-                    if preferred.lower() in channel_name.lower():
-                        return True
-        return False
-
-    def get_search_results(self, search_obj, duration_mode="any", active_categories=None, enable_boost=True, days_limit=None):
-        """Returns filtered results from a search object, with optional channel boosting."""
-        raw_results = [v for v in search_obj.results if v not in search_obj.shorts]
-        # Initial filter
-        filtered = self.processor.filter_videos(raw_results, duration_mode, days_limit=days_limit)
-        
-        # Helper to count boosted in current list
-        def count_boosted(videos):
-            return sum(1 for v in videos if self.is_channel_preferred(v.author, active_categories))
-
-        # Smart Retrieval Loop: If we don't have enough results after filtering, fetch more pages
-        # Goal: Try to get at least 5 results, OR if boost is on, at least 2 trusted sources
-        attempts = 0
-        max_attempts = 3
-        
-        # Initial check
-        boosted_count = count_boosted(filtered) if enable_boost else 0
-
-        while attempts < max_attempts:
-            # Conditions to continue fetching:
-            # 1. Not enough total results (< 5)
-            # 2. Boost enabled AND not enough trusted sources (< 2)
-            need_more_total = len(filtered) < 5
-            need_more_boosted = enable_boost and boosted_count < 2
-            
-            if not (need_more_total or need_more_boosted):
-                break
-
-            print(f"DEBUG: Fetching more... Total: {len(filtered)}, Boosted: {boosted_count} (Attempt {attempts+1}/{max_attempts})")
-            try:
-                # Fetch next batch
-                new_videos = self.processor.fetch_next(search_obj)
-                if not new_videos:
-                    break
-                    
-                # Filter new batch
-                new_filtered = self.processor.filter_videos(new_videos, duration_mode, days_limit=days_limit)
-                
-                # Add unique new videos
-                current_urls = {v.watch_url for v in filtered}
-                for v in new_filtered:
-                    if v.watch_url not in current_urls:
-                        filtered.append(v)
-                
-                # Re-check counts
-                if enable_boost:
-                    boosted_count = count_boosted(filtered)
-
-            except Exception as e:
-                print(f"Warning: Error fetching more videos: {e}")
-                break
-            
-            attempts += 1
-            
-        # Boost preferred channels
-        if enable_boost:
-            boosted = []
-            regular = []
-            for v in filtered:
-                # Add a dynamic property 'is_boosted' to the object for UI usage
-                # Note: pytube objects might not like new attributes, stick to re-ordering first
-                # We can wrap or just re-order. To pass to UI, we might need to set it.
-                is_fav = self.is_channel_preferred(v.author, active_categories)
-                v.is_boosted = is_fav # Monkey-patching for UI
-                
-                if is_fav:
-                    boosted.append(v)
-                else:
-                    regular.append(v)
-            return boosted + regular
-            
-        return filtered
-
-    def load_more_videos(self, search_obj, duration_mode="any", active_categories=None, enable_boost=True, days_limit=None):
-        """Fetches more videos for an existing search session."""
-        new_videos = self.processor.fetch_next(search_obj)
-        filtered = self.processor.filter_videos(new_videos, duration_mode, days_limit=days_limit)
-        
-        if enable_boost:
-            boosted = []
-            regular = []
-            for v in filtered:
-                is_fav = self.is_channel_preferred(v.author, active_categories)
-                v.is_boosted = is_fav
-                if is_fav:
-                    boosted.append(v)
-                else:
-                    regular.append(v)
-            return boosted + regular
-            
-        return filtered
-
-    def get_video_info(self, url):
-        """Wrapper for processor.get_video_info"""
-        return self.processor.get_video_info(url)
-
-    def synthesize_videos(self, selected_videos, search_term, title_doc):
-        """Synthesizes multiple videos into a single document."""
-        texts = []
-        source_info = []
-        final_search_term = search_term if search_term else "est de rédiger une SYNTHÈSE ANALYTIQUE GLOBALE"
-        for attempt in range(3):
-            for video in  selected_videos:
-                text, title, author, date, method = self.get_video_text(video.watch_url)
-                video_summary = self.summarizer.summarize_long_text(text, author)
-                texts.append(f"Source : {title} (Auteur : {author}, Date: {date})\n{video_summary}")
-                source_info.append({"title": title, "url": video.watch_url, "date": video.publish_date})
-
-            summary_of_texts = "\n\n== Text suivant ==".join(texts)
-            
-            # Pass instructions via a dict
-            final_search_term = search_term if search_term else ""
-            analysis_input = {
-                'content': summary_of_texts,
-                'instructions': final_search_term
-            }
-            
-            global_analysis = self.summarizer.generate_global_analysis(analysis_input, "global")
-            
-            # Validate if needed (optional, keeping logic similar but maybe less strict on title check)
-            check_valide_search = self.summarizer.check_synthese(global_analysis, title_doc)
-            check = eval(check_valide_search) # Caveat: eval is risky but keeping legacy logic for now
-            if check:
-                break
-        
-        # Concatenate Global Analysis + Details
-        # We do NOT run enhance_markdown on the whole thing to avoid losing structure/details
-        # But we might want to enhance the global analysis part if it's raw
-        
-        full_summary = global_analysis
-        
-        return full_summary, final_search_term, source_info
+    def _select_passages(self, texts, search_term):
+        """Returns {text index: relevant passages}, or None to summarize every text in full."""
+        if self.retriever is None or not search_term:
+            return None
+        try:
+            return self.retriever.select(list(enumerate(texts)), search_term)
+        except Exception as e:
+            print(f"DEBUG: Retrieval unavailable, summarizing full transcripts: {e}")
+            return None
 
     def refine_summary(self, current_summary, instructions):
         """Refines the summary based on user instructions."""
@@ -597,19 +465,26 @@ class WorkflowManager:
 
     def process_video_path(self, video_path_str, title):
         """Processes a local video file."""
+        self.warm_up()
         video_path = Path(video_path_str)
-        segments = self.processor.extract_audio_from_mp4(video_path)
-        summary_segments = self.transcriber.transcribe_segments(segments)
+        # Unique name: two local videos with the same title can be processed at the same time
+        transcript_path = Path(TRANSCRIPT_DIR) / f"{slugify(title or video_path.stem) or 'transcript'}_{uuid.uuid4().hex[:8]}.txt"
     
         self._log_debug("TITLE", title)
-        self._log_debug("SEGMENTS", segments)
-        
-        full_text = "\n\n".join(summary_segments)
-        self._log_debug("SUMMARY_SEGMENTS", summary_segments)
-        
-   
-        detailed_summary = self.summarizer.summarize_long_text(full_text, author=title)
+        self._log_debug("SEGMENTS", f"{video_path} (streamed)")
+
+        # Bounded memory for multi-hour files: one audio segment decoded at a time,
+        # transcript appended to a file, chunks summarized as they fill up.
+        # Whisper transcribes the next segments while the LLM summarizes the chunks already full
+        pieces = []
+        with self.processor.audio_segments(video_path) as segments:
+            transcribed = transcribe_to_file(self.transcriber, segments, str(transcript_path), pieces=pieces)
+            detailed_summary = self.summarizer.summarize_stream(in_background(transcribed), author=title)
+        self._log_debug("SUMMARY_SEGMENTS", str(transcript_path))
         self._log_debug("DETAILED_SUMMARY", detailed_summary)
+
+        # Indexed from the streamed pieces, the transcript file is not read back
+        self._index("transcript", pieces, title=title, url=str(video_path.absolute()), method="local_mp4")
         
     
         global_analysis = self.summarizer.generate_global_analysis(detailed_summary)
@@ -627,7 +502,11 @@ class WorkflowManager:
         """Generates PDF bytes for download."""
         return self.exporter.generate_pdf_bytes(summary, title, source_info)
 
+    def submit_pdf(self, summary, title, source_info):
+        """Starts (or reuses) the background PDF render and returns its job handle."""
+        return self.exporter.submit_pdf(summary, title, source_info)
+
     def cleanup(self):
         """Cleans up temporary files."""
-        list_path = ["./audio_segments", "./chunk_data", "./segments_text"]
+        list_path = ["./audio_segments", "./chunk_data", TRANSCRIPT_DIR]
         clean_files(list_path)
@@ -0,0 +1,30 @@
+import pytest
+
+
+def fake_render(html, path):
+    """PDF render stand-in; module level so the spawned PDF workers can import it."""
+    with open(path, "wb") as f:
+        f.write(b"%PDF-" + html.encode("utf-8"))
+    return path
+
+
+@pytest.fixture
+def pdf_render():
+    return fake_render
+
+
+class RecordingClient:
+    """Ollama client stand-in that records every chat call."""
+
+    def __init__(self):
+        self.calls = []
+
+    def chat(self, model, messages, options=None, keep_alive=None, **kwargs):
+        self.calls.append({"messages": messages, "options": options, "keep_alive": keep_alive})
+        return {"message": {"content": "Résumé factice"}}
+
+
+@pytest.fixture
+def make_client():
+    """Factory of RecordingClient, for tests that compare several clients."""
+    return RecordingClient
@@ -0,0 +1,162 @@
+import json
+import queue
+import threading
+import urllib.error
+import urllib.request
+
+import pytest
+
+from api import JobManager, create_server, parse_job_request
+from models import VideoMeta
+
+
+class FakePDFJob:
+    """Printable HTML fallback of an oversized document."""
+    kind, mime, extension = "html", "text/html; charset=utf-8", "print.html"
+
+    def read_bytes(self):
+        return b"<html>print</html>"
+
+
+class FakeExporter:
+    def render_artifact(self, fmt, summary, title, source_info):
+        return f"{fmt}:{title}:{summary}".encode("utf-8")
+
+    def submit_pdf(self, summary, title, source_info):
+        return FakePDFJob()
+
+
+class FakeWorkflow:
+    def __init__(self):
+        self.exporter = FakeExporter()
+        self.release = threading.Event()
+        self.release.set()
+        self.cleaned = 0
+
+    def process_single_video(self, url, progress=None):
+        progress("transcript", f"Récupération du texte : {url}")
+        self.release.wait(5)
+        if "broken" in url:
+            raise RuntimeError("vidéo indisponible")
+        progress("done", "Vidéo", "Résumé complet")
+        return "Résumé complet", "Vidéo", [{"title": "Vidéo", "url": url}]
+
+    def search(self, query, sort_by="relevance", duration_mode="any"):
+        return None, [VideoMeta(watch_url=f"https://youtube.com/watch?v={i:011d}", title=f"V{i}") for i in range(5)]
+
+    def rank_results(self, videos, query, duration_mode):
+        return list(reversed(videos))
+
+    def synthesize_videos(self, videos, context, title, progress=None):
+        for v in videos:
+            progress("partial", v.title, f"Résumé de {v.title}")
+        return "Synthèse", context, [{"title": v.title, "url": v.watch_url} for v in videos]
+
+    def cleanup(self):
+        self.cleaned += 1
+
+
+@pytest.fixture
+def api():
+    workflow = FakeWorkflow()
+    manager = JobManager(workflow, workers=1, queue_size=2)
+    server = create_server(manager, "127.0.0.1", 0)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+    yield base, manager, workflow
+    workflow.release.set()
+    server.shutdown()
+    server.server_close()
+
+
+def request(method, url, payload=None):
+    data = json.dumps(payload).encode() if payload is not None else None
+    req = urllib.request.Request(url, data=data, method=method, headers={"Content-Type": "application/json"})
+    try:
+        with urllib.request.urlopen(req, timeout=10) as resp:
+            return resp.status, resp.read(), dict(resp.headers)
+    except urllib.error.HTTPError as e:
+        return e.code, e.read(), dict(e.headers)
+
+
+def wait_done(manager, job_id):
+    job = manager.get(job_id)
+    with job.cond:
+        job.cond.wait_for(lambda: job.finished, timeout=10)
+    return job
+
+
+def test_parse_job_request():
+    assert parse_job_request({"url": "u"}) == ("url", {"url": "u"})
+    kind, params = parse_job_request({"search": "climat", "limit": "2"})
+    assert kind == "search" and params["limit"] == 2
+    for bad in ({}, [], {"search": "x", "limit": 50}, {"search": "x", "limit": "a"}):
+        with pytest.raises(ValueError):
+            parse_job_request(bad)
+
+
+def test_url_job_lifecycle_and_export(api):
+    base, manager, workflow = api
+    status, body, headers = request("POST", f"{base}/jobs", {"url": "https://youtube.com/watch?v=abc"})
+    assert status == 202
+    job_id = json.loads(body)["id"]
+    assert headers["Location"] == f"/jobs/{job_id}"
+
+    wait_done(manager, job_id)
+    status, body, _ = request("GET", f"{base}/jobs/{job_id}")
+    data = json.loads(body)
+    assert data["status"] == "done" and data["summary"] == "Résumé complet"
+    assert workflow.cleaned == 1
+
+    status, body, headers = request("GET", f"{base}/jobs/{job_id}/export?format=md")
+    assert status == 200 and body == "md:Vidéo:Résumé complet".encode()
+    assert "attachment" in headers["Content-Disposition"]
+    assert request("GET", f"{base}/jobs/{job_id}/export?format=doc")[0] == 400
+
+    # An oversized document is not sent as a broken PDF
+    status, body, headers = request("GET", f"{base}/jobs/{job_id}/export?format=pdf")
+    assert status == 200 and body == b"<html>print</html>"
+    assert headers["Content-Type"].startswith("text/html")
+    assert headers["Content-Disposition"].endswith('.print.html"')
+
+
+def test_search_job_streams_partial_output(api):
+    base, manager, _ = api
+    _, body, _ = request("POST", f"{base}/jobs", {"search": "climat", "limit": 2, "context": "économie"})
+    job_id = json.loads(body)["id"]
+
+    with urllib.request.urlopen(f"{base}/jobs/{job_id}/stream", timeout=10) as resp:
+        stream = resp.read().decode("utf-8")
+    events = [json.loads(line[6:]) for line in stream.splitlines() if line.startswith("data: ")]
+    stages = [e["stage"] for e in events]
+    assert stages[0] == "queued" and stages[-1] == "end"
+    assert [e["output"] for e in events if e["stage"] == "partial"] == ["Résumé de V4", "Résumé de V3"]
+    assert manager.get(job_id).source_info[0]["title"] == "V4"
+
+
+def test_failures_queue_limit_and_unknown_jobs(api):
+    base, manager, workflow = api
+    _, body, _ = request("POST", f"{base}/jobs", {"url": "broken"})
+    job = wait_done(manager, json.loads(body)["id"])
+    assert job.status == "failed" and "indisponible" in job.error
+    assert request("GET", f"{base}/jobs/{job.id}/export")[0] == 409
+
+    workflow.release.clear()
+    statuses = [request("POST", f"{base}/jobs", {"url": f"u{i}"})[0] for i in range(5)]
+    assert statuses.count(202) <= 3
+    status, _, headers = request("POST", f"{base}/jobs", {"url": "u-last"})
+    assert status == 429 and headers["Retry-After"] == "30"
+
+    assert request("GET", f"{base}/jobs/inconnu")[0] == 404
+    assert request("POST", f"{base}/jobs", {"foo": 1})[0] == 400
+    assert json.loads(request("GET", f"{base}/health")[1])["status"] == "ok"
+
+
+def test_submit_raises_when_full():
+    workflow = FakeWorkflow()
+    workflow.release.clear()
+    manager = JobManager(workflow, workers=1, queue_size=1)
+    with pytest.raises(queue.Full):
+        for i in range(3):
+            manager.submit("url", {"url": f"u{i}"})
+    workflow.release.set()
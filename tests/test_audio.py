@@ -0,0 +1,56 @@
+import shutil
+import subprocess
+import sys
+
+import numpy as np
+import pytest
+
+from audio import SAMPLE_RATE, decode_audio, duration_of, split_samples
+
+
+def fake_ffmpeg(samples: np.ndarray, exit_code: int = 0) -> list[str]:
+    """Command writing samples as f32le on stdout, like `ffmpeg ... -f f32le -`."""
+    script = (
+        "import sys, numpy as np;"
+        f"sys.stdout.buffer.write(np.array({samples.tolist()!r}, dtype=np.float32).tobytes());"
+        f"sys.exit({exit_code})"
+    )
+    return [sys.executable, "-c", script]
+
+
+def test_decode_reads_pcm_into_float32_array():
+    samples = np.linspace(-1, 1, 5000, dtype=np.float32)
+    audio = decode_audio("video.mp4", command=fake_ffmpeg(samples))
+    assert audio.dtype == np.float32
+    np.testing.assert_array_equal(audio, samples)
+    assert audio.flags.writeable
+
+
+def test_decode_failure_raises():
+    with pytest.raises(RuntimeError, match="décodage"):
+        decode_audio("video.mp4", command=fake_ffmpeg(np.zeros(10, dtype=np.float32), exit_code=1))
+
+
+def test_segments_are_views_of_the_decoded_buffer():
+    audio = np.arange(25 * SAMPLE_RATE, dtype=np.float32)
+    segments = split_samples(audio, segment_seconds=10)
+
+    assert [len(s) for s in segments] == [10 * SAMPLE_RATE, 10 * SAMPLE_RATE, 5 * SAMPLE_RATE]
+    assert all(np.shares_memory(s, audio) for s in segments)
+    np.testing.assert_array_equal(np.concatenate(segments), audio)
+    assert duration_of(audio) == 25
+
+
+def test_short_audio_is_one_segment():
+    audio = np.ones(SAMPLE_RATE, dtype=np.float32)
+    assert len(split_samples(audio, segment_seconds=10)) == 1
+    assert split_samples(np.zeros(0, dtype=np.float32)) == []
+
+
+@pytest.mark.skipif(shutil.which("ffmpeg") is None, reason="ffmpeg not installed")
+def test_decode_real_file(tmp_path):
+    path = tmp_path / "tone.wav"
+    subprocess.run(["ffmpeg", "-f", "lavfi", "-i", "sine=frequency=440:duration=3", "-ar", "44100", "-y", str(path)],
+                   check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    audio = decode_audio(str(path))
+    assert abs(duration_of(audio) - 3) < 0.05
@@ -0,0 +1,73 @@
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from backends import FasterWhisperBackend, Segment, WhisperBackend, create_backend, word_error_rate
+from decoding import decode_options
+
+
+class FakeWhisperModel:
+    def __init__(self):
+        self.calls = []
+
+    def transcribe(self, audio, **options):
+        self.calls.append(options)
+        return {"text": " Bonjour à tous. Merci.", "language": "fr", "segments": [
+            {"start": 0.0, "end": 2.0, "text": " Bonjour à tous."},
+            {"start": 2.0, "end": 3.5, "text": " Merci."},
+        ]}
+
+
+class FakeCT2Model:
+    def __init__(self):
+        self.calls = []
+
+    def transcribe(self, audio, **options):
+        self.calls.append((len(audio), options))
+        segments = (SimpleNamespace(start=s, end=e, text=t) for s, e, t in [(0.0, 2.0, " Bonjour à tous."), (2.0, 3.5, " Merci.")])
+        return segments, SimpleNamespace(language="fr")
+
+
+AUDIO = np.zeros(16000 * 40, dtype=np.float32)
+
+
+def test_backends_return_identical_transcriptions():
+    whisper_backend = WhisperBackend("small", model=FakeWhisperModel())
+    ct2_backend = FasterWhisperBackend("small", model=FakeCT2Model())
+    options = decode_options("balanced", "cpu", "fr")
+
+    a = whisper_backend.transcribe(AUDIO, options)
+    b = ct2_backend.transcribe(AUDIO, options)
+    assert a == b
+    assert a.segments[1] == Segment(2.0, 3.5, " Merci.") and a.language == "fr"
+
+
+def test_faster_whisper_option_mapping():
+    model = FakeCT2Model()
+    backend = FasterWhisperBackend("small", model=model)
+    backend.transcribe(AUDIO, decode_options("fast", "cuda", "en"))
+    _, options = model.calls[0]
+    assert "fp16" not in options and "best_of" not in options
+    assert options["beam_size"] == 1 and options["language"] == "en" and options["temperature"] == 0.0
+
+    assert backend.detect_language(AUDIO) == "fr"
+    assert model.calls[1][0] == 16000 * 30
+
+
+def test_whisper_backend_passes_profile_options():
+    model = FakeWhisperModel()
+    WhisperBackend("small", model=model).transcribe(AUDIO, decode_options("accurate", "cpu"))
+    assert model.calls[0]["beam_size"] == 5 and model.calls[0]["fp16"] is False
+
+
+def test_unknown_backend():
+    with pytest.raises(ValueError, match="Moteur"):
+        create_backend("vosk", "small")
+
+
+def test_word_error_rate():
+    assert word_error_rate("Bonjour à tous.", "bonjour a tous") == pytest.approx(1 / 3)
+    assert word_error_rate("un deux trois", "un deux trois") == 0
+    assert word_error_rate("un deux", "un trois quatre") == 1.0
+    assert word_error_rate("", "") == 0
@@ -0,0 +1,89 @@
+import io
+import sys
+import tracemalloc
+
+import numpy as np
+
+from audio import SAMPLE_RATE, iter_decoded_segments
+from backends import Transcription, TranscriptionBackend
+from prompts import PromptManager
+from streaming import in_background, transcribe_to_file
+from summarizer import Summarizer
+from transcriber import WhisperTranscriber
+from utils import save_stream
+
+HOURS = 4
+SEGMENT_SECONDS = 600
+PEAK_LIMIT = 128 * 1024 * 1024  # a full 4 h decode alone is ~920 MB of float32
+
+
+def synthetic_ffmpeg(seconds: int) -> list[str]:
+    """Writes `seconds` of 16 kHz float32 PCM on stdout, like the ffmpeg decoder."""
+    total = seconds * SAMPLE_RATE * 4
+    script = (
+        "import sys\n"
+        f"total = {total}\n"
+        "block = bytes(1 << 20)\n"
+        "while total > 0:\n"
+        "    sys.stdout.buffer.write(block[:min(total, len(block))])\n"
+        "    total -= len(block)\n"
+    )
+    return [sys.executable, "-c", script]
+
+
+class FakeBackend(TranscriptionBackend):
+    name = "fake"
+
+    def _load_model(self):
+        return None
+
+    def transcribe(self, audio, options):
+        assert audio.dtype == np.float32 and options["language"] == "fr"
+        minutes = len(audio) / SAMPLE_RATE / 60
+        return Transcription(text=f"Segment de {minutes:.0f} minutes. " + "la suite de la conférence " * 400)
+
+    def detect_language(self, audio):
+        return "fr"
+
+
+def test_four_hour_input_stays_under_memory_limit(tmp_path, monkeypatch, make_client):
+    monkeypatch.chdir(tmp_path)
+    transcriber = WhisperTranscriber("small", "cpu", profile="fast", language=None, backend=FakeBackend("small"))
+    client = make_client()
+    summarizer = Summarizer(client, "model", PromptManager(), summary_type="short")
+    transcript = tmp_path / "segments_text" / "long.txt"
+    pieces = []
+
+    tracemalloc.start()
+    try:
+        segments = iter_decoded_segments("long.mp4", SEGMENT_SECONDS, command=synthetic_ffmpeg(HOURS * 3600))
+        summary = summarizer.summarize_stream(in_background(transcribe_to_file(transcriber, segments, str(transcript), pieces=pieces)), "long")
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    assert peak < PEAK_LIMIT, f"peak {peak / 1e6:.0f} MB"
+    text = transcript.read_text(encoding="utf-8")
+    assert text.count("Segment de 10 minutes.") == HOURS * 6
+    assert "\n\n".join(pieces) == text
+    assert summary.count("Résumé factice") == len(summarizer.chunk_text(text))
+
+
+def test_segments_match_the_full_decode():
+    seconds = 25
+    segments = list(iter_decoded_segments("a.mp4", 10, command=synthetic_ffmpeg(seconds)))
+    assert [len(s) for s in segments] == [10 * SAMPLE_RATE, 10 * SAMPLE_RATE, 5 * SAMPLE_RATE]
+
+
+def test_closing_the_stream_stops_the_decoder():
+    segments = iter_decoded_segments("a.mp4", 1, command=synthetic_ffmpeg(3600))
+    assert len(next(segments)) == SAMPLE_RATE
+    segments.close()  # ffmpeg is killed instead of blocking on the pipe
+
+
+def test_save_stream_copies_by_blocks(tmp_path):
+    data = bytes(range(256)) * 10_000
+    upload = io.BytesIO(data)
+    upload.read(100)
+    path = save_stream(upload, str(tmp_path / "videos" / "upload.mp4"), chunk_size=4096)
+    assert open(path, "rb").read() == data
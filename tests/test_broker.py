@@ -0,0 +1,241 @@
+import threading
+import time
+
+import numpy as np
+import pytest
+
+from broker import BrokerClient, BrokerUnavailable, RemoteSummarizer, RemoteTranscriber, TaskBroker, create_broker_server
+from worker import Worker
+
+
+@pytest.fixture
+def broker(tmp_path):
+    return TaskBroker(str(tmp_path / "broker.db"), lease_seconds=0.3, max_attempts=2)
+
+
+@pytest.fixture
+def server(broker):
+    httpd = create_broker_server(broker, "127.0.0.1", 0, token="secret")
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}"
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def test_lease_complete_roundtrip(broker):
+    task_id = broker.enqueue("transcribe", {"path": "/a.mp3"})
+    task = broker.lease("w1", ["transcribe"])
+    assert task.id == task_id and task.payload == {"path": "/a.mp3"} and task.attempts == 1
+    assert broker.lease("w2") is None
+
+    assert not broker.complete(task_id, "w2", "volé")
+    assert broker.complete(task_id, "w1", "texte")
+    assert broker.get(task_id).result == "texte"
+    assert broker.stats() == {"done": 1}
+
+
+def test_lease_filters_kinds_and_is_exclusive(broker):
+    for i in range(20):
+        broker.enqueue("transcribe", {"i": i})
+    broker.enqueue("summarize", {"text": "x"})
+    assert broker.lease("w", ["other"]) is None
+
+    leased, lock = [], threading.Lock()
+
+    def take(worker_id):
+        while (task := broker.lease(worker_id, ["transcribe"])) is not None:
+            with lock:
+                leased.append(task.id)
+
+    threads = [threading.Thread(target=take, args=(f"w{i}",)) for i in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(leased) == len(set(leased)) == 20
+
+
+def test_heartbeat_keeps_lease_and_expired_tasks_are_redelivered(broker):
+    task_id = broker.enqueue("transcribe", {})
+    broker.lease("w1")
+    time.sleep(0.2)
+    assert broker.heartbeat(task_id, "w1")
+    time.sleep(0.2)
+    assert broker.lease("w2") is None  # lease was renewed
+
+    time.sleep(0.4)
+    task = broker.lease("w2")
+    assert task.id == task_id and task.attempts == 2
+    assert not broker.heartbeat(task_id, "w1")
+
+    time.sleep(0.4)
+    assert broker.lease("w3") is None  # max_attempts reached
+    assert broker.get(task_id).status == "failed"
+
+
+def test_fail_requeues_until_attempts_are_exhausted(broker):
+    task_id = broker.enqueue("transcribe", {})
+    broker.fail(broker.lease("w1").id, "w1", "erreur 1")
+    assert broker.get(task_id).status == "queued"
+    broker.fail(broker.lease("w1").id, "w1", "erreur 2")
+    task = broker.get(task_id)
+    assert task.status == "failed" and task.error == "erreur 2"
+
+
+def test_worker_heartbeats_long_tasks(broker):
+    def slow(payload):
+        time.sleep(0.8)
+        return payload["n"] * 2
+
+    task_id = broker.enqueue("double", {"n": 21})
+    worker = Worker(broker, {"double": slow}, worker_id="w1", heartbeat_interval=0.1)
+    assert worker.run_once()
+    task = broker.get(task_id)
+    assert task.status == "done" and task.result == 42 and task.attempts == 1
+    assert not worker.run_once()
+
+
+def test_client_goes_through_the_broker_server(broker, server):
+    client = BrokerClient(server, token="secret")
+    assert client.lease_seconds == broker.lease_seconds
+
+    task_id = client.enqueue("transcribe", {"path": "/a.mp3"})
+    task = client.lease("w1", ["transcribe"])
+    assert task.id == task_id and task.payload == {"path": "/a.mp3"}
+    assert client.lease("w2") is None
+    assert client.heartbeat(task_id, "w1") and not client.heartbeat(task_id, "w2")
+    assert client.complete(task_id, "w1", "texte")
+    assert client.wait([task_id], timeout=5)[0].result == "texte"
+    assert client.get("inconnue") is None
+    assert client.stats() == {"done": 1}
+
+    with pytest.raises(RuntimeError, match="401"):
+        BrokerClient(server, token="faux")
+
+
+def test_worker_rides_out_broker_errors_but_not_a_wrong_token(broker, server, monkeypatch):
+    client = BrokerClient(server, token="secret")
+    worker = Worker(client, {"transcribe": lambda p: p["path"]}, poll_interval=0.01)
+    calls = []
+
+    def failing_lease(worker_id, kinds=None):
+        calls.append(worker_id)
+        if len(calls) == 1:
+            raise BrokerUnavailable("HTTP 500")
+        worker.stop()
+        return None
+
+    monkeypatch.setattr(client, "lease", failing_lease)
+    worker.run_forever()
+    assert len(calls) == 2
+
+    client.token = "tournée"
+    monkeypatch.undo()
+    with pytest.raises(RuntimeError, match="BROKER_TOKEN"):
+        Worker(client, {"transcribe": lambda p: p["path"]}, poll_interval=0.01).run_forever()
+
+
+def test_client_reports_an_unreachable_broker(server):
+    client = BrokerClient(server, token="secret", timeout=1)
+    client.url = "http://127.0.0.1:9"
+    with pytest.raises(BrokerUnavailable):
+        client.lease("w1")
+
+
+def test_remote_workers_share_the_server(broker, server):
+    worker = Worker(BrokerClient(server, token="secret"), {"transcribe": lambda p: p["path"].upper()}, poll_interval=0.05)
+    thread = threading.Thread(target=worker.run_forever, daemon=True)
+    thread.start()
+    try:
+        texts = RemoteTranscriber(broker, timeout=10).transcribe_segments(["a.mp3", "b.mp3"])
+    finally:
+        worker.stop()
+    assert [t.rsplit("/", 1)[-1] for t in texts] == ["A.MP3", "B.MP3"]
+
+
+def test_remote_transcriber_uses_workers(broker, tmp_path):
+    workers = [Worker(broker, {"transcribe": lambda p: f"texte de {p['path'].rsplit('/', 1)[-1]}"}, poll_interval=0.05) for _ in range(2)]
+    threads = [threading.Thread(target=w.run_forever, daemon=True) for w in workers]
+    for t in threads:
+        t.start()
+    try:
+        texts = RemoteTranscriber(broker, timeout=10).transcribe_segments(["seg_0.mp3", "seg_1.mp3", "seg_2.mp3"])
+    finally:
+        for w in workers:
+            w.stop()
+    assert texts == ["texte de seg_0.mp3", "texte de seg_1.mp3", "texte de seg_2.mp3"]
+
+
+def test_remote_transcriber_reports_failures(broker):
+    worker = Worker(broker, {"transcribe": lambda p: 1 / 0}, poll_interval=0.05)
+    thread = threading.Thread(target=worker.run_forever, daemon=True)
+    thread.start()
+    try:
+        with pytest.raises(RuntimeError, match="division"):
+            RemoteTranscriber(broker, timeout=10).transcribe_audio("a.mp3")
+    finally:
+        worker.stop()
+
+
+def test_remote_transcriber_spools_in_memory_segments(broker, tmp_path):
+    spool = tmp_path / "spool"
+    worker = Worker(broker, {"transcribe": lambda p: float(np.load(p["path"]).sum())}, poll_interval=0.05)
+    thread = threading.Thread(target=worker.run_forever, daemon=True)
+    thread.start()
+    try:
+        segments = [np.ones(100, dtype=np.float32), np.full(10, 2, dtype=np.float32)]
+        texts = RemoteTranscriber(broker, timeout=10, spool_dir=str(spool)).transcribe_segments(segments)
+    finally:
+        worker.stop()
+    assert texts == [100.0, 20.0]
+    assert list(spool.iterdir()) == []
+
+
+def test_remote_transcriber_accepts_a_generator(broker, tmp_path):
+    spool = tmp_path / "spool"
+    worker = Worker(broker, {"transcribe": lambda p: float(np.load(p["path"]).sum())}, poll_interval=0.05)
+    thread = threading.Thread(target=worker.run_forever, daemon=True)
+    thread.start()
+    try:
+        # Local files are decoded one segment at a time: the transcriber gets a generator
+        segments = (np.full(10, i, dtype=np.float32) for i in range(1, 4))
+        texts = list(RemoteTranscriber(broker, timeout=10, spool_dir=str(spool)).iter_segments(segments))
+    finally:
+        worker.stop()
+    assert texts == [10.0, 20.0, 30.0]
+    assert list(spool.iterdir()) == []
+
+
+class LocalSummarizer:
+    model = "gemma3:4b"
+    summary_type = "long"
+
+    def generate_global_analysis(self, text, context=""):
+        return f"analyse de {text}"
+
+
+def test_remote_summarizer_queues_the_batch_for_workers(broker):
+    summarizer = RemoteSummarizer(broker, LocalSummarizer(), timeout=10)
+    summarizer.queue([("texte 1", "A"), ("texte 2", "B")])
+    # Both summaries are queued before any worker starts: two nodes can take one each
+    assert broker.stats().get("queued") == 2
+    payloads = []
+
+    def summarize(payload):
+        payloads.append(payload)
+        return f"résumé de {payload['text']} ({payload['author']})"
+
+    worker = Worker(broker, {"summarize": summarize}, poll_interval=0.05)
+    thread = threading.Thread(target=worker.run_forever, daemon=True)
+    thread.start()
+    try:
+        assert summarizer.summarize_long_text("texte 2", "B") == "résumé de texte 2 (B)"
+        assert summarizer.summarize_long_text("texte 1", "A") == "résumé de texte 1 (A)"
+        # Not queued beforehand: submitted on the spot
+        assert summarizer.summarize_long_text("texte 3", "C") == "résumé de texte 3 (C)"
+    finally:
+        worker.stop()
+    assert len(payloads) == 3
+    assert payloads[0]["model"] == "gemma3:4b" and payloads[0]["summary_type"] == "long"
+    # Everything else stays on the local summarizer
+    assert summarizer.generate_global_analysis("x") == "analyse de x"
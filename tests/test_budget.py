@@ -0,0 +1,19 @@
+from budget import BudgetPlanner, estimate_tokens
+
+def test_short_prompt_gets_small_context():
+    planner = BudgetPlanner(verbose=False)
+    options = planner.plan([{"role": "user", "content": "x" * 3500}], "validation")
+    assert options == {"num_ctx": 2048, "num_predict": 16}
+
+def test_rewrite_budget_follows_source_size():
+    planner = BudgetPlanner(verbose=False)
+    source = "mot " * 5000
+    options = planner.plan([{"role": "user", "content": source}], "reformat", source_text=source)
+    assert options["num_predict"] > estimate_tokens(source)
+    assert options["num_ctx"] >= estimate_tokens(source) + options["num_predict"]
+
+def test_oversized_prompt_is_capped():
+    planner = BudgetPlanner(max_ctx=8192, verbose=False)
+    options = planner.plan([{"role": "user", "content": "x" * 40000}], "global")
+    assert options["num_ctx"] == 8192
+    assert options["num_predict"] >= 16
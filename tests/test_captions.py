@@ -0,0 +1,55 @@
+from captions import CaptionChoice, CaptionSelector, is_usable_caption, parse_code
+
+SRT = "1\n00:00:01,000 --> 00:00:02,000\nBonjour\n"
+
+
+def test_parse_code():
+    assert parse_code("fr") == ("fr", False)
+    assert parse_code("a.en") == ("en", True)
+    assert parse_code(".fr-CA") == ("fr", False)
+    assert parse_code("pt_BR") == ("pt", False)
+
+
+def test_manual_tracks_rank_before_auto_and_follow_preferences():
+    ranked = CaptionSelector(["fr", "en"]).rank(["a.fr", "en", "fr-CA", "fr", "a.en", "de"])
+    assert [c.code for c in ranked[:5]] == ["fr", "fr-CA", "en", "a.fr", "a.en"]
+    assert ranked[5] == CaptionChoice("de", "de", False, target="fr")
+
+
+def test_translation_sources_and_methods():
+    ranked = CaptionSelector(["fr"]).rank(["a.es", "de"])
+    assert [c.method for c in ranked] == ["subtitles:translated:manual:de>fr", "subtitles:translated:auto:es>fr"]
+    assert CaptionSelector(["fr"], translate=False).rank(["a.es", "de"]) == []
+    assert CaptionSelector(["fr"], allow_auto=False).rank(["a.fr"]) == []
+    assert CaptionChoice.from_code("a.en").method == "subtitles:auto:en"
+
+
+def test_select_falls_back_past_failing_and_empty_tracks():
+    fetched = []
+
+    def fetch(choice):
+        fetched.append(choice.code)
+        if choice.code == "fr":
+            raise ConnectionError("HTTP 404")
+        if choice.code == "a.fr":
+            return ""
+        return SRT
+
+    srt, choice = CaptionSelector(["fr", "en"]).select(["en", "a.fr", "fr"], fetch)
+    assert srt == SRT and choice.code == "en"
+    assert fetched == ["fr", "en"]
+
+    srt, choice = CaptionSelector(["fr"]).select(["a.fr", "fr", "es"], fetch)
+    assert choice.method == "subtitles:translated:manual:es>fr"
+
+
+def test_select_returns_none_without_usable_track():
+    assert CaptionSelector(["fr"]).select([], lambda c: SRT) is None
+    assert CaptionSelector(["fr"]).select(["fr"], lambda c: "\n") is None
+
+
+def test_usable_caption_ignores_annotations():
+    speech = "Aujourd'hui nous parlons du budget de l'État et de la dette publique. " * 4
+    assert is_usable_caption(speech, min_chars=200)
+    assert not is_usable_caption("[Musique] " * 100 + "(Applaudissements) ♪ merci", min_chars=200)
+    assert not is_usable_caption("", min_chars=1)
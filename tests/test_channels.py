@@ -0,0 +1,27 @@
+from channels import ChannelMatcher, normalize_name
+
+PREFERRED = {
+    "News": ["HugoDécrypte", "Arte Journal", "AFP"],
+    "Documentary": ["Arte", "Le Dessous des Cartes"],
+    "Conference": ["TED", "TEDx"],
+}
+
+def test_normalize_folds_accents_and_punctuation():
+    assert normalize_name("HugoDécrypte - Actus") == "hugodecrypte actus"
+
+def test_match_reports_every_category_with_score():
+    matcher = ChannelMatcher(PREFERRED)
+    scores = matcher.match("ARTE Journal")
+    assert scores["News"] == 1.0
+    assert 0 < scores["Documentary"] < 1.0
+
+def test_match_respects_active_categories():
+    matcher = ChannelMatcher(PREFERRED, ["Conference"])
+    assert matcher.is_preferred("TEDx Paris")
+    assert not matcher.is_preferred("Hugodecrypte")
+
+def test_same_results_as_substring_scan():
+    matcher = ChannelMatcher(PREFERRED)
+    for name in ["Le Dessous des Cartes - ARTE", "France Info", "afp français", "Tedx"]:
+        expected = any(c.lower() in name.lower() for chans in PREFERRED.values() for c in chans)
+        assert matcher.is_preferred(name) == expected
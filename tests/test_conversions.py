@@ -0,0 +1,41 @@
+import conversions
+from conversions import cache_clear, cache_info, html_to_markdown, is_html, markdown_to_html, to_canonical
+
+
+def test_conversions_are_memoized_by_content(monkeypatch):
+    cache_clear()
+    calls = []
+    original = conversions.markdown.markdown
+    monkeypatch.setattr(conversions.markdown, "markdown", lambda text, **kw: calls.append(text) or original(text, **kw))
+
+    first = markdown_to_html("# Titre\n\n- point")
+    second = markdown_to_html("# Titre\n\n- point")
+    markdown_to_html("# Autre titre")
+
+    assert first == second
+    assert "<h1>Titre</h1>" in first
+    assert len(calls) == 2
+    assert cache_info()["hits"] == 1
+
+
+def test_extensions_are_part_of_the_key():
+    cache_clear()
+    markdown_to_html("texte", extensions=("extra",))
+    markdown_to_html("texte", extensions=("extra", "codehilite"))
+    assert cache_info()["misses"] == 2
+
+
+def test_round_trip_to_canonical_markdown():
+    html = markdown_to_html("## Section\n\nUn **point** clé.")
+    assert is_html(html)
+    assert to_canonical(html) == html_to_markdown(html)
+    assert to_canonical(html).startswith("## Section")
+    assert to_canonical("```markdown\n# Titre\n```") == "# Titre"
+
+
+def test_cache_is_bounded(monkeypatch):
+    cache_clear()
+    monkeypatch.setattr(conversions, "CONVERSION_CACHE_SIZE", 3)
+    for i in range(10):
+        html_to_markdown(f"<p>{i}</p>")
+    assert cache_info()["size"] == 3
@@ -0,0 +1,29 @@
+import pytest
+
+from decoding import DECODING_PROFILES, decode_options, get_profile
+
+
+def test_fast_profile_is_greedy_without_fallback():
+    options = decode_options("fast", "cpu", "fr")
+    assert options["temperature"] == 0.0
+    assert options["beam_size"] is None and options["best_of"] is None
+    assert options["condition_on_previous_text"] is False
+    assert options["language"] == "fr" and options["fp16"] is False
+
+
+def test_profiles_trade_speed_for_quality():
+    assert decode_options("accurate")["beam_size"] == 5
+    assert len(decode_options("balanced")["temperature"]) > 1
+    assert "language" not in decode_options("balanced")
+    assert decode_options("balanced", "cuda")["fp16"] is True
+    assert set(DECODING_PROFILES) == {"fast", "balanced", "accurate"}
+
+
+def test_options_are_copies():
+    decode_options("fast")["temperature"] = 1.0
+    assert DECODING_PROFILES["fast"]["temperature"] == 0.0
+
+
+def test_unknown_profile():
+    with pytest.raises(ValueError, match="Profil"):
+        get_profile("turbo")
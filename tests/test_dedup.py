@@ -0,0 +1,43 @@
+from dedup import SentenceDeduplicator, shingles, split_sentences
+
+NEWS_A = """## Faits
+- Le gouvernement a annoncé une hausse de 5% du budget de la défense pour 2025. Les syndicats protestent.
+- La réforme entrera en vigueur au printemps prochain selon le ministre."""
+
+NEWS_B = """## Résumé
+- Le gouvernement a annoncé une hausse de 5 % du budget de la défense pour l'année 2025.
+- Un sondage montre que les Français sont partagés sur la question militaire.
+- La réforme entrera en vigueur au printemps prochain selon le ministre."""
+
+
+def test_split_and_shingles():
+    assert split_sentences("Première phrase. Deuxième ! Troisième ?") == ["Première phrase.", "Deuxième !", "Troisième ?"]
+    assert shingles("Économie et énergie", size=3) == {"economie et energie"}
+    assert len(shingles("un deux trois quatre cinq", size=3)) == 3
+
+
+def test_duplicates_are_removed_and_credited():
+    result = SentenceDeduplicator().dedup([("BFM", NEWS_A), ("France 24", NEWS_B)])
+    first, second = result.texts
+
+    assert result.removed == 2
+    assert "(également : France 24)" in first
+    assert "défense" not in second
+    assert "printemps" not in second
+    assert "sondage" in second
+    assert second.startswith("## Résumé")
+    assert len("".join(result.texts)) < len(NEWS_A + NEWS_B)
+
+
+def test_distinct_documents_are_untouched():
+    text_a = "Le télescope James Webb observe des galaxies lointaines formées peu après le Big Bang."
+    text_b = "La recette traditionnelle de la ratatouille demande des aubergines et des courgettes bien mûres."
+    result = SentenceDeduplicator().dedup([("A", text_a), ("B", text_b)])
+    assert result.texts == [text_a, text_b]
+    assert result.removed == 0
+
+
+def test_repetitions_inside_one_document_are_kept():
+    text = "Ce point important est répété deux fois dans la vidéo. Ce point important est répété deux fois dans la vidéo."
+    result = SentenceDeduplicator().dedup([("A", text)])
+    assert result.texts == [text]
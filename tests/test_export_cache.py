@@ -0,0 +1,63 @@
+import os
+
+import pytest
+
+import exporter as exporter_module
+from exporter import Exporter, document_key
+from pdf_worker import PDFRenderer, PDFTooLargeError
+
+
+def test_document_key_tracks_content():
+    assert document_key("a", "T") == document_key("a", "T", [])
+    assert document_key("a", "T") != document_key("b", "T")
+    assert document_key("a", "T", [{"url": "u"}]) != document_key("a", "T")
+
+
+def test_artifacts_are_cached_by_content(tmp_path, pdf_render):
+    exporter = Exporter(str(tmp_path), pdf_renderer=PDFRenderer(render_fn=pdf_render, tmp_dir=str(tmp_path)))
+    submits = []
+    strategy = exporter.strategies["pdf"]
+    original = strategy.submit
+    strategy.submit = lambda doc: submits.append(doc.key) or original(doc)
+
+    first = exporter.generate_pdf_bytes("# Titre\n\nTexte", "Doc", [{"title": "A", "url": "u"}])
+    second = exporter.generate_pdf_bytes("# Titre\n\nTexte", "Doc", [{"title": "A", "url": "u"}])
+    exporter.generate_pdf_bytes("# Titre\n\nTexte modifié", "Doc", [{"title": "A", "url": "u"}])
+    exporter.strategies["pdf"].renderer.close()
+
+    assert first == second
+    assert first.startswith(b"%PDF-")
+    assert len(submits) == 2
+
+
+def test_export_all_parses_once(tmp_path, monkeypatch):
+    calls = []
+    original = exporter_module.render_document
+    monkeypatch.setattr(exporter_module, "render_document", lambda *a: calls.append(a) or original(*a))
+
+    paths = Exporter(str(tmp_path)).export_all("# Titre\n\n- Point", "Doc", formats=("md", "txt", "html"))
+    assert set(paths) == {"md", "txt", "html"}
+    assert all(os.path.exists(p) for p in paths.values())
+    assert len(calls) == 1
+    with open(paths["html"], encoding="utf-8") as f:
+        assert "<h1>Titre</h1>" in f.read()
+    with open(paths["md"], encoding="utf-8") as f:
+        assert f.read().startswith("# Titre")
+
+
+def test_evicted_pdf_job_keeps_its_file_while_held(tmp_path, pdf_render):
+    exporter = Exporter(str(tmp_path), cache_size=1, pdf_renderer=PDFRenderer(render_fn=pdf_render, tmp_dir=str(tmp_path)))
+    held = exporter.submit_pdf("# A", "Doc A")
+    held.result()
+    exporter.submit_pdf("# B", "Doc B").result()
+    exporter.strategies["pdf"].renderer.close()
+    # Doc A is out of the cache, but a session still serves it
+    assert held.read_bytes().startswith(b"%PDF-")
+
+
+def test_oversized_pdf_is_reported(tmp_path):
+    exporter = Exporter(str(tmp_path), pdf_renderer=PDFRenderer(max_html_chars=10, tmp_dir=str(tmp_path)))
+    with pytest.raises(PDFTooLargeError):
+        exporter.generate_pdf_bytes("# Titre\n\nTexte", "Doc")
+    path = exporter.save_summary("# Titre\n\nTexte", "Doc", "pdf")
+    assert path.endswith(".print.html")
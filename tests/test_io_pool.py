@@ -0,0 +1,97 @@
+import threading
+import time
+
+from io_pool import AdaptiveIOPool, is_throttled
+
+
+class Throttled(Exception):
+    code = 429
+
+
+def test_map_keeps_order_and_grows_concurrency():
+    pool = AdaptiveIOPool(max_workers=8, initial=2, retries=0)
+    assert pool.map(lambda x: x * 2, range(20)) == [x * 2 for x in range(20)]
+    stats = pool.stats()
+    assert stats["ok"] == 20
+    assert stats["concurrency"] > 2
+
+
+def test_concurrency_never_exceeds_limit():
+    pool = AdaptiveIOPool(max_workers=8, initial=3, retries=0)
+    pool._limit = 3.0
+    pool.max_workers = 3
+    active, peak = [0], [0]
+    lock = threading.Lock()
+
+    def work(x):
+        with lock:
+            active[0] += 1
+            peak[0] = max(peak[0], active[0])
+        time.sleep(0.01)
+        with lock:
+            active[0] -= 1
+        return x
+
+    pool.map(work, range(30))
+    assert peak[0] <= 3
+
+
+def test_throttling_halves_limit_and_retries():
+    pool = AdaptiveIOPool(max_workers=16, initial=8, retries=2, backoff=0)
+    calls = {}
+
+    def flaky(x):
+        calls[x] = calls.get(x, 0) + 1
+        if calls[x] == 1:
+            raise Throttled("HTTP Error 429: Too Many Requests")
+        return x
+
+    assert pool.map(flaky, [1]) == [1]
+    stats = pool.stats()
+    assert stats["throttled"] == 1
+    assert stats["retried"] == 1
+    assert stats["concurrency"] == 4
+
+
+def test_failures_give_none_after_bounded_retries():
+    pool = AdaptiveIOPool(max_workers=4, initial=2, retries=1, backoff=0)
+    attempts = []
+
+    def broken(x):
+        attempts.append(x)
+        raise ValueError("boom")
+
+    assert pool.map(broken, ["a"]) == [None]
+    assert len(attempts) == 2
+    assert pool.stats()["failed"] == 1
+
+
+def test_timeout_returns_none_for_slow_items():
+    pool = AdaptiveIOPool(max_workers=2, initial=2, retries=0)
+    results = pool.map(lambda x: time.sleep(0.5 if x else 0) or x, [0, 1], timeout=0.2)
+    assert results == [0, None]
+    assert pool.stats()["timeout"] == 1
+
+
+def test_hung_call_gives_its_slot_back():
+    pool = AdaptiveIOPool(max_workers=4, initial=1, retries=0)
+    release = threading.Event()
+
+    def work(x):
+        if x == "hung":
+            release.wait(5)
+        return x
+
+    assert pool.map(work, ["hung"], timeout=0.1) == [None]
+    # The hung thread still runs, but the single slot is free again
+    start = time.perf_counter()
+    assert pool.map(work, ["a", "b"], timeout=1) == ["a", "b"]
+    assert time.perf_counter() - start < 0.5
+    assert pool.stats()["timeout"] == 1
+    release.set()
+
+
+def test_is_throttled():
+    assert is_throttled(Throttled())
+    assert is_throttled(Exception("HTTP Error 429"))
+    assert not is_throttled(ValueError("boom"))
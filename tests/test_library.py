@@ -0,0 +1,56 @@
+import time
+
+from library import Library, to_fts_query
+
+
+def test_search_ranks_and_filters_by_kind(tmp_path):
+    library = Library(str(tmp_path / "library.db"))
+    library.add("transcript", "On parle ici de la transition énergétique et du nucléaire.", title="Débat énergie", url="u1")
+    library.add("summary", "Résumé : la transition énergétique passe par le solaire.", title="Transition énergétique", url="u1")
+    library.add("synthesis", "Synthèse sur la cuisine italienne.", title="Cuisine")
+
+    hits = library.search("energetique")
+    assert [hit.kind for hit in hits][:1] == ["summary"]  # title match weighs more
+    assert {hit.title for hit in hits} == {"Débat énergie", "Transition énergétique"}
+    assert "**" in hits[0].snippet
+
+    assert [hit.kind for hit in library.search("transition", kind="transcript")] == ["transcript"]
+    assert library.search("pizza") == []
+
+
+def test_add_is_incremental_and_idempotent(tmp_path):
+    library = Library(str(tmp_path / "library.db"))
+    first = library.add("summary", "Texte identique", title="A", url="u1", sources=[{"title": "A", "url": "u1"}])
+    assert first is not None
+    assert library.add("summary", "Texte identique", title="A", url="u1") is None
+    assert library.add("summary", "   ", title="vide") is None
+    assert library.count() == 1
+    assert library.get(first)["sources"] == [{"title": "A", "url": "u1"}]
+
+
+def test_add_accepts_streamed_pieces(tmp_path):
+    library = Library(str(tmp_path / "library.db"))
+    doc_id = library.add("transcript", iter(["Premier segment.", "Second segment."]), title="Long", url="f.mp4")
+    assert library.get(doc_id)["content"] == "Premier segment.\n\nSecond segment."
+    assert library.add("transcript", "Premier segment.\n\nSecond segment.", url="f.mp4") is None
+
+
+def test_prefix_query_and_user_input_is_escaped(tmp_path):
+    library = Library(str(tmp_path / "library.db"))
+    library.add("transcript", "Les réseaux de neurones convolutifs.", title="IA")
+    assert len(library.search("neuro")) == 1
+    assert library.search('"AND OR (') == []
+    assert to_fts_query("c'est NEAR") == '"c"* "est"* "NEAR"*'
+
+
+def test_search_stays_fast_on_many_documents(tmp_path):
+    library = Library(str(tmp_path / "library.db"))
+    words = ["climat", "économie", "histoire", "science", "politique", "santé", "sport", "musique"]
+    for i in range(5000):
+        library.add("transcript", " ".join(words[(i + k) % len(words)] for k in range(50)) + f" document{i}", title=f"Vidéo {i}")
+
+    start = time.perf_counter()
+    hits = library.search("climat économie", limit=20)
+    elapsed = time.perf_counter() - start
+    assert len(hits) == 20
+    assert elapsed < 0.5
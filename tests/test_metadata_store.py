@@ -0,0 +1,39 @@
+import time
+from datetime import datetime, timedelta, timezone
+
+from metadata_store import MetadataStore
+from models import VideoMeta
+
+
+def make_video(video_id, length=600, days_old=1, author="Arte"):
+    return VideoMeta(
+        watch_url=f"https://youtube.com/watch?v={video_id}",
+        title=f"Titre {video_id}",
+        author=author,
+        length=length,
+        views=1000,
+        publish_date=datetime.now(timezone.utc) - timedelta(days=days_old),
+    )
+
+
+def test_roundtrip_keeps_metadata(tmp_path):
+    store = MetadataStore(str(tmp_path / "meta.db"))
+    video = make_video("aaaaaaaaaaa")
+    store.upsert_many([video])
+
+    found = store.get_fresh(["aaaaaaaaaaa", "bbbbbbbbbbb"])
+    assert list(found) == ["aaaaaaaaaaa"]
+    assert found["aaaaaaaaaaa"].title == video.title
+    assert abs((found["aaaaaaaaaaa"].publish_date - video.publish_date).total_seconds()) < 1
+
+
+def test_stale_rows_are_not_returned(tmp_path):
+    store = MetadataStore(str(tmp_path / "meta.db"), ttl=60)
+    store.upsert_many([make_video("aaaaaaaaaaa")], fetched_at=time.time() - 120)
+    store.upsert_many([make_video("bbbbbbbbbbb")])
+    assert list(store.get_fresh(["aaaaaaaaaaa", "bbbbbbbbbbb"])) == ["bbbbbbbbbbb"]
+
+    store.upsert_many([make_video("aaaaaaaaaaa")])
+    assert store.count() == 2
+    assert len(store.get_fresh(["aaaaaaaaaaa", "bbbbbbbbbbb"])) == 2
+
@@ -0,0 +1,31 @@
+import pytest
+
+from models import LocalVideo, VideoMeta
+
+class FakeYouTube:
+    watch_url = "https://youtube.com/watch?v=dQw4w9WgXcQ"
+    title = "Titre"
+    author = "Arte"
+    length = 600
+    views = 1200
+    publish_date = None
+    thumbnail_url = "https://i.ytimg.com/vi/dQw4w9WgXcQ/hq.jpg"
+    description = "Description"
+
+def test_from_youtube_copies_metadata():
+    meta = VideoMeta.from_youtube(FakeYouTube())
+    assert meta.title == "Titre"
+    assert meta.length == 600
+    assert meta.video_id == "dQw4w9WgXcQ"
+    assert not meta.is_boosted
+
+def test_records_use_slots():
+    meta = VideoMeta(watch_url="https://youtube.com/watch?v=dQw4w9WgXcQ")
+    with pytest.raises(AttributeError):
+        meta.title_attr = "monkey-patch"
+
+def test_local_video_defaults():
+    v = LocalVideo("./temp_videos/reunion.mp4", "reunion.mp4")
+    assert v.author == "Fichier Local"
+    assert v.publish_date is not None
+    assert v.watch_url.endswith(".mp4")
@@ -0,0 +1,102 @@
+import gc
+import os
+import time
+
+import pytest
+
+from pdf_worker import PDFRenderer, PDFTooLargeError
+
+
+def slow_render(html, path):
+    time.sleep(30)
+    return path
+
+
+def failing_render(html, path):
+    raise ValueError("boom")
+
+
+@pytest.fixture
+def renderer(tmp_path):
+    renderers = []
+
+    def make(**kwargs):
+        r = PDFRenderer(tmp_dir=str(tmp_path), **kwargs)
+        renderers.append(r)
+        return r
+
+    yield make
+    for r in renderers:
+        r.reset()
+
+
+def test_job_renders_to_file_in_worker(renderer, pdf_render):
+    job = renderer(render_fn=pdf_render).submit("<p>Bonjour</p>")
+    assert job.result().endswith(".pdf")
+    assert job.read_bytes() == b"%PDF-<p>Bonjour</p>"
+    assert job.status == "done" and job.kind == "pdf"
+
+
+def test_timeout_grows_with_size_and_kills_stuck_render(renderer):
+    r = renderer(render_fn=slow_render, timeout=0.5, chars_per_second=1000)
+    assert r.timeout_for("x" * 2000) == pytest.approx(2.5)
+
+    job = r.submit("<p>long</p>")
+    start = time.monotonic()
+    with pytest.raises(TimeoutError):
+        job.result()
+    assert time.monotonic() - start < 10
+    assert job.status == "timeout"
+    # Only the stuck worker is killed: the pool is kept and the next job runs
+    assert r.generation == 0
+
+
+def test_timeout_does_not_fail_other_jobs(renderer, pdf_render):
+    r = renderer(workers=2, render_fn=pdf_render, timeout=1, chars_per_second=10**9)
+    r.submit("<p>démarrage</p>").result()
+    r.render_fn = slow_render
+    stuck = r.submit("<p>long</p>")
+    r.render_fn = pdf_render
+    other = r.submit("<p>court</p>")
+    with pytest.raises(TimeoutError):
+        stuck.result()
+    assert other.read_bytes() == b"%PDF-<p>court</p>"
+
+
+def test_worker_errors_are_reported(renderer):
+    job = renderer(render_fn=failing_render).submit("<p>x</p>")
+    with pytest.raises(ValueError):
+        job.result()
+    assert job.status == "failed"
+
+
+def test_large_documents_fall_back_to_printable_html(renderer):
+    job = renderer(render_fn=slow_render, max_html_chars=10).submit("<p>" + "x" * 100 + "</p>", fallback_html="<html>print</html>")
+    assert job.done()
+    assert job.kind == "html" and job.extension == "print.html"
+    assert job.read_bytes() == b"<html>print</html>"
+
+
+def test_large_document_is_not_passed_off_as_pdf(renderer):
+    job = renderer(max_html_chars=10).submit("<p>" + "x" * 100 + "</p>", fallback_html="<html>print</html>")
+    assert job.mime.startswith("text/html")
+    with pytest.raises(PDFTooLargeError):
+        job.read_pdf()
+
+
+def test_file_lives_as_long_as_a_job_handle(renderer, pdf_render):
+    job = renderer(render_fn=pdf_render).submit("<p>x</p>")
+    path = job.result()
+    assert os.path.exists(path)
+    del job
+    gc.collect()
+    assert not os.path.exists(path)
+
+
+def test_sweep_removes_old_leftovers(renderer, tmp_path):
+    old, recent = tmp_path / "synthetia_old.pdf", tmp_path / "synthetia_new.pdf"
+    old.write_bytes(b"x")
+    recent.write_bytes(b"x")
+    os.utime(old, (time.time() - 7200, time.time() - 7200))
+    assert renderer().sweep(max_age=3600) == 1
+    assert not old.exists() and recent.exists()
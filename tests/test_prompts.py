@@ -0,0 +1,16 @@
+from prompts import PromptManager
+
+def test_chunk_messages_share_static_prefix():
+    pm = PromptManager()
+    first = pm.get_messages("medium", "chunk", "Premier fragment")
+    second = pm.get_messages("medium", "chunk", "Second fragment")
+    assert first[0]["role"] == "system"
+    assert first[0] == second[0]
+    assert "Premier fragment" in first[1]["content"]
+    assert "fragment" not in first[0]["content"]
+
+def test_global_analysis_instructions_in_user_message():
+    pm = PromptManager()
+    messages = pm.get_messages("analysis", "global", {"content": "Notes", "instructions": "Focus économie"})
+    assert "Focus économie" in messages[1]["content"]
+    assert messages[0]["content"] == pm.get_system_prompt("analysis", "global")
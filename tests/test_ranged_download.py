@@ -0,0 +1,163 @@
+import concurrent.futures
+import os
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from ranged_download import BackgroundDownload, DownloadCancelled, RangedDownloader, TokenBucket
+
+DATA = os.urandom(300_000)
+
+
+class RangeHandler(BaseHTTPRequestHandler):
+    """Serves DATA with Range support; can cut the first responses short to simulate drops."""
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        server = self.server
+        server.requests.append(self.headers.get("Range"))
+        start, end = map(int, re.match(r"bytes=(\d+)-(\d+)", self.headers["Range"]).groups())
+        end = min(end, len(DATA) - 1)
+        body = DATA[start:end + 1]
+        self.send_response(206)
+        self.send_header("Content-Range", f"bytes {start}-{end}/{len(DATA)}")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        with server.lock:
+            drop = server.drops > 0 and len(body) > 1000
+            server.drops -= drop
+        if drop:
+            self.wfile.write(body[:len(body) // 2])
+            self.close_connection = True
+            return
+        for i in range(0, len(body), 16_384):
+            self.wfile.write(body[i:i + 16_384])
+            time.sleep(server.delay)
+
+
+@pytest.fixture
+def server():
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), RangeHandler)
+    httpd.requests, httpd.drops, httpd.delay, httpd.lock = [], 0, 0.0, threading.Lock()
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def url_of(server):
+    return f"http://127.0.0.1:{server.server_address[1]}/audio.m4a"
+
+
+def downloader(**kwargs):
+    return RangedDownloader(**{"chunk_size": 64_000, "parallel": 4, "backoff": 0.01, "bucket": TokenBucket(0), **kwargs})
+
+
+def test_parallel_ranges_rebuild_the_file(server, tmp_path):
+    path = tmp_path / "audio.m4a"
+    stats = downloader().download(url_of(server), str(path))
+
+    assert path.read_bytes() == DATA
+    assert stats.size == stats.downloaded == len(DATA)
+    assert stats.chunks == 5 and stats.retries == 0 and stats.throughput > 0
+    assert not os.path.exists(f"{path}.part") and not os.path.exists(f"{path}.part.json")
+
+
+def test_dropped_ranges_resume_from_last_byte(server, tmp_path):
+    server.drops = 2
+    path = tmp_path / "audio.m4a"
+    stats = downloader().download(url_of(server), str(path), size=len(DATA))
+
+    assert path.read_bytes() == DATA
+    assert stats.retries == 2
+    # Retries ask only for the missing end of the range, nothing is downloaded twice
+    assert stats.downloaded == len(DATA)
+    starts = [int(re.match(r"bytes=(\d+)-", r).group(1)) for r in server.requests]
+    assert len([s for s in starts if s % 64_000]) == 2
+
+
+def test_cancel_keeps_partial_file_for_resume(server, tmp_path):
+    server.delay = 0.05
+    path = tmp_path / "audio.m4a"
+    cancel = threading.Event()
+    threading.Timer(0.1, cancel.set).start()
+    with pytest.raises(DownloadCancelled):
+        downloader(parallel=1).download(url_of(server), str(path), size=len(DATA), cancel=cancel)
+    assert os.path.exists(f"{path}.part") and not path.exists()
+
+    server.delay = 0.0
+    stats = downloader(parallel=1).download(url_of(server), str(path), size=len(DATA))
+    assert path.read_bytes() == DATA
+    assert stats.resumed > 0 and stats.resumed + stats.downloaded >= len(DATA)
+
+
+def test_failures_raise_after_retries(tmp_path):
+    def broken(request, timeout):
+        raise ConnectionError("connexion refusée")
+
+    with pytest.raises(ConnectionError):
+        downloader(retries=2, opener=broken).download("http://x/a", str(tmp_path / "a.m4a"), size=1000)
+
+
+def test_token_bucket_caps_bandwidth_of_concurrent_downloads(server, tmp_path):
+    bucket = TokenBucket(rate=1_000_000, burst=100_000)
+    start = time.perf_counter()
+    threads = [threading.Thread(target=downloader(bucket=bucket).download, args=(url_of(server), str(tmp_path / f"{i}.m4a"), len(DATA)))
+               for i in range(2)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+
+    # 600 KB at 1 MB/s with a 100 KB burst takes at least 0.5 s
+    assert elapsed >= 0.45
+    assert (tmp_path / "0.m4a").read_bytes() == DATA == (tmp_path / "1.m4a").read_bytes()
+
+
+def test_background_download_cancel_stops_transfer(server, tmp_path):
+    server.delay = 0.05
+    path = tmp_path / "audio.m4a"
+    with concurrent.futures.ThreadPoolExecutor(max_workers=1) as executor:
+        download = BackgroundDownload(executor, downloader(parallel=1).download, url_of(server), str(path), len(DATA))
+        time.sleep(0.1)
+        download.cancel()
+        with pytest.raises(DownloadCancelled):
+            download.result(timeout=5)
+    assert not path.exists()
+
+
+def test_background_download_cancel_leaves_no_partial_file(server, tmp_path):
+    server.delay = 0.05
+    path = tmp_path / "audio.m4a"
+    with concurrent.futures.ThreadPoolExecutor(max_workers=1) as executor:
+        download = BackgroundDownload(executor, downloader(parallel=2).download, url_of(server), str(path), len(DATA))
+        # Wait until the transfer is under way
+        deadline = time.monotonic() + 5
+        while not os.path.exists(f"{path}.part.json") and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert os.path.exists(f"{path}.part")
+        download.cancel()
+        with pytest.raises(DownloadCancelled):
+            download.result(timeout=5)
+    assert sorted(os.listdir(tmp_path)) == []
+
+
+def test_background_download_cancelled_after_completion_is_discarded(server, tmp_path):
+    path = tmp_path / "audio.m4a"
+
+    def fetch(url, cancel=None):
+        downloader().download(url, str(path), len(DATA), cancel=cancel)
+        return str(path), "titre"
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=1) as executor:
+        download = BackgroundDownload(executor, fetch, url_of(server))
+        assert download.result(timeout=5)[0] == str(path)
+        download.cancel()
+    assert not path.exists()
@@ -0,0 +1,41 @@
+from datetime import datetime, timedelta, timezone
+
+from models import VideoMeta
+from ranking import FeatureTable, RankingEngine
+
+NOW = datetime(2025, 1, 1, tzinfo=timezone.utc)
+
+def make(url, **kwargs):
+    return VideoMeta(watch_url=url, **kwargs)
+
+def test_weights_change_the_order():
+    popular = make("a", views=1_000_000, publish_date=NOW - timedelta(days=400), length=600)
+    fresh = make("b", views=100, publish_date=NOW - timedelta(days=1), length=600)
+    table = FeatureTable.from_videos([popular, fresh])
+    by_views = RankingEngine({"views": 1, "recency": 0, "duration": 0, "channel": 0, "terms": 0}).rank(table, now=NOW)
+    by_date = RankingEngine({"views": 0, "recency": 1, "duration": 0, "channel": 0, "terms": 0}).rank(table, now=NOW)
+    assert [v.watch_url for v in by_views] == ["a", "b"]
+    assert [v.watch_url for v in by_date] == ["b", "a"]
+
+def test_duration_fit_and_channel_boost():
+    short = make("short", length=200, author="Random")
+    long = make("long", length=3600, author="Arte")
+    table = FeatureTable.from_videos([short, long], query="", active_categories=["Documentary"])
+    engine = RankingEngine()
+    scores = engine.score(table, duration_mode="long", now=NOW)
+    assert scores[1] > scores[0]
+    assert table.channel.tolist() == [0.0, 1.0]
+
+def test_missing_metadata_is_scored():
+    table = FeatureTable.from_videos([make("x"), make("y", views=10)])
+    assert len(RankingEngine().rank(table)) == 2
+
+def test_reorder_keeps_the_features_of_each_video():
+    videos = [make("a", views=10, length=600), make("b", views=1000, length=200), make("c", views=10, length=600)]
+    table = FeatureTable.from_videos(videos)
+    reordered = table.reorder([videos[2], videos[0], videos[1]])
+    assert [v.watch_url for v in reordered.videos] == ["c", "a", "b"]
+    assert reordered.views.tolist() == [10, 10, 1000]
+    assert reordered.lengths.tolist() == [600, 600, 200]
+    # Ties follow the new order
+    assert [v.watch_url for v in RankingEngine().rank(reordered, now=NOW)] == ["b", "c", "a"]
@@ -0,0 +1,64 @@
+import numpy as np
+
+from retrieval import ChunkRetriever, EmbeddingIndex, OllamaEmbedder, split_passages
+
+VOCAB = ["economie", "inflation", "emploi", "climat", "glacier", "ocean", "football", "match"]
+
+
+class BagOfWordsEmbedder:
+    """Deterministic stand-in for an embedding model: counts of a tiny vocabulary."""
+
+    def __init__(self):
+        self.calls = 0
+
+    def embed(self, texts):
+        self.calls += 1
+        return np.array([[text.lower().count(word) for word in VOCAB] for text in texts], dtype=np.float32)
+
+
+def test_split_passages_respects_size_and_words():
+    text = " ".join(f"mot{i}" for i in range(500))
+    passages = split_passages(text, max_chars=100)
+    assert all(len(p) <= 100 for p in passages)
+    assert " ".join(passages).split() == text.split()
+
+
+def test_index_returns_cosine_top_k():
+    index = EmbeddingIndex()
+    index.add(np.array([[1, 0], [0, 1], [1, 1]], dtype=np.float32), ["x", "y", "xy"])
+    hits = index.search(np.array([1, 0.1]), k=2)
+    assert [payload for _, payload in hits] == ["x", "xy"]
+    assert hits[0][0] > hits[1][0]
+
+
+def test_retriever_keeps_only_relevant_passages_in_order():
+    economy = "L'inflation pèse sur l'economie et l'emploi. "
+    climate = "Le glacier fond et l'ocean se réchauffe avec le climat. "
+    sport = "Le match de football a été serré. "
+    documents = [
+        (0, (climate * 5) + (economy * 5) + (sport * 5)),
+        (1, sport * 20),
+        (2, (economy * 3) + (climate * 3)),
+    ]
+    retriever = ChunkRetriever(BagOfWordsEmbedder(), top_k=3, chunk_chars=160)
+    selected = retriever.select(documents, "impact sur l'economie, l'inflation et l'emploi")
+
+    assert 1 not in selected
+    assert set(selected) == {0, 2}
+    assert all("economie" in passage for passages in selected.values() for passage in passages)
+    assert sum(len(p) for p in selected.values()) == 3
+
+
+def test_ollama_embedder_batches_requests():
+    class FakeClient:
+        def __init__(self):
+            self.batches = []
+
+        def embed(self, model, input):
+            self.batches.append(len(input))
+            return {"embeddings": [[float(len(text)), 1.0] for text in input]}
+
+    client = FakeClient()
+    vectors = OllamaEmbedder(client, model="test", batch_size=4).embed([f"t{i}" for i in range(10)])
+    assert vectors.shape == (10, 2)
+    assert client.batches == [4, 4, 2]
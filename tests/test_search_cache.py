@@ -0,0 +1,38 @@
+import time
+from types import SimpleNamespace
+
+from search_cache import SearchCache, SearchEntry, make_search_key
+
+def video(url):
+    return SimpleNamespace(watch_url=url)
+
+def test_key_is_normalized():
+    a = make_search_key("  IA  Générative ", exclude_terms="gaming shorts", active_categories=["Tech", "News"])
+    b = make_search_key("ia générative", exclude_terms="shorts gaming", active_categories=["News", "Tech"])
+    assert a == b
+
+def test_entries_expire_after_ttl():
+    cache = SearchCache(ttl=0.05)
+    key = make_search_key("python")
+    cache.put(SearchEntry(key=key, search_obj=None))
+    assert cache.get(key) is not None
+    time.sleep(0.1)
+    assert cache.get(key) is None
+
+def test_prefetch_adds_next_unique_page():
+    cache = SearchCache()
+    entry = SearchEntry(key=make_search_key("python"), search_obj=None)
+    entry.add_page([video("a"), video("b")])
+    cache.schedule_prefetch(entry, lambda e: ([video("b"), video("c")], 2))
+    entry.prefetch.result(timeout=2)
+    assert [v.watch_url for v in entry.pages[1]] == ["c"]
+
+def test_filtered_out_page_does_not_end_search():
+    entry = SearchEntry(key=make_search_key("python"), search_obj=None)
+    entry.add_page([video("a")])
+    # Every raw result already seen or filtered out: YouTube still has more
+    assert entry.add_page([video("a")], fetched=20) == []
+    assert entry.add_page([], fetched=20) == []
+    assert not entry.exhausted
+    entry.add_page([], fetched=0)
+    assert entry.exhausted and len(entry.pages) == 1
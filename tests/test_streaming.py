@@ -0,0 +1,90 @@
+import random
+import threading
+import time
+
+import pytest
+
+from prompts import PromptManager
+from streaming import StreamingChunker, in_background
+from summarizer import Summarizer
+
+WORDS = "le budget de l'état progresse encore cette année selon le ministre des finances".split()
+
+
+def segment_texts(n=12, seed=1):
+    rng = random.Random(seed)
+    return [" ".join(rng.choice(WORDS) for _ in range(rng.randint(50, 400))) for _ in range(n)]
+
+
+def test_streaming_chunks_match_chunk_text(make_client):
+    summarizer = Summarizer(make_client(), "model", PromptManager(), summary_type="short")
+    for max_chars in (500, 1000, 6000):
+        texts = segment_texts()
+        chunker = StreamingChunker(max_chars)
+        chunks = [chunk for text in texts for chunk in chunker.feed(text)] + chunker.flush()
+
+        summarizer._get_chunk_size = lambda: max_chars
+        assert chunks == summarizer.chunk_text("\n\n".join(texts))
+
+
+def test_chunks_are_released_as_soon_as_full():
+    chunker = StreamingChunker(100, separator="")
+    assert chunker.feed("mot " * 10) == []
+    assert chunker.feed("mot " * 30) == [("mot " * 25).strip()]
+    assert chunker.flush() == [("mot " * 15).strip()]
+    assert chunker.flush() == []
+
+
+def test_summarize_stream_matches_summarize_long_text(tmp_path, monkeypatch, make_client):
+    monkeypatch.chdir(tmp_path)
+    texts = segment_texts()
+    batch, stream = make_client(), make_client()
+    a = Summarizer(batch, "model", PromptManager(), summary_type="short").summarize_long_text("\n\n".join(texts), "auteur")
+    b = Summarizer(stream, "model", PromptManager(), summary_type="short").summarize_stream(iter(texts), "auteur")
+    assert a == b
+    assert [c["messages"] for c in batch.calls] == [c["messages"] for c in stream.calls]
+
+
+def test_background_producer_overlaps_with_consumer():
+    def produce():
+        for i in range(4):
+            time.sleep(0.1)  # transcription of a segment
+            yield i
+
+    start = time.perf_counter()
+    consumed = []
+    for item in in_background(produce()):
+        time.sleep(0.1)  # summarization of a chunk
+        consumed.append(item)
+    elapsed = time.perf_counter() - start
+
+    assert consumed == [0, 1, 2, 3]
+    # Sequential would take 0.8 s; overlapped it is close to 0.5 s
+    assert elapsed < 0.7
+
+
+def test_producer_errors_reach_the_consumer():
+    def produce():
+        yield "segment 1"
+        raise RuntimeError("Whisper en panne")
+
+    items = in_background(produce())
+    assert next(items) == "segment 1"
+    with pytest.raises(RuntimeError, match="panne"):
+        next(items)
+
+
+def test_closing_the_consumer_stops_the_producer():
+    produced = []
+
+    def produce():
+        for i in range(100):
+            produced.append(i)
+            yield i
+
+    items = in_background(produce(), maxsize=1)
+    next(items)
+    items.close()
+    time.sleep(0.3)
+    assert len(produced) < 10
+    assert not any(t.name == "producer" and t.is_alive() for t in threading.enumerate())
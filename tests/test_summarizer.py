@@ -8,4 +8,14 @@ def test_summarize_text():
     client = DummyClient()
     summarizer = Summarizer(client, "model")
     result = summarizer.summarize_text("Texte de test", "author")
-    assert "Résumé" in result
\ No newline at end of file
+    assert "Résumé" in result
+
+def test_chunks_use_constant_context_and_keep_alive(make_client):
+    from prompts import PromptManager
+    client = make_client()
+    summarizer = Summarizer(client, "model", PromptManager(), summary_type="short", keep_alive="10m")
+    summarizer.summarize_chunk("court")
+    summarizer.summarize_chunk("un peu plus long " * 300)
+    chunk_calls = [c for c in client.calls if c["messages"][0]["content"] == client.calls[0]["messages"][0]["content"]]
+    assert len({c["options"]["num_ctx"] for c in chunk_calls}) == 1
+    assert all(c["keep_alive"] == "10m" for c in client.calls)
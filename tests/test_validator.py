@@ -0,0 +1,25 @@
+from validator import RelevanceValidator, parse_verdict
+
+def test_parse_verdict_variants():
+    assert parse_verdict('{"pertinent": true}') is True
+    assert parse_verdict("True.") is True
+    assert parse_verdict("Vrai") is True
+    assert parse_verdict("Faux, le texte est hors sujet") is False
+    assert parse_verdict("") is None
+
+def test_validate_keyword_overlap():
+    validator = RelevanceValidator(threshold=0.5)
+    text = "Les impacts économiques de l'intelligence artificielle sur l'emploi."
+    assert validator.validate(text, "Impact économique de l'IA")
+    assert not validator.validate("Recette de la tarte aux pommes.", "Impact économique de l'IA")
+
+def test_llm_check_only_on_borderline():
+    calls = []
+    def llm_check(text, subject):
+        calls.append(subject)
+        return '{"pertinent": false}'
+    validator = RelevanceValidator(threshold=0.5, margin=0.15, llm_check=llm_check)
+    assert validator.validate("économie mondiale", "économie mondiale")
+    assert calls == []
+    assert not validator.validate("économie et santé", "économie climat")
+    assert len(calls) == 1